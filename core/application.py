@@ -1,26 +1,134 @@
 # just something temporarily, for ease of projection
 
 import sys
+import os
+import numpy as np
+from PIL import Image
 import image_warp as iw
-from PyQt5.QtWidgets import QApplication, QLabel, QMainWindow
-from PyQt5.QtGui import QPixmap, QPalette
-from PyQt5.QtCore import Qt
+import warp_pipeline as wp
+from PyQt5.QtWidgets import QApplication, QLabel, QMainWindow, QSlider, QVBoxLayout, QWidget
+from PyQt5.QtGui import QPixmap, QPalette, QImage
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from utils.tracing import get_logger
+
+logger = get_logger(__name__)
+
+# Live tuning warps a small preview while the slider moves and the full image once it rests
+PREVIEW_SIZE = 512
+IDLE_DELAY_MS = 400
+# Slider positions are tenths of a stretch factor
+STRETCH_SLIDER_STEPS = 10
+SCALE_DOWN_FACTOR = 1.01
+
+_QIMAGE_FORMATS = {1: QImage.Format_Grayscale8, 3: QImage.Format_RGB888, 4: QImage.Format_RGBA8888}
+
+# Single background writer so debug saves never hold up the display
+_save_executor = ThreadPoolExecutor(max_workers=1)
+# Full resolution warps while tuning, one at a time so a newer stretch never races an older one
+_warp_executor = ThreadPoolExecutor(max_workers=1)
+
+# Preview maps are tiny, keep many so dragging the slider back and forth never recomputes them
+@lru_cache(maxsize=32)
+def preview_warp_map(bulge_factor, bulge_exponent):
+    """
+    Returns the warp map of the decimated preview, cached apart from the full resolution maps.
+
+    Args:
+        bulge_factor (float): Strength of the radial bulge.
+        bulge_exponent (float): Exponent applied to the radius inside the bulge.
+
+    Returns:
+        WarpMap: The mapping for a PREVIEW_SIZE image.
+    """
+    return iw.WarpMap(PREVIEW_SIZE, bulge_factor, bulge_exponent)
+
+def to_qimage(image):
+    """
+    Wraps an image as a QImage without copying the pixel data.
+
+    Args:
+        image (np.array or PIL.Image): uint8 image with 1, 3 or 4 channels.
+
+    Returns:
+        QImage: Image sharing the array buffer.
+    """
+    if isinstance(image, Image.Image):
+        if image.mode not in ("L", "RGB", "RGBA"):
+            image = image.convert("RGBA")
+        image = np.asarray(image)
+
+    array = np.ascontiguousarray(image, dtype=np.uint8)
+    channels = 1 if array.ndim == 2 else array.shape[2]
+    if channels not in _QIMAGE_FORMATS:
+        raise ValueError(f"Unsupported number of channels: {channels}")
+
+    height, width = array.shape[:2]
+    qimage = QImage(array.data, width, height, array.strides[0], _QIMAGE_FORMATS[channels])
+    # QImage does not own the buffer, so keep the array alive alongside it
+    qimage.array = array
+    return qimage
+
+def save_async(image, path):
+    """
+    Writes an image to disk on a background thread, e.g. for debugging the warp.
+
+    Args:
+        image (np.array or PIL.Image): The image to save.
+        path (str): Destination file path.
+
+    Returns:
+        Future: Completes once the file is written.
+    """
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(image)
+    return _save_executor.submit(image.save, path)
 
 class ImageWindow(QMainWindow):
-    def __init__(self, image_path):
+    # Delivers a full resolution warp from the worker thread to the GUI thread, with its request number
+    fullResolutionReady = pyqtSignal(int, object)
+
+    # image can be a file path, a NumPy array or a PIL image, arrays are shown without a disk round-trip
+    # screen_index picks the display (projector) the window opens on
+    # when tuning, the warp table of a stretch accepted with Enter is persisted to cache_dir
+    def __init__(self, image, tuning_source=None, stretch_factor=8, cache_dir=None, screen_index=None):
         super().__init__()
-        self.image_path = image_path
+        self.image = image
+        self.screen_index = screen_index
+        # Source image to re-warp when live tuning, None shows image_path as is
+        self.tuning_source = tuning_source
+        self.stretch_factor = stretch_factor
+        self.cache_dir = cache_dir
+        self.pixmap = None
+        self.scaled_pixmap = None
+        self.scaled_size = None
+        self.preview_array = None
+        # Bumped for every full resolution request, results of older requests are dropped
+        self.warp_request = 0
+        self.fullResolutionReady.connect(self.onFullResolutionReady)
         self.initUI()
 
     def initUI(self):
         # Create a label that will hold the image
         self.label = QLabel(self)
         self.label.setAlignment(Qt.AlignCenter)  # Align the image in the center of QLabel
-        self.setCentralWidget(self.label)
-        self.updateImage()
+
+        if self.tuning_source is None:
+            self.setCentralWidget(self.label)
+        else:
+            self.initTuningUI()
+        # A window fed by a PipelinePlayer starts out empty
+        if self.image is not None:
+            self.setImage(self.image)
 
         # Window settings
         self.setWindowTitle('Image Viewer')
+        if self.screen_index is not None:
+            # Fall back to the last screen when fewer projectors are connected
+            screens = QApplication.screens()
+            screen = screens[min(self.screen_index, len(screens) - 1)]
+            self.move(screen.availableGeometry().topLeft())
         self.showMaximized()
 
         # Set the background to black
@@ -28,41 +136,180 @@ class ImageWindow(QMainWindow):
         palette.setColor(QPalette.Window, Qt.black)
         self.setPalette(palette)
 
-    def updateImage(self):
-        # Load the image
-        pixmap = QPixmap(self.image_path)
+    def initTuningUI(self):
+        # Slider under the image to adjust the stretch factor live
+        self.slider = QSlider(Qt.Horizontal, self)
+        self.slider.setRange(0, 20 * STRETCH_SLIDER_STEPS)
+        self.slider.setValue(round(self.stretch_factor * STRETCH_SLIDER_STEPS))
+        self.slider.valueChanged.connect(self.onStretchChanged)
+
+        # Restarted on every slider move, fires once the input has been idle for a while
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(IDLE_DELAY_MS)
+        self.idle_timer.timeout.connect(self.warpFullResolution)
+
+        container = QWidget(self)
+        layout = QVBoxLayout(container)
+        layout.addWidget(self.label, 1)
+        layout.addWidget(self.slider)
+        self.setCentralWidget(container)
+
+    def onStretchChanged(self, value):
+        self.stretch_factor = value / STRETCH_SLIDER_STEPS
+        self.warpPreview()
+        self.idle_timer.start()
 
-        # Scale the pixmap to fit the current window size, maintaining aspect ratio
-        scaled_pixmap = pixmap.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.label.setPixmap(scaled_pixmap)
+    def warpPreview(self):
+        # The decimated proxy only depends on the source, so it is built once
+        if self.preview_array is None:
+            proxy = iw.create_proxy(self.tuning_source, SCALE_DOWN_FACTOR)
+            self.preview_array = np.array(proxy.resize((PREVIEW_SIZE, PREVIEW_SIZE), Image.BILINEAR))
+
+        bulge_factor, bulge_exponent = iw.stretch_to_bulge(self.stretch_factor)
+        self.setImage(preview_warp_map(bulge_factor, bulge_exponent).apply(self.preview_array))
+
+    def warpFullResolution(self):
+        # Warp on the worker so the slider stays responsive, the signal hands the result back
+        self.warp_request += 1
+        request = self.warp_request
+        bulge_factor, bulge_exponent = iw.stretch_to_bulge(self.stretch_factor)
+        # No cache_dir: every slider stop would otherwise leave a full size table on disk
+        future = _warp_executor.submit(iw.warp_image, self.tuning_source, bulge_factor=bulge_factor,
+                                       bulge_exponent=bulge_exponent, scale_down_factor=SCALE_DOWN_FACTOR)
+        future.add_done_callback(lambda done: self.fullResolutionReady.emit(request, done))
+
+    def onFullResolutionReady(self, request, future):
+        # The slider moved on since this warp was requested, a newer one is on its way
+        if request != self.warp_request:
+            return
+        if future.exception() is not None:
+            logger.error("Full resolution warp failed", exc_info=future.exception())
+            return
+        self.setImage(future.result())
+
+    def acceptStretch(self):
+        # Persist the table of the tuned stretch, so the next start with it skips computing the warp
+        if self.cache_dir is None:
+            return
+        bulge_factor, bulge_exponent = iw.stretch_to_bulge(self.stretch_factor)
+        size = iw.create_proxy(self.tuning_source, SCALE_DOWN_FACTOR).size[0]
+        _warp_executor.submit(lambda: iw.save_warp_map(iw.get_warp_map(size, bulge_factor, bulge_exponent),
+                                                       self.cache_dir))
+        print(f"Accepted stretch factor {self.stretch_factor}")
+
+    def keyPressEvent(self, event):
+        if self.tuning_source is not None and event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            self.acceptStretch()
+        else:
+            super().keyPressEvent(event)
+
+    def setImage(self, image):
+        if isinstance(image, str):
+            pixmap = QPixmap(image)
+        else:
+            pixmap = QPixmap.fromImage(to_qimage(image))
+        self.setPixmap(pixmap)
+
+    def setPixmap(self, pixmap):
+        self.pixmap = pixmap
+        self.scaled_pixmap = None
+        self.updateImage()
+
+    def updateImage(self):
+        if self.pixmap is None:
+            return
+        # Only rescale when the target size actually changed
+        target_size = self.label.size() if self.tuning_source is not None else self.size()
+        if self.scaled_pixmap is None or self.scaled_size != target_size:
+            # Scale the pixmap to fit the current window size, maintaining aspect ratio
+            self.scaled_pixmap = self.pixmap.scaled(target_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.scaled_size = target_size
+            self.label.setPixmap(self.scaled_pixmap)
 
     def resizeEvent(self, event):
         # Update the image when the window is resized
         self.updateImage()
         super().resizeEvent(event)
 
+class PipelinePlayer:
+    """
+    Shows the frames of a WarpPipeline in an ImageWindow while later frames are still warped.
+
+    The pipeline runs on background threads and fills a bounded QueueSink; a timer on the
+    GUI thread takes one frame per tick, so a slow display holds the pipeline back instead
+    of the other way round.
+    """
+
+    def __init__(self, window, pipeline, fps=30, queue_size=2):
+        """
+        Args:
+            window (ImageWindow): Window the frames are shown in.
+            pipeline (WarpPipeline): Pipeline producing the warped frames.
+            fps (float): Display rate in frames per second.
+            queue_size (int): Warped frames buffered ahead of the display.
+        """
+        self.window = window
+        self.pipeline = pipeline
+        self.sink = wp.QueueSink(queue_size)
+        self.timer = QTimer(window)
+        self.timer.setInterval(max(int(1000 / fps), 1))
+        self.timer.timeout.connect(self.showNextFrame)
+
+    def start(self):
+        self.pipeline.start(self.sink, on_finished=self.sink.finish)
+        self.timer.start()
+
+    def showNextFrame(self):
+        frame = self.sink.get()
+        if frame is not None:
+            self.window.setImage(frame[1])
+        elif self.sink.done():
+            # Keep showing the last frame once the stream ends
+            self.timer.stop()
+            if self.sink.error is not None:
+                logger.error("Warp pipeline stopped", exc_info=self.sink.error)
+
+    def stop(self):
+        self.timer.stop()
+        self.pipeline.stop()
+        self.sink.close()
+
 if __name__ == '__main__':
+    from utils import tracing
+    tracing.configure()
+
     app = QApplication(sys.argv)
 
-    # Set the path to your images
-    image_1_path = 'core\image_assets\earthView1.png'
-    image_2_path = 'core\image_assets\earthView2.png'
-    
-    # Warp the images - not sustainable method
-    
-    # just place holder variable names, i kinda don't know what they do
-    stretchFactor = 8
-    bge = stretchFactor/4
-    bf = (bge*stretchFactor) / 100
-    warped_image_1 = iw.warp_image(image_1_path, bulge_factor=-bf, bulge_exponent=bge, scale_down_factor=1.01)
-    warp_path_1 = "core\image_assets\warped1.png"
-    warped_image_1.save(warp_path_1)
-    warped_image_2 = iw.warp_image(image_2_path, bulge_factor=-bf, bulge_exponent=bge, scale_down_factor=1.01)
-    warp_path_2 = "core\image_assets\warped2.png"
-    warped_image_2.save(warp_path_2)
-
-    # Create windows for each image
-    window1 = ImageWindow(warp_path_1)
-    window2 = ImageWindow(warp_path_2)
+    # One entry per projector around the balloon, views with equal settings share a warp table
+    # just place holder stretch values, i kinda don't know what they do
+    projectors = [
+        {"image": 'core\image_assets\earthView1.png', "stretch_factor": 8, "screen": 0},
+        {"image": 'core\image_assets\earthView2.png', "stretch_factor": 8, "screen": 1},
+    ]
+
+    # Shows a stretch slider under each window to tune the warp on the fly, Enter keeps the current stretch
+    live_tuning = False
+
+    # Also write the warped images to disk in the background, only needed for debugging
+    save_warped_images = False
+
+    view_settings = []
+    for projector in projectors:
+        bf, bge = iw.stretch_to_bulge(projector["stretch_factor"])
+        view_settings.append({"bulge_factor": bf, "bulge_exponent": bge, "scale_down_factor": SCALE_DOWN_FACTOR})
+
+    # Warp tables are stored here, so restarting with the same stretch skips recomputing them
+    warp_cache_dir = os.path.join("core", "image_assets", "warp_cache")
+    warped_images = iw.warp_views([projector["image"] for projector in projectors], view_settings, cache_dir=warp_cache_dir)
+
+    # Create a window for each projector, handing the warped images over in memory
+    windows = []
+    for index, (projector, warped_image) in enumerate(zip(projectors, warped_images)):
+        if save_warped_images:
+            save_async(warped_image, os.path.join("core", "image_assets", f"warped{index + 1}.png"))
+        windows.append(ImageWindow(warped_image, tuning_source=projector["image"] if live_tuning else None,
+                                   stretch_factor=projector["stretch_factor"], cache_dir=warp_cache_dir,
+                                   screen_index=projector["screen"]))
 
     sys.exit(app.exec_())
@@ -0,0 +1,63 @@
+# scaling benchmark for the tiled warp and the bicubic map, run with: python core/benchmark_warp.py [size]
+
+import sys
+import os
+import time
+import numpy as np
+from PIL import Image
+import image_warp as iw
+
+def best_time(warp, repeats=3):
+    """
+    Returns the best wall time in seconds of a call over a few runs.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        warp()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def time_warp(img_array, bulge_factor, bulge_exponent, workers, repeats=3):
+    """
+    Returns the best wall time in seconds of warp_array_tiled over a few runs.
+    """
+    return best_time(lambda: iw.warp_array_tiled(img_array, bulge_factor, bulge_exponent, workers=workers), repeats)
+
+def compare_bicubic(size, bulge_factor, bulge_exponent, repeats=5):
+    """
+    Returns the best wall times in seconds of a bicubic WarpMap and of the workaround it replaces,
+    a nearest warp at twice the size followed by a LANCZOS downscale.
+    """
+    frame = np.random.default_rng(4).integers(0, 256, (size, size, 3), dtype=np.uint8)
+    bicubic = iw.WarpMap(size, bulge_factor, bulge_exponent, "bicubic")
+    supersampled = iw.WarpMap(2 * size, bulge_factor, bulge_exponent)
+    large_frame = np.array(Image.fromarray(frame).resize((2 * size, 2 * size), Image.NEAREST))
+    workaround = lambda: Image.fromarray(supersampled.apply(large_frame)).resize((size, size), Image.LANCZOS)
+    return best_time(lambda: bicubic.apply(frame), repeats), best_time(workaround, repeats)
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+
+    # same placeholder stretch settings as application.py
+    stretchFactor = 8
+    bge = stretchFactor/4
+    bf = (bge*stretchFactor) / 100
+
+    img_array = np.random.default_rng(0).integers(0, 256, (size, size, 4), dtype=np.uint8)
+
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= os.cpu_count():
+        worker_counts.append(worker_counts[-1] * 2)
+
+    print(f"Tiled warp of a {size}x{size} RGBA image")
+    baseline = None
+    for workers in worker_counts:
+        seconds = time_warp(img_array, -bf, bge, workers)
+        baseline = baseline or seconds
+        print(f"{workers:3d} workers: {seconds:7.3f} s  speedup {baseline / seconds:5.2f}x")
+
+    bicubic_size = min(size, 1024)
+    bicubic, workaround = compare_bicubic(bicubic_size, -bf, bge)
+    print(f"Bicubic map at {bicubic_size}: {bicubic:7.3f} s, 2x nearest + LANCZOS: {workaround:7.3f} s"
+          f"  speedup {workaround / bicubic:5.2f}x")
@@ -1,9 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import OpenGL.GL as gl
 from utils.opengl_helpers import OpenGLHelpers
+from utils.texture_manager import get_texture_manager
 from utils.geo_transforms import GeoTransformer
+from utils.tracing import get_logger
 import glfw
 
+logger = get_logger(__name__)
+
 class EarthElement:
     """
     EarthElement represents a specific layer or type of data on the Earth's surface, such as continents,
@@ -13,15 +18,27 @@ class EarthElement:
         vertices (np.array): Array of vertex data.
         indices (np.array): Array of indices for indexed drawing.
         texture (GLuint): OpenGL texture ID if the element uses a texture.
+        texture_manager (TextureManager): Manager sharing the texture with other elements.
         color (list): Default color of the element used if no texture is applied.
         shader_program (GLuint): OpenGL shader program used to render this element.
         update_interval (float): Time in seconds between data updates for dynamic data.
-        last_update_time (float): Last time the data was updated.
+        last_update_time (float): Last time the data was updated, None until the first update.
         vertex_buffer (GLuint): Vertex Buffer Object (VBO) for vertex data.
         index_buffer (GLuint): Element Buffer Object (EBO) for index data.
+        vertex_array (GLuint): Vertex Array Object (VAO) holding the attribute layout and index buffer.
+        levels (list): Detail levels as (tolerance, vertices, indices, vertex_buffer, index_buffer, vertex_array),
+            finest first.
+        level (int): Index of the detail level currently drawn.
+        data_source (callable): Called with the current time on a worker thread, returns new
+            (vertices, indices) for dynamic elements.
+        slots (list): Two (vertex_buffer, index_buffer, vertex_array) sets of a dynamic element, one
+            drawn while the other is written.
+        vertex_capacity (int): Bytes allocated for each dynamic vertex buffer.
+        index_capacity (int): Bytes allocated for each dynamic index buffer.
     """
     
-    def __init__(self, shader_program, color=None, texture_path=None, update_interval=None):
+    def __init__(self, shader_program, color=None, texture_path=None, update_interval=None, texture_manager=None,
+                 data_source=None, vertex_capacity=None, index_capacity=None):
         """
         Initializes an EarthElement with optional texture, color, and dynamics.
 
@@ -30,6 +47,10 @@ class EarthElement:
             color (list): Default color used if no texture is present.
             texture_path (str): Path to the texture image if used.
             update_interval (float): Time in seconds between updates for dynamic data.
+            texture_manager (TextureManager): Manager to load the texture through, the shared one by default.
+            data_source (callable): Returns new (vertices, indices) for a time, makes the element dynamic.
+            vertex_capacity (int): Bytes to allocate per dynamic vertex buffer, twice the first data by default.
+            index_capacity (int): Bytes to allocate per dynamic index buffer, twice the first data by default.
         """
         self.vertices = None
         self.indices = None
@@ -37,12 +58,37 @@ class EarthElement:
         self.color = color if color else [1.0, 1.0, 1.0, 1.0]
         self.shader_program = shader_program
         self.update_interval = update_interval
-        self.last_update_time = 0
+        # The first update asks the data source right away rather than one interval later
+        self.last_update_time = None
         self.vertex_buffer = None
         self.index_buffer = None
+        self.vertex_array = None
+        self.levels = []
+        self.level = 0
+        self.texture_manager = texture_manager or get_texture_manager()
+        self.data_source = data_source
+        self.vertex_capacity = vertex_capacity
+        self.index_capacity = index_capacity
+        self.slots = []
+        self.back_slot = 0
+        self.executor = None
+        self.pending = None
 
         if texture_path:
-            self.texture = OpenGLHelpers.load_texture(texture_path)
+            self.set_texture(texture_path)
+
+    def set_texture(self, texture_path, progressive=False):
+        """
+        Switches to another texture, e.g. another layer, releasing the current one.
+
+        Args:
+            texture_path (str): Path to the texture image, None to draw with the color only.
+            progressive (bool): Draw a low resolution version right away and stream the detail.
+        """
+        previous = self.texture
+        self.texture = self.texture_manager.acquire(texture_path, progressive) if texture_path else None
+        if previous is not None:
+            self.texture_manager.release(previous)
 
     def load_data(self, vertices, indices=None):
         """
@@ -60,7 +106,7 @@ class EarthElement:
 
     def initialize_buffers(self):
         """
-        Initializes the vertex and index buffers in OpenGL.
+        Initializes the vertex and index buffers in OpenGL and the vertex array that binds them.
         """
         self.vertex_buffer = OpenGLHelpers.create_buffer(self.vertices)
         if self.indices is not None:
@@ -68,19 +114,173 @@ class EarthElement:
         else:
             self.index_buffer = None
 
+        # Record the attribute layout once, render() only has to bind the VAO
+        self.vertex_array = OpenGLHelpers.create_vertex_array(self.vertex_buffer, self.index_buffer, 0, 3)
+
+    def load_levels(self, levels):
+        """
+        Loads every level of a detail pyramid into its own OpenGL buffers.
+
+        Args:
+            levels (list): (tolerance, vertices, indices) per level, finest first.
+        """
+        self.levels = []
+        for tolerance, vertices, indices in levels:
+            self.load_data(vertices, indices)
+            self.levels.append((tolerance, self.vertices, self.indices, self.vertex_buffer, self.index_buffer,
+                                self.vertex_array))
+        self.set_level(0)
+
+    def set_level(self, level):
+        """
+        Switches the buffers drawn by render() to another detail level.
+
+        Args:
+            level (int): Index into levels.
+        """
+        self.level = level
+        _, self.vertices, self.indices, self.vertex_buffer, self.index_buffer, self.vertex_array = self.levels[level]
+
+    def select_level(self, max_tolerance):
+        """
+        Draws the coarsest detail level whose simplification stays within a tolerance.
+
+        Args:
+            max_tolerance (float): Largest simplification error that stays invisible, in degrees.
+        """
+        if not self.levels:
+            return
+        level = 0
+        for index, (tolerance, *_) in enumerate(self.levels):
+            if tolerance <= max_tolerance:
+                level = index
+        if level != self.level:
+            self.set_level(level)
+
     def update(self, current_time):
         """
         Updates the element's data if necessary, based on its update interval.
 
+        The data source runs on a worker thread; its result is uploaded on a later call, so
+        neither the render loop nor the GPU waits for it. If the data source fails, the error
+        is logged and the last data stays on screen.
+
         Args:
             current_time (float): The current time in seconds.
         """
         if self.update_interval is None:
             return
-        
+
+        # Upload data that came in since the last frame, on the thread owning the context
+        if self.pending is not None and self.pending.done():
+            pending, self.pending = self.pending, None
+            try:
+                vertices, indices = pending.result()
+            except Exception:
+                logger.exception("Data source failed, keeping the previous data")
+            else:
+                self.load_dynamic_data(vertices, indices)
+
         if self.last_update_time is None or (current_time - self.last_update_time >= self.update_interval):
-            # Here you would update your data
             self.last_update_time = current_time
+            # Skip the request while the previous one still runs rather than queueing them up
+            if self.data_source is not None and self.pending is None:
+                if self.executor is None:
+                    self.executor = ThreadPoolExecutor(max_workers=1)
+                self.pending = self.executor.submit(self.data_source, current_time)
+
+    def load_dynamic_data(self, vertices, indices=None):
+        """
+        Replaces the data of a dynamic element without creating buffers.
+
+        Writes into the buffers not drawn last frame and swaps them in, so the upload never
+        waits for the GPU to finish reading. Buffers are only reallocated when the data
+        outgrows their capacity.
+
+        Args:
+            vertices (list or np.array): Vertex data for this element.
+            indices (list or np.array): Index data for indexed drawing, optional.
+        """
+        vertices = np.asarray(vertices, dtype=np.float32)
+        indices = None if indices is None else np.asarray(indices, dtype=np.uint32)
+        index_bytes = 0 if indices is None else indices.nbytes
+
+        if (not self.slots or vertices.nbytes > self.vertex_capacity
+                or (index_bytes and (self.index_capacity or 0) < index_bytes)):
+            self.allocate_dynamic_buffers(vertices.nbytes, index_bytes)
+
+        vertex_buffer, index_buffer, vertex_array = self.slots[self.back_slot]
+        OpenGLHelpers.update_buffer(vertex_buffer, vertices, self.vertex_capacity)
+        if indices is not None:
+            OpenGLHelpers.update_buffer(index_buffer, indices, self.index_capacity,
+                                        buffer_type=gl.GL_ELEMENT_ARRAY_BUFFER)
+
+        self.vertices, self.indices = vertices, indices
+        self.vertex_buffer, self.index_buffer, self.vertex_array = vertex_buffer, index_buffer, vertex_array
+        self.back_slot = 1 - self.back_slot
+
+    def allocate_dynamic_buffers(self, vertex_bytes, index_bytes=0):
+        """
+        Allocates the two buffer sets of a dynamic element, replacing smaller ones.
+
+        Args:
+            vertex_bytes (int): Size of the vertex data that has to fit.
+            index_bytes (int): Size of the index data that has to fit.
+        """
+        # Room to grow, so changing data sizes rarely need new buffers
+        if vertex_bytes > (self.vertex_capacity or 0):
+            self.vertex_capacity = 2 * vertex_bytes
+        if index_bytes > (self.index_capacity or 0):
+            self.index_capacity = 2 * index_bytes
+        self.release_dynamic_buffers()
+
+        for _ in range(2):
+            vertex_buffer = OpenGLHelpers.create_buffer([], usage=gl.GL_DYNAMIC_DRAW, capacity=self.vertex_capacity)
+            index_buffer = None
+            if self.index_capacity:
+                index_buffer = OpenGLHelpers.create_buffer([], buffer_type=gl.GL_ELEMENT_ARRAY_BUFFER,
+                                                           usage=gl.GL_DYNAMIC_DRAW, capacity=self.index_capacity)
+            vertex_array = OpenGLHelpers.create_vertex_array(vertex_buffer, index_buffer, 0, 3)
+            self.slots.append((vertex_buffer, index_buffer, vertex_array))
+        self.back_slot = 0
+
+    def release_dynamic_buffers(self):
+        """
+        Deletes the buffers of a dynamic element.
+        """
+        for buffers in self.slots:
+            self._delete_buffers(*buffers)
+        self.slots = []
+
+    @staticmethod
+    def _delete_buffers(vertex_buffer, index_buffer, vertex_array):
+        gl.glDeleteVertexArrays(1, [vertex_array])
+        gl.glDeleteBuffers(1, [vertex_buffer])
+        if index_buffer is not None:
+            gl.glDeleteBuffers(1, [index_buffer])
+
+    def shutdown(self):
+        """
+        Stops the data source worker and frees the element's buffers and texture; it draws nothing afterwards.
+
+        Must be called on the thread that owns the OpenGL context, before it is destroyed.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.pending = None
+
+        # Every detail level owns its buffers, a plain load_data element only the current ones
+        static = [level[3:] for level in self.levels]
+        if not static and not self.slots and self.vertex_array is not None:
+            static.append((self.vertex_buffer, self.index_buffer, self.vertex_array))
+        for buffers in static:
+            self._delete_buffers(*buffers)
+        self.release_dynamic_buffers()
+        self.levels = []
+        self.vertices = self.indices = None
+        self.vertex_buffer = self.index_buffer = self.vertex_array = None
+        self.set_texture(None)
 
     def render(self, projection_matrix, view_matrix):
         """
@@ -90,12 +290,17 @@ class EarthElement:
             projection_matrix (np.array): The projection matrix from the camera.
             view_matrix (np.array): The view matrix from the camera.
         """
+        # Dynamic elements have nothing to draw until their first data arrived
+        if self.vertices is None:
+            return
+
         gl.glUseProgram(self.shader_program)
         
-        # Set up vertex array
-        OpenGLHelpers.setup_vertex_array(self.vertex_buffer, 0, 3)
+        # The VAO restores the vertex attributes and the index buffer
+        gl.glBindVertexArray(self.vertex_array)
 
         if self.texture:
+            self.texture_manager.touch(self.texture)
             OpenGLHelpers.set_uniform(self.shader_program, "textureSampler", 0, '1i')
             gl.glActiveTexture(gl.GL_TEXTURE0)
             gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
@@ -107,19 +312,19 @@ class EarthElement:
         
         # Draw the element
         if self.indices is not None:
-            gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, self.index_buffer)
             gl.glDrawElements(gl.GL_TRIANGLES, len(self.indices), gl.GL_UNSIGNED_INT, None)
         else:
             gl.glDrawArrays(gl.GL_TRIANGLES, 0, len(self.vertices) // 3)
         
         # Clean up
-        gl.glDisableVertexAttribArray(0)
-        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
-        gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, 0)
+        gl.glBindVertexArray(0)
         gl.glUseProgram(0)
 
 # Example of usage
 if __name__ == '__main__':
+    from utils import tracing
+    tracing.configure()
+
     # Setup a window and OpenGL context
     if not glfw.init():
         raise Exception("GLFW can't be initialized")
@@ -184,4 +389,5 @@ if __name__ == '__main__':
         # Poll for and process events
         glfw.poll_events()
 
+    earth_element.shutdown()
     glfw.terminate()
@@ -1,91 +1,223 @@
-import matplotlib.pyplot as plt
-import math
-import shapely.geometry as shp
-from shapely.geometry import Polygon
+from functools import lru_cache
 import numpy as np
-import geopandas as gpd
+import geo_data
+from projection_settings import ProjectionSettings
 
 LIGHT_TO_SPHERE = 6
 LIGHT_TO_IMAGE = 1
 TEXTURE_SIZE = 100
-
-world_gdf = gpd.read_file(
-    gpd.datasets.get_path('naturalearth_lowres')
-)
-
-# Convert MultiPolygon to Polygon
-world_coord = world_gdf['geometry'].to_numpy()
-flattened = []
-for shape in world_coord:
-    if shape.type == 'MultiPolygon':
-        flattened.extend(list(shape.geoms))
-    else:
-        flattened.append(shape)
-
-def mapper(x, oldMin, oldMax, newMin, newMax):
-    ratio = (x - oldMin) / (oldMax - oldMin)
-    return newMin + (ratio * (newMax - newMin))
-
-def lon_lat_to_xyz(lon, lat):
-    # Convert degrees to radians
-    lon_rad = math.radians(lon)
-    lat_rad = math.radians(lat)
-
-    # Convert to Cartesian coordinates
-    x = math.cos(lat_rad) * math.cos(lon_rad)
-    y = math.cos(lat_rad) * math.sin(lon_rad)
-    z = math.sin(lat_rad)
-
-    return x, y, z
-
-polygon_series = []
-for polygon in flattened:
-    if polygon.exterior is not None:
-        coords = polygon.exterior.coords
-        projected_array = []
-        for lon, lat in coords:
-            x, y, z = lon_lat_to_xyz(lon, lat)
-            if x < 0.2:
-                continue
-            dist_of_pt_center_line = np.sqrt(y ** 2 + z ** 2)
-            dist_of_proj_pt_center = dist_of_pt_center_line / (LIGHT_TO_SPHERE - x) * LIGHT_TO_IMAGE
-            angle_of_proj_pt_z_axis = np.arctan2(y, z)
-            j = np.sin(angle_of_proj_pt_z_axis) * dist_of_proj_pt_center
-            i = np.cos(angle_of_proj_pt_z_axis) * dist_of_proj_pt_center * np.sign(z)
-
-            if not np.isnan(i) and not np.isnan(j):
-                max_val = 0.203  # Adjust this based on your data range
-                i_mapped = mapper(i, -max_val, max_val, 0, TEXTURE_SIZE)
-                j_mapped = mapper(j, -max_val, max_val, 0, TEXTURE_SIZE)
-                projected_array.append((i_mapped, j_mapped))
-        if len(projected_array) >= 4:
-            polygon_series.append(Polygon(projected_array))
-
-# Create a GeoSeries from the list of Polygons
-mapplot = gpd.GeoSeries(polygon_series)
-
-# Plot the GeoSeries
-fig, ax = plt.subplots(1, 1, figsize=(12, 12))  # Adjusted for potentially larger view
-
-mapplot.plot(ax=ax)
-
-# Adjust plot limits to make sure we can see the full projection
-x_min, y_min, x_max, y_max = mapplot.total_bounds
-x_range = x_max - x_min
-y_range = y_max - y_min
-max_range = max(x_range, y_range)
-
-# Expand the range by a small margin to ensure nothing is clipped
-margin = max_range * 0.1
-ax.set_xlim(-x_min + margin, x_max + margin)
-ax.set_ylim(y_min - margin, y_max + margin)
-
-# Set aspect ratio
-ax.set_aspect('equal')
-
-# Set labels and title
-ax.set_xlabel('Projected x')
-ax.set_ylabel('Projected y')
-ax.set_title('Full Projected World Map onto Sphere')
-
-plt.show()
+TEXTURE_EXTENT = 0.203  # Adjust texture_extent based on your data range
+# Default resolution of rasterized projector textures
+RASTER_SIZE = 4096
+
+def _world_source():
+    # geopandas before 1.0 ships naturalearth_lowres, newer versions dropped the bundled datasets
+    import geopandas as gpd
+    try:
+        return gpd.datasets.get_path('naturalearth_lowres')
+    except AttributeError:
+        return geo_data.COUNTRIES_URL
+
+@lru_cache(maxsize=None)
+def load_world(source=None, cache_dir=geo_data.DEFAULT_CACHE_DIR):
+    """
+    Loads the world polygons and their bounding caps, only once per source.
+
+    MultiPolygons are split into their parts by the geometry cache.
+
+    Args:
+        source (str): Path or URL of the vector data, defaults to naturalearth_lowres.
+        cache_dir (str): Directory holding the binary geometry cache.
+
+    Returns:
+        tuple: The polygons as a geo_data.RingGeometry and their geo_data.CapIndex.
+    """
+    geometry = geo_data.load_geometry(source or _world_source(), cache_dir)
+    return geometry, geo_data.load_caps(geometry, cache_dir)
+
+def _visible_rings(geometry, projected, min_points):
+    """
+    Yields the projected rings of every polygon, exterior first, without their culled and NaN points.
+
+    Holes with fewer than min_points visible points are left out, polygons whose
+    exterior has too few are skipped entirely.
+    """
+    uv = np.column_stack((projected.u, projected.v))
+    ring_offsets = np.asarray(geometry.ring_offsets)
+    polygon_offsets = np.asarray(geometry.polygon_offsets)
+    for polygon in range(geometry.polygon_count):
+        rings = []
+        for ring in range(polygon_offsets[polygon], polygon_offsets[polygon + 1]):
+            start, stop = ring_offsets[ring], ring_offsets[ring + 1]
+            points = uv[start:stop][projected.visible[start:stop]]
+            if len(points) >= min_points:
+                rings.append(points)
+            elif ring == polygon_offsets[polygon]:
+                break
+        if rings:
+            yield rings
+
+@lru_cache(maxsize=32)
+def _project_world(source, cache_dir, light_to_sphere, light_to_image, texture_size, texture_extent, view_longitude):
+    import geopandas as gpd
+    from shapely.geometry import Polygon
+
+    geometry, caps = load_world(source, cache_dir)
+    settings = ProjectionSettings(light_to_sphere=light_to_sphere, light_to_image=light_to_image,
+                                  texture_size=texture_size, radius_display=1.0,
+                                  texture_extent=texture_extent, view_longitude=view_longitude)
+
+    # Polygons facing away from the light are rejected by their bounding caps before any per-vertex work
+    facing, projected = settings.project_polygons(geometry, caps)
+
+    # Keep the exterior ring of each polygon, without its culled and NaN points
+    polygon_series = [Polygon(rings[0]) for rings in _visible_rings(facing, projected, 4)]
+
+    return gpd.GeoSeries(polygon_series)
+
+def project_world(source=None, light_to_sphere=LIGHT_TO_SPHERE, light_to_image=LIGHT_TO_IMAGE,
+                  texture_size=TEXTURE_SIZE, texture_extent=TEXTURE_EXTENT, view_longitude=0.0,
+                  cache_dir=geo_data.DEFAULT_CACHE_DIR):
+    """
+    Projects the world polygons onto the texture plane.
+
+    The dataset is loaded on the first call and results are memoized per settings, so
+    repeated calls with the same settings are free.
+
+    Args:
+        source (str): Path or URL of the vector data, defaults to naturalearth_lowres.
+        light_to_sphere (float): Distance from the light source to the sphere surface.
+        light_to_image (float): Distance from the light source to the image plane.
+        texture_size (int): Texture size for the projection.
+        texture_extent (float): Half-width of the projected plane mapped onto the texture.
+        view_longitude (float): Longitude in degrees the projector faces.
+        cache_dir (str): Directory holding the binary geometry cache.
+
+    Returns:
+        GeoSeries: One projected polygon per visible exterior ring, in texture coordinates.
+    """
+    return _project_world(source, cache_dir, light_to_sphere, light_to_image, texture_size, texture_extent,
+                          view_longitude).copy()
+
+def rasterize_world(size=RASTER_SIZE, source=None, light_to_sphere=LIGHT_TO_SPHERE, light_to_image=LIGHT_TO_IMAGE,
+                    texture_extent=TEXTURE_EXTENT, view_longitude=0.0, color=None, background=(0, 0, 0, 0),
+                    cache_dir=geo_data.DEFAULT_CACHE_DIR):
+    """
+    Fills the projected world polygons, holes included, straight into a texture.
+
+    Projects with texture_size set to the raster size and draws with PIL, so neither
+    matplotlib nor GeoPandas is involved and a 4096x4096 texture takes well under a second.
+
+    Args:
+        size (int): Width and height of the texture in pixels.
+        source (str): Path or URL of the vector data, defaults to naturalearth_lowres.
+        light_to_sphere (float): Distance from the light source to the sphere surface.
+        light_to_image (float): Distance from the light source to the image plane.
+        texture_extent (float): Half-width of the projected plane mapped onto the texture.
+        view_longitude (float): Longitude in degrees the projector faces.
+        color (tuple): RGBA fill color, None returns a mask instead.
+        background (tuple): RGBA color outside the polygons, used with color.
+        cache_dir (str): Directory holding the binary geometry cache.
+
+    Returns:
+        np.array: (size, size) uint8 mask with 255 on land, or (size, size, 4) RGBA texture with color given.
+    """
+    from PIL import Image, ImageDraw
+
+    geometry, caps = load_world(source, cache_dir)
+    settings = ProjectionSettings(light_to_sphere=light_to_sphere, light_to_image=light_to_image,
+                                  texture_size=size, radius_display=1.0,
+                                  texture_extent=texture_extent, view_longitude=view_longitude)
+    facing, projected = settings.project_polygons(geometry, caps)
+
+    # Image rows run downwards while v runs up
+    polygons = [[np.column_stack((ring[:, 0], size - ring[:, 1])) for ring in rings]
+                for rings in _visible_rings(facing, projected, 3)]
+
+    # Larger polygons first, so an island inside another polygon's hole is drawn after the hole is cut
+    def area(ring):
+        x, y = ring[:, 0], ring[:, 1]
+        return abs(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+    polygons.sort(key=lambda rings: -area(rings[0]))
+
+    mask = Image.new("L", (size, size), 0)
+    draw = ImageDraw.Draw(mask)
+    for exterior, *holes in polygons:
+        draw.polygon(exterior.ravel().tolist(), fill=255)
+        for hole in holes:
+            draw.polygon(hole.ravel().tolist(), fill=0)
+
+    mask = np.array(mask)
+    if color is None:
+        return mask
+    texture = np.empty((size, size, 4), dtype=np.uint8)
+    texture[...] = background
+    texture[mask > 0] = color
+    return texture
+
+def plot_world(ax, mapplot):
+    """
+    Draws a projected GeoSeries onto matplotlib axes.
+
+    Args:
+        ax (Axes): Axes to draw on.
+        mapplot (GeoSeries): Projected polygons from project_world.
+    """
+    mapplot.plot(ax=ax)
+
+    # Adjust plot limits to make sure we can see the full projection
+    x_min, y_min, x_max, y_max = mapplot.total_bounds
+    x_range = x_max - x_min
+    y_range = y_max - y_min
+    max_range = max(x_range, y_range)
+
+    # Expand the range by a small margin to ensure nothing is clipped
+    margin = max_range * 0.1
+    ax.set_xlim(x_min - margin, x_max + margin)
+    ax.set_ylim(y_min - margin, y_max + margin)
+
+    # Set aspect ratio
+    ax.set_aspect('equal')
+
+    # Set labels and title
+    ax.set_xlabel('Projected x')
+    ax.set_ylabel('Projected y')
+    ax.set_title('Full Projected World Map onto Sphere')
+
+def render_world(mapplot=None, path=None, figsize=(12, 12), dpi=100, **projection):
+    """
+    Renders the projected map headlessly with the Agg backend.
+
+    Args:
+        mapplot (GeoSeries): Projected polygons, computed with project_world(**projection) if omitted.
+        path (str): Also write the figure to this PNG file, optional.
+        figsize (tuple): Figure size in inches.
+        dpi (int): Resolution in dots per inch.
+        **projection: Keyword arguments for project_world.
+
+    Returns:
+        np.array: (height, width, 4) uint8 RGBA image of the figure.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    if mapplot is None:
+        mapplot = project_world(**projection)
+
+    # A bare Figure never touches pyplot, so no GUI backend or global state is involved
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    plot_world(fig.add_subplot(1, 1, 1), mapplot)
+    canvas.draw()
+
+    if path is not None:
+        fig.savefig(path)
+    return np.array(canvas.buffer_rgba())
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    # Plot the GeoSeries
+    fig, ax = plt.subplots(1, 1, figsize=(12, 12))  # Adjusted for potentially larger view
+    plot_world(ax, project_world())
+    plt.show()
@@ -1,14 +1,17 @@
 import numpy as np
-import geopandas as gpd
-from shapely.geometry import Polygon, MultiPolygon
 import OpenGL.GL as gl
 import glfw
-from urllib.request import urlopen
-import json
+import geo_data
 from utils.opengl_helpers import OpenGLHelpers
 from utils.geo_transforms import GeoTransformer
+from utils.texture_manager import get_texture_manager
 from projection_settings import ProjectionSettings
 from earth_element import EarthElement
+from earth_plot import LIGHT_TO_SPHERE, LIGHT_TO_IMAGE, TEXTURE_EXTENT
+
+# Window size of run(), the projection follows the actual framebuffer once it exists
+WINDOW_WIDTH = 640
+WINDOW_HEIGHT = 480
 
 class EarthSimulation:
     """
@@ -16,64 +19,83 @@ class EarthSimulation:
     including loading geographic data, managing Earth elements,
     and rendering them based on current projection settings.
     """
-    def __init__(self):
-        # Initialize the simulation with some global settings
-        self.projection_settings = ProjectionSettings()
+    def __init__(self, view_longitude=0.0):
+        # Initialize the simulation with some global settings, each projector faces its own longitude.
+        # Like earth_plot, project the unit sphere onto the real texture extent, one texture pixel
+        # per viewport pixel, so degrees_per_pixel is in the units the renderer draws in
+        self.projection_settings = ProjectionSettings(light_to_sphere=LIGHT_TO_SPHERE, light_to_image=LIGHT_TO_IMAGE,
+                                                      texture_size=min(WINDOW_WIDTH, WINDOW_HEIGHT),
+                                                      radius_display=1.0, texture_extent=TEXTURE_EXTENT,
+                                                      view_longitude=view_longitude)
         self.elements = []
         self.geo_transformer = GeoTransformer(self.projection_settings.radius_display)
 
-    def load_geographic_data(self, url):
+    def load_geographic_data(self, source, cache_dir=geo_data.DEFAULT_CACHE_DIR):
+        """
+        Loads geographic data through the local binary cache and builds a triangle mesh of it.
+
+        Args:
+            source (str): Path to a GeoJSON, Shapefile or GeoPackage file, or a URL to download once.
+            cache_dir (str): Directory holding the binary geometry cache.
+        """
+        geometry = geo_data.load_geometry(source, cache_dir)
+        return self.build_mesh(geometry, cache_dir)
+
+    def load_detail_levels(self, source, cache_dir=geo_data.DEFAULT_CACHE_DIR, tolerances=geo_data.LOD_TOLERANCES):
+        """
+        Loads geographic data and builds a triangle mesh for every level of its detail pyramid.
+
+        Args:
+            source (str): Path to a GeoJSON, Shapefile or GeoPackage file, or a URL to download once.
+            cache_dir (str): Directory holding the binary geometry cache.
+            tolerances (tuple): Simplification tolerances in degrees, finest first.
+
+        Returns:
+            list: (tolerance, vertices, indices) per level.
+        """
+        geometry = geo_data.load_geometry(source, cache_dir)
+        levels = geo_data.load_detail_levels(geometry, tolerances, cache_dir)
+        return [(tolerance, *self.build_mesh(level, cache_dir)) for tolerance, level in zip(tolerances, levels)]
+
+    def build_mesh(self, geometry, cache_dir=geo_data.DEFAULT_CACHE_DIR, cull=True):
         """
-        Loads geographic data from a GeoJSON URL and initializes the Earth elements.
+        Builds the vertex and index data of a polygon dataset.
+
+        With culling, polygons whose bounding cap lies on the far side of the sphere for
+        this projector are dropped before their vertices are transformed or uploaded.
 
         Args:
-            url (str): The URL to the GeoJSON file containing geographic data.
-        """
-        with urlopen(url) as response:
-            data = json.load(response)
-        world_gdf = gpd.GeoDataFrame.from_features(data["features"])
-
-        # Convert MultiPolygon to Polygon if necessary
-        flattened = []
-        for shape in world_gdf['geometry']:
-            if isinstance(shape, MultiPolygon):
-                flattened.extend(list(shape.geoms))
-            else:
-                flattened.append(shape)
-
-        # Initialize the continental data as an EarthElement
-        vertices = []
-        indices = []
-        current_index = 0
-        for polygon in flattened:
-            if polygon.exterior is not None:
-                # Transform the geographic coordinates to projection coordinates
-                projected_coords = []
-                for lon, lat in polygon.exterior.coords:
-                    x, y, z = self.geo_transformer.lon_lat_to_xyz(lon, lat)
-                    projected_coords.append((x, y, z))
-
-                # Flatten the list of tuples and extend the vertices list
-                vertices.extend(np.array(projected_coords).flatten())
-
-                # Create indices for this polygon (assuming triangles fan for simplicity)
-                indices.extend([current_index + i for i in range(len(projected_coords))])
-                current_index += len(projected_coords)
-
-        # Convert vertices and indices into numpy arrays
-        vertices = np.array(vertices, dtype=np.float32)
-        indices = np.array(indices, dtype=np.uint32)
+            geometry (geo_data.RingGeometry): The polygons.
+            cache_dir (str): Directory holding the triangle and cap caches.
+            cull (bool): Whether to leave out polygons facing away from the projector.
+
+        Returns:
+            tuple: Flat float32 vertices and uint32 triangle indices.
+        """
+        coords = np.asarray(geometry.coords)
+        # Triangles index straight into the ring vertices and are cached with the geometry
+        indices = np.asarray(geo_data.load_triangles(geometry, cache_dir))
+
+        if cull:
+            facing = self.projection_settings.facing_polygons(geo_data.load_caps(geometry, cache_dir))
+            keep = geometry.vertex_mask(facing)
+            # Triangles never span polygons, so checking one corner is enough; then renumber the kept vertices
+            indices = (np.cumsum(keep, dtype=np.int64) - 1)[indices[keep[indices[:, 0]]]].astype(np.uint32)
+            coords = coords[keep]
+
+        # Transform every ring vertex, holes included, to Cartesian coordinates in one batch
+        x, y, z = self.geo_transformer.lon_lat_to_xyz(coords[:, 0], coords[:, 1])
+        vertices = np.column_stack((x, y, z)).astype(np.float32).ravel()
 
         # Return vertices and indices for later use
-        return vertices, indices
+        return vertices, indices.ravel()
 
-    def initialize_elements(self, vertices, indices):
+    def initialize_elements(self, levels):
         """
         Initializes Earth elements after the OpenGL context is available.
 
         Args:
-            vertices (np.array): The vertex data.
-            indices (np.array): The index data.
+            levels (list): (tolerance, vertices, indices) per detail level, finest first.
         """
         # Shader code
         vertex_shader = """
@@ -97,7 +119,7 @@ class EarthSimulation:
         shader_program = OpenGLHelpers.link_shader_program(vertex_shader, fragment_shader)
 
         continent_element = EarthElement(shader_program, color=[0.5, 0.7, 0.5, 1.0])
-        continent_element.load_data(vertices, indices)
+        continent_element.load_levels(levels)
         self.add_element(continent_element)
 
     def add_element(self, element):
@@ -116,18 +138,28 @@ class EarthSimulation:
         projection_matrix = np.eye(4)  # Identity matrix for simplicity, replace with real projection
         view_matrix = np.eye(4)  # Identity matrix for simplicity, replace with real view
 
+        # Simplification below half a texture pixel cannot be seen in the projected image
+        max_tolerance = self.projection_settings.degrees_per_pixel() / 2
+
         for element in self.elements:
+            element.select_level(max_tolerance)
             element.render(projection_matrix, view_matrix)
 
-    def run(self):
+        # Upload a few pending mip levels per frame rather than stalling on a new layer
+        get_texture_manager().stream()
+
+    def run(self, levels=None):
         """
         The main loop of the simulation where the Earth is rendered.
+
+        Args:
+            levels (list): Detail levels from load_detail_levels, loaded here if omitted.
         """
         if not glfw.init():
             raise Exception("GLFW can't be initialized")
 
         # Create a windowed mode window and its OpenGL context
-        window = glfw.create_window(640, 480, "Earth Simulation", None, None)
+        window = glfw.create_window(WINDOW_WIDTH, WINDOW_HEIGHT, "Earth Simulation", None, None)
         if not window:
             glfw.terminate()
             raise Exception("GLFW window can't be created")
@@ -138,15 +170,24 @@ class EarthSimulation:
         # Initialize OpenGL
         OpenGLHelpers.initialize_opengl()
 
-        # Load geographic data and initialize Earth elements
-        vertices, indices = self.load_geographic_data("https://raw.githubusercontent.com/johan/world.geo.json/master/countries.geo.json")
-        self.initialize_elements(vertices, indices)
+        # Load geographic data unless it was loaded before, and initialize Earth elements
+        if levels is None:
+            levels = self.load_detail_levels(geo_data.COUNTRIES_URL)
+        self.initialize_elements(levels)
 
         while not glfw.window_should_close(window):
             # Render here
             gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
 
+            # Detail follows the framebuffer size; an unchanged size keeps the cached projection
+            width, height = glfw.get_framebuffer_size(window)
+            if min(width, height) > 0:
+                self.projection_settings.update_settings(texture_size=min(width, height))
+
             # Update and render EarthElement
+            current_time = glfw.get_time()
+            for element in self.elements:
+                element.update(current_time)
             self.render()
 
             # Swap front and back buffers
@@ -155,11 +196,17 @@ class EarthSimulation:
             # Poll for and process events
             glfw.poll_events()
 
+        # Buffers and textures belong to the context, delete them before it goes away
+        for element in self.elements:
+            element.shutdown()
+        get_texture_manager().clear()
         glfw.terminate()
 
 # Example usage
 if __name__ == '__main__':
+    from utils import tracing
+    tracing.configure()
+
     simulation = EarthSimulation()
-    url = "https://raw.githubusercontent.com/johan/world.geo.json/master/countries.geo.json"
-    simulation.load_geographic_data(url)
-    simulation.run()
+    levels = simulation.load_detail_levels(geo_data.COUNTRIES_URL)
+    simulation.run(levels)
@@ -0,0 +1,389 @@
+import os
+import hashlib
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from urllib.request import urlopen
+import numpy as np
+import shapely
+from utils.geo_transforms import GeoTransformer
+from utils.triangulation import triangulate_polygons
+
+# Binary geometry caches (and downloaded source files) live here by default
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "resources", "geo_cache")
+
+# World countries, downloaded once into the geo cache so later starts work offline
+COUNTRIES_URL = "https://raw.githubusercontent.com/johan/world.geo.json/master/countries.geo.json"
+
+# The arrays of a cache entry share one file, so they can never come from different writes
+_GEOMETRY_FILE = "geometry.npy"
+# Vertex, ring offset and polygon offset counts at the start of the packed file
+_GEOMETRY_HEADER = 3
+
+# Simplification tolerances in degrees of the detail pyramid, finest level first
+LOD_TOLERANCES = (0.0, 0.01, 0.05, 0.25, 1.0)
+
+# Polygons handed to each simplification task
+SIMPLIFY_CHUNK_SIZE = 256
+
+class RingGeometry:
+    """
+    Compact columnar form of a polygon dataset, as stored in the binary cache.
+
+    All ring coordinates sit in one array; ring_offsets gives where each ring starts and
+    polygon_offsets which rings belong to each polygon, the first one being the exterior.
+
+    Attributes:
+        coords (np.array): (N, 2) longitude/latitude of every ring vertex.
+        ring_offsets (np.array): (rings + 1,) start of each ring in coords.
+        polygon_offsets (np.array): (polygons + 1,) start of each polygon in the rings.
+        source_hash (str): SHA-256 of the file the geometry was read from.
+    """
+
+    def __init__(self, coords, ring_offsets, polygon_offsets, source_hash=None):
+        self.coords = coords
+        self.ring_offsets = ring_offsets
+        self.polygon_offsets = polygon_offsets
+        self.source_hash = source_hash
+
+    @property
+    def polygon_count(self):
+        return len(self.polygon_offsets) - 1
+
+    @property
+    def ring_count(self):
+        return len(self.ring_offsets) - 1
+
+    def exterior_rings(self):
+        """
+        Returns the index of the exterior ring of every polygon.
+
+        Returns:
+            np.array: Ring indices, one per polygon.
+        """
+        return np.asarray(self.polygon_offsets[:-1])
+
+    def polygon_vertex_counts(self):
+        """
+        Returns the number of vertices of every polygon, all rings included.
+
+        Returns:
+            np.array: Vertex counts, one per polygon.
+        """
+        return np.diff(np.asarray(self.ring_offsets)[np.asarray(self.polygon_offsets)])
+
+    def vertex_mask(self, polygons):
+        """
+        Expands a per-polygon mask to the vertices of those polygons.
+
+        Args:
+            polygons (np.array): Boolean mask, one entry per polygon.
+
+        Returns:
+            np.array: Boolean mask, one entry per vertex.
+        """
+        return np.repeat(polygons, self.polygon_vertex_counts())
+
+    def select(self, polygons):
+        """
+        Returns the polygons picked by a boolean mask as a new RingGeometry.
+
+        Args:
+            polygons (np.array): Boolean mask, one entry per polygon.
+
+        Returns:
+            RingGeometry: The selected polygons with their offsets renumbered.
+        """
+        ring_counts = np.diff(self.polygon_offsets)
+        ring_lengths = np.diff(self.ring_offsets)
+        rings = np.repeat(polygons, ring_counts)
+        coords = np.asarray(self.coords)[self.vertex_mask(polygons)]
+        ring_offsets = np.concatenate(([0], np.cumsum(ring_lengths[rings])))
+        polygon_offsets = np.concatenate(([0], np.cumsum(ring_counts[polygons])))
+        return RingGeometry(coords, ring_offsets, polygon_offsets)
+
+class CapIndex:
+    """
+    Spatial index of one bounding cap per polygon on the unit sphere.
+
+    A cap is the smallest circle around the polygon's mean direction holding all of its
+    vertices, so whole polygons can be rejected for a view direction with one dot product
+    each, before any per-vertex work.
+
+    Attributes:
+        centers (np.array): (polygons, 3) unit vectors of the cap centers.
+        radii (np.array): (polygons,) angular radii of the caps in radians.
+    """
+
+    def __init__(self, centers, radii):
+        self.centers = centers
+        self.radii = radii
+
+    @classmethod
+    def from_geometry(cls, geometry):
+        """
+        Computes the bounding cap of every polygon of a dataset.
+
+        Args:
+            geometry (RingGeometry): The polygons.
+
+        Returns:
+            CapIndex: One cap per polygon.
+        """
+        counts = geometry.polygon_vertex_counts()
+        if len(counts) == 0:
+            return cls(np.empty((0, 3)), np.empty(0))
+        coords = np.asarray(geometry.coords)
+        xyz = np.column_stack(GeoTransformer(1.0).lon_lat_to_xyz(coords[:, 0], coords[:, 1]))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        sums = np.add.reduceat(xyz, starts)
+        norms = np.linalg.norm(sums, axis=1)
+        # A polygon wrapped around the whole sphere has no useful center, give it a full cap
+        spread = norms < 1e-9
+        centers = sums / np.where(spread, 1.0, norms)[:, None]
+        centers[spread] = (1.0, 0.0, 0.0)
+
+        angles = np.arccos(np.clip(np.sum(xyz * np.repeat(centers, counts, axis=0), axis=1), -1.0, 1.0))
+        radii = np.maximum.reduceat(angles, starts)
+        radii[spread] = np.pi
+        return cls(centers, radii)
+
+    def facing(self, direction, threshold=0.0):
+        """
+        Finds the polygons that may have a vertex facing a view direction.
+
+        Args:
+            direction (np.array): Unit view direction.
+            threshold (float): Smallest cosine to the view direction that counts as facing.
+
+        Returns:
+            np.array: Boolean mask, True for polygons that cannot be rejected.
+        """
+        angles = np.arccos(np.clip(self.centers @ np.asarray(direction, dtype=np.float64), -1.0, 1.0))
+        closest = np.maximum(angles - self.radii, 0.0)
+        return np.cos(closest) >= threshold
+
+def file_hash(path):
+    """
+    Computes the SHA-256 of a file, reading it in chunks.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_geometry(path):
+    """
+    Reads the polygons of a GeoJSON, Shapefile or GeoPackage file into a RingGeometry.
+
+    Args:
+        path (str): Path to the vector data file.
+
+    Returns:
+        RingGeometry: The polygons, MultiPolygons split into their parts.
+    """
+    import geopandas as gpd
+
+    world_gdf = gpd.read_file(path)
+    # Split MultiPolygons into Polygons and drop anything that is not a polygon
+    parts = shapely.get_parts(world_gdf.geometry.values)
+    polygons = parts[(shapely.get_type_id(parts) == shapely.GeometryType.POLYGON) & ~shapely.is_empty(parts)]
+
+    if len(polygons) == 0:
+        return RingGeometry(np.empty((0, 2)), np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))
+
+    _, coords, (ring_offsets, polygon_offsets) = shapely.to_ragged_array(polygons, include_z=False)
+    return RingGeometry(coords, ring_offsets.astype(np.int64), polygon_offsets.astype(np.int64))
+
+def _download(url, cache_dir):
+    # Keep downloads next to the caches, so later runs work without a network
+    name = os.path.basename(urlparse(url).path) or "download"
+    path = os.path.join(cache_dir, "downloads", hashlib.sha1(url.encode()).hexdigest()[:16] + "_" + name)
+    if not os.path.isfile(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urlopen(url) as response, tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as f:
+            shutil.copyfileobj(response, f)
+        os.replace(f.name, path)
+    return path
+
+def load_geometry(source, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Loads polygon data through the binary cache.
+
+    The first load of a file converts it into one packed .npy file stored under the
+    file's SHA-256, later loads map its arrays straight from disk. Editing the file
+    changes its hash, so the cache is revalidated on every start. URLs are downloaded
+    into the cache directory once and read from there afterwards.
+
+    Args:
+        source (str): Path or URL of a GeoJSON, Shapefile or GeoPackage file.
+        cache_dir (str): Directory holding the caches.
+
+    Returns:
+        RingGeometry: The polygons, backed by read-only memory maps.
+    """
+    path = _download(source, cache_dir) if urlparse(source).scheme in ("http", "https") else source
+    source_hash = file_hash(path)
+    entry_dir = os.path.join(cache_dir, source_hash)
+
+    geometry = _read_entry(entry_dir, source_hash)
+    if geometry is None:
+        _write_entry(entry_dir, read_geometry(path))
+        geometry = _read_entry(entry_dir, source_hash)
+    return geometry
+
+def _write_entry(entry_dir, geometry):
+    # Coordinates and offsets packed into one int64 array behind their counts, float64 kept bit for bit
+    coords = np.ascontiguousarray(geometry.coords, dtype=np.float64).reshape(-1, 2)
+    ring_offsets = np.asarray(geometry.ring_offsets, dtype=np.int64)
+    polygon_offsets = np.asarray(geometry.polygon_offsets, dtype=np.int64)
+    packed = np.concatenate(([len(coords), len(ring_offsets), len(polygon_offsets)],
+                             coords.reshape(-1).view(np.int64), ring_offsets, polygon_offsets))
+
+    # Written next to its final name and renamed, so a crash never leaves a partial entry
+    os.makedirs(entry_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=entry_dir, suffix=".npy", delete=False) as f:
+        np.save(f, packed)
+    os.replace(f.name, os.path.join(entry_dir, _GEOMETRY_FILE))
+
+def _read_entry(entry_dir, source_hash):
+    # Returns None for a missing or damaged entry, so it is built again
+    try:
+        packed = np.load(os.path.join(entry_dir, _GEOMETRY_FILE), mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if packed.dtype != np.int64 or packed.ndim != 1 or len(packed) < _GEOMETRY_HEADER:
+        return None
+    vertices, rings, polygons = (int(count) for count in packed[:_GEOMETRY_HEADER])
+    if min(vertices, rings, polygons) < 0 or len(packed) != _GEOMETRY_HEADER + 2 * vertices + rings + polygons:
+        return None
+
+    ring_start = _GEOMETRY_HEADER + 2 * vertices
+    coords = packed[_GEOMETRY_HEADER:ring_start].view(np.float64).reshape(vertices, 2)
+    ring_offsets = packed[ring_start:ring_start + rings]
+    polygon_offsets = packed[ring_start + rings:]
+    return RingGeometry(coords, ring_offsets, polygon_offsets, source_hash=source_hash)
+
+def simplify_geometry(geometry, tolerance, workers=None):
+    """
+    Simplifies every polygon of a dataset without breaking its topology.
+
+    Polygons are simplified in chunks on a thread pool, GEOS releases the GIL while it works.
+
+    Args:
+        geometry (RingGeometry): Polygons to simplify.
+        tolerance (float): Largest allowed deviation in degrees.
+        workers (int): Number of worker threads, defaults to the number of CPUs.
+
+    Returns:
+        RingGeometry: The simplified polygons, collapsed ones dropped.
+    """
+    polygons = shapely.from_ragged_array(shapely.GeometryType.POLYGON, np.asarray(geometry.coords),
+                                         (np.asarray(geometry.ring_offsets), np.asarray(geometry.polygon_offsets)))
+    chunks = [polygons[start:start + SIMPLIFY_CHUNK_SIZE] for start in range(0, len(polygons), SIMPLIFY_CHUNK_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        simplified = list(executor.map(lambda chunk: shapely.simplify(chunk, tolerance, preserve_topology=True), chunks))
+
+    simplified = np.concatenate(simplified) if simplified else polygons
+    simplified = simplified[~shapely.is_empty(simplified) & (shapely.area(simplified) > 0)]
+    if len(simplified) == 0:
+        return RingGeometry(np.empty((0, 2)), np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))
+
+    _, coords, (ring_offsets, polygon_offsets) = shapely.to_ragged_array(simplified, include_z=False)
+    return RingGeometry(coords, ring_offsets.astype(np.int64), polygon_offsets.astype(np.int64))
+
+def load_detail_levels(geometry, tolerances=LOD_TOLERANCES, cache_dir=DEFAULT_CACHE_DIR, workers=None):
+    """
+    Builds the level-of-detail pyramid of a dataset through the binary cache.
+
+    Each simplified level is stored under lod_<tolerance> in the dataset's cache entry,
+    so load_triangles caches its triangles there as well.
+
+    Args:
+        geometry (RingGeometry): Full-detail polygons returned by load_geometry.
+        tolerances (tuple): Simplification tolerances in degrees, 0 keeps the full detail.
+        cache_dir (str): Directory holding the caches.
+        workers (int): Number of worker threads, defaults to the number of CPUs.
+
+    Returns:
+        list: RingGeometry per tolerance, in the order given.
+    """
+    levels = []
+    for tolerance in tolerances:
+        if tolerance == 0:
+            levels.append(geometry)
+        elif geometry.source_hash is None:
+            levels.append(simplify_geometry(geometry, tolerance, workers))
+        else:
+            level_hash = os.path.join(geometry.source_hash, f"lod_{tolerance:g}")
+            entry_dir = os.path.join(cache_dir, level_hash)
+            level = _read_entry(entry_dir, level_hash)
+            if level is None:
+                _write_entry(entry_dir, simplify_geometry(geometry, tolerance, workers))
+                level = _read_entry(entry_dir, level_hash)
+            levels.append(level)
+    return levels
+
+def _cached_array(geometry, name, build, cache_dir):
+    # Arrays derived from a dataset are stored next to its geometry file
+    if geometry.source_hash is None:
+        return build()
+
+    path = os.path.join(cache_dir, geometry.source_hash, name + ".npy")
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        # Missing or damaged, build it again like _read_entry does
+        pass
+
+    array = build()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".npy", delete=False) as f:
+        np.save(f, array)
+    os.replace(f.name, path)
+    return np.load(path, mmap_mode="r")
+
+def load_triangles(geometry, cache_dir=DEFAULT_CACHE_DIR, workers=None):
+    """
+    Triangulates every polygon of a dataset, holes included, through the binary cache.
+
+    Triangles are stored as triangles.npy next to the geometry arrays of the dataset, so
+    the triangulation only runs the first time a file is seen.
+
+    Args:
+        geometry (RingGeometry): Polygons returned by load_geometry.
+        cache_dir (str): Directory holding the caches.
+        workers (int): Number of triangulation workers, defaults to the number of CPUs.
+
+    Returns:
+        np.array: (T, 3) uint32 triangles as indices into geometry.coords.
+    """
+    return _cached_array(geometry, "triangles", lambda: triangulate_polygons(
+        geometry.coords, geometry.ring_offsets, geometry.polygon_offsets, workers), cache_dir)
+
+def load_caps(geometry, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Builds the bounding cap index of a dataset through the binary cache.
+
+    Args:
+        geometry (RingGeometry): Polygons returned by load_geometry.
+        cache_dir (str): Directory holding the caches.
+
+    Returns:
+        CapIndex: One cap per polygon.
+    """
+    def build():
+        caps = CapIndex.from_geometry(geometry)
+        return np.column_stack((caps.centers, caps.radii))
+
+    caps = _cached_array(geometry, "caps", build, cache_dir)
+    return CapIndex(caps[:, :3], caps[:, 3])
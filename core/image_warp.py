@@ -1,8 +1,11 @@
 import numpy as np
 from PIL import Image, ImageFilter
 import random
-import math
 import os
+import hashlib
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # just for more easily naming the images to have a lot of test images
 def count_files_in_folder():
@@ -14,24 +17,51 @@ def count_files_in_folder():
     
     return file_count
 
-# I thought it could be useful, but now I'm not so sure
-def create_proxy(image_path, scale_down_factor):
-    image = Image.open(image_path)
+# turns the single stretch factor operators tune into the bulge parameters the warp uses
+def stretch_to_bulge(stretch_factor):
+    bulge_exponent = stretch_factor / 4
+    bulge_factor = -(bulge_exponent * stretch_factor) / 100
+    return bulge_factor, bulge_exponent
+
+# The proxy background blur is skipped when the disc covers (nearly) the whole image
+BLUR_SKIP_TOLERANCE = 0.02
+# The background blur runs at 1/BLUR_DOWNSCALE resolution and is then upsampled
+BLUR_DOWNSCALE = 4
+BLUR_RADIUS = 5
+
+# Proxies kept in memory by create_proxy, bounded by their size like the warp maps
+PROXY_CACHE_BYTES = 256 * 1024 * 1024
+_proxy_cache = OrderedDict()
+
+def _image_nbytes(image):
+    # 8 bits per band for every mode create_proxy is used with
+    return image.width * image.height * len(image.getbands())
+
+def _blurred_background(image):
+    # Blurring at reduced resolution is much cheaper and looks the same once upsampled
+    factor = min(BLUR_DOWNSCALE, image.size[0])
+    small = image.reduce(factor) if factor > 1 else image
+    blurred = small.filter(ImageFilter.GaussianBlur(radius=BLUR_RADIUS / factor))
+    return blurred.resize(image.size, Image.BILINEAR)
+
+def _build_proxy(image, scale_down_factor):
     width, height = image.size
 
     # Ensure image is a square
     size = max(width, height)
-    image = image.resize((size, size), Image.LANCZOS)
+    if width != height:
+        image = image.resize((size, size), Image.LANCZOS)
 
-    # Create a blurred version of the image
-    blurred_image = image.filter(ImageFilter.GaussianBlur(radius=5))
+    # The background only shows outside the scaled down disc, so near 1.0 an unblurred copy will do
+    if abs(scale_down_factor - 1.0) <= BLUR_SKIP_TOLERANCE:
+        combined_image = image.copy()
+    else:
+        combined_image = _blurred_background(image)
 
     # Create a scaled down version of the image
     scaled_size = int(size / scale_down_factor)
     scaled_down_image = image.resize((scaled_size, scaled_size), Image.LANCZOS)
 
-    # Create a new image with the blurred background
-    combined_image = blurred_image.copy()
     # Calculate position to place the scaled down image (centered)
     top_left_x = (size - scaled_size) // 2
     top_left_y = (size - scaled_size) // 2
@@ -39,43 +69,560 @@ def create_proxy(image_path, scale_down_factor):
 
     return combined_image
 
-# written by chat mostly, i have no idea what it does
-def warp_image(image_path, bulge_factor=1.8, bulge_exponent=2, scale_down_factor=1.5):
-    combined_image = create_proxy(image_path, scale_down_factor)
-    img_array = np.array(combined_image)
-    new_img_array = np.zeros_like(img_array)
+# square proxy with the image scaled down over a blurred background, cached per file up to PROXY_CACHE_BYTES;
+# a cache hit still costs one copy of the image, since PIL images cannot be handed out read-only
+def create_proxy(image_path, scale_down_factor):
+    # Accept an already decoded frame as well as a file path
+    if isinstance(image_path, Image.Image):
+        return _build_proxy(image_path, scale_down_factor)
+
+    # Keyed by modification time, so editing the source image invalidates the entry
+    key = (os.path.abspath(image_path), os.stat(image_path).st_mtime_ns, scale_down_factor)
+    if key in _proxy_cache:
+        _proxy_cache.move_to_end(key)
+    else:
+        with Image.open(image_path) as image:
+            _proxy_cache[key] = _build_proxy(image, scale_down_factor)
+        # The newest proxy always stays, even when it alone is over the limit
+        while len(_proxy_cache) > 1 and sum(_image_nbytes(cached) for cached in _proxy_cache.values()) > PROXY_CACHE_BYTES:
+            _proxy_cache.popitem(last=False)
+
+    # Hand out a copy so callers can't modify the cached proxy
+    return _proxy_cache[key].copy()
+
+SAMPLING_MODES = ("nearest", "bilinear", "bicubic")
 
-    size = combined_image.size[0]
+def _source_coordinates(size, bulge_factor, bulge_exponent, row_start=0, row_stop=None):
+    """
+    Computes, for every destination pixel of a square image, where in the source it samples.
+
+    Args:
+        size (int): Width and height of the square image.
+        bulge_factor (float): Strength of the radial bulge.
+        bulge_exponent (float): Exponent applied to the radius inside the bulge.
+        row_start (int): First destination row to compute, for tiled warping.
+        row_stop (int): Destination row to stop before, defaults to the full image.
+
+    Returns:
+        tuple: (dst_y, dst_x, proj_y, proj_x) arrays covering the pixels inside the unit circle,
+               with the fractional source positions before any truncation or clamping.
+    """
+    if row_stop is None:
+        row_stop = size
     center_x, center_y = size / 2, size / 2
 
-    # Process each pixel in the image
-    for i in range(size):
-        for j in range(size):
-            norm_x = (i - center_x) / center_x
-            norm_y = (j - center_y) / center_y
-            r = math.sqrt(norm_x**2 + norm_y**2)
+    # Normalized coordinates of every column (x) and row (y)
+    norm_x = (np.arange(size, dtype=np.float64) - center_x) / center_x
+    norm_y = (np.arange(row_start, row_stop, dtype=np.float64) - center_y) / center_y
+
+    # Only process pixels within the unit circle
+    r_grid = np.sqrt(norm_x[np.newaxis, :] ** 2 + norm_y[:, np.newaxis] ** 2)
+    dst_y, dst_x = np.nonzero(r_grid <= 1.0)
+    r = r_grid[dst_y, dst_x]
+    norm_x = norm_x[dst_x]
+    norm_y = norm_y[dst_y]
+    dst_y += row_start
+
+    theta = np.arctan2(norm_y, norm_x)
+    # Adjust radius using a customizable bulge factor and exponent
+    adjusted_r = r * (1 - bulge_factor * r ** bulge_exponent)
+    adjusted_r[adjusted_r < 0] = 0  # Avoid negative radius values
+
+    # Calculate new pixel positions based on adjusted radius
+    proj_x = center_x + adjusted_r * np.cos(theta) * center_x
+    proj_y = center_y + adjusted_r * np.sin(theta) * center_y
+
+    return dst_y, dst_x, proj_y, proj_x
+
+def _source_indices(size, bulge_factor, bulge_exponent, row_start=0, row_stop=None):
+    """
+    Computes, for every destination pixel of a square image, which source pixel it samples.
+
+    Args:
+        size (int): Width and height of the square image.
+        bulge_factor (float): Strength of the radial bulge.
+        bulge_exponent (float): Exponent applied to the radius inside the bulge.
+        row_start (int): First destination row to compute, for tiled warping.
+        row_stop (int): Destination row to stop before, defaults to the full image.
+
+    Returns:
+        tuple: (dst_y, dst_x, src_y, src_x) integer arrays covering the pixels inside the unit circle.
+    """
+    dst_y, dst_x, proj_y, proj_x = _source_coordinates(size, bulge_factor, bulge_exponent, row_start, row_stop)
+
+    # Truncate like int() and keep the projected coordinates within image bounds
+    src_x = np.clip(proj_x.astype(np.intp), 0, size - 1)
+    src_y = np.clip(proj_y.astype(np.intp), 0, size - 1)
+
+    return dst_y, dst_x, src_y, src_x
+
+def _cubic_weights(t):
+    # Keys cubic convolution kernel (a = -0.5) for the taps at offsets -1, 0, 1, 2
+    t2 = t * t
+    t3 = t2 * t
+    return (
+        -0.5 * t3 + t2 - 0.5 * t,
+        1.5 * t3 - 2.5 * t2 + 1,
+        -1.5 * t3 + 2 * t2 + 0.5 * t,
+        0.5 * t3 - 0.5 * t2,
+    )
+
+# Interpolation reads from a copy of the source padded by this many edge pixels, so no tap needs clipping
+_TAP_PAD = 5
+# Destination pixels interpolated per block, keeps the float32 tap buffer small enough for the CPU cache
+_TAP_BLOCK = 4096
+
+def _sampling_taps(size, proj_y, proj_x, sampling):
+    """
+    Precomputes which source pixels every destination pixel interpolates and with what weights.
+
+    The taps of a pixel form a k x k window (2x2 bilinear, 4x4 bicubic) of the source padded
+    by _TAP_PAD edge pixels, so they are stored as the flat index of the window's top-left
+    pixel plus one weight per tap.
+
+    Args:
+        size (int): Width and height of the source image.
+        proj_y (np.array): Fractional source rows.
+        proj_x (np.array): Fractional source columns.
+        sampling (str): "bilinear" or "bicubic".
+
+    Returns:
+        tuple: (tap_index, tap_weights) with the window indices and (N, k * k) float32 weights.
+    """
+    # Destination pixel k maps to position k when there is no bulge, so integer
+    # positions land exactly on source pixels and interpolate between them otherwise
+    x0 = np.floor(proj_x)
+    y0 = np.floor(proj_y)
+    fx = (proj_x - x0).astype(np.float32)
+    fy = (proj_y - y0).astype(np.float32)
+
+    if sampling == "bilinear":
+        first, taps = 0, 2
+        weights = [(1 - fy, fy), (1 - fx, fx)]
+    else:
+        first, taps = -1, 4
+        weights = [_cubic_weights(fy), _cubic_weights(fx)]
+
+    # Beyond an edge every tap repeats the edge pixel, so windows further out sample the same values
+    x0 = np.clip(x0, -taps, size).astype(np.intp)
+    y0 = np.clip(y0, -taps, size).astype(np.intp)
+    side = size + 2 * _TAP_PAD
+    index_type = np.int32 if side * side < 2**31 else np.int64
+    tap_index = ((y0 + first + _TAP_PAD) * side + x0 + first + _TAP_PAD).astype(index_type)
+    weights_y, weights_x = (np.stack(axis_weights, axis=1) for axis_weights in weights)
+    tap_weights = (weights_y[:, :, np.newaxis] * weights_x[:, np.newaxis, :]).reshape(-1, taps * taps)
+    return tap_index, tap_weights.astype(np.float32)
+
+def _tap_windows(flat_src, size, taps):
+    """
+    Views a flattened square image as its k x k windows, indexed like _sampling_taps.
+
+    Args:
+        flat_src (np.array): Source image viewed as (pixels, channels).
+        size (int): Width and height of the source image.
+        taps (int): Window width, 2 for bilinear and 4 for bicubic.
+
+    Returns:
+        np.array: Read-only (positions, taps, taps, channels) view of the edge-padded source.
+    """
+    channels = flat_src.shape[1]
+    padded = np.pad(flat_src.reshape(size, size, channels), ((_TAP_PAD, _TAP_PAD), (_TAP_PAD, _TAP_PAD), (0, 0)),
+                    mode="edge")
+    side = size + 2 * _TAP_PAD
+    row_stride, pixel_stride, channel_stride = padded.strides
+    positions = side * side - (taps - 1) * (side + 1)
+    return np.lib.stride_tricks.as_strided(padded, shape=(positions, taps, taps, channels),
+                                           strides=(pixel_stride, row_stride, pixel_stride, channel_stride),
+                                           writeable=False)
+
+def _interpolate(windows, tap_index, tap_weights, dtype):
+    """
+    Samples an image at the positions described by precomputed taps.
+
+    Args:
+        windows (np.array): Windows of the source from _tap_windows.
+        tap_index (np.array): Window of every destination pixel, from _sampling_taps.
+        tap_weights (np.array): (N, k * k) weights, from _sampling_taps.
+        dtype (np.dtype): Data type of the source image.
+
+    Returns:
+        np.array: Sampled values of shape (N, channels) in the source dtype.
+    """
+    count, window = tap_weights.shape
+    channels = windows.shape[3]
+    result = np.empty((count, channels), dtype=dtype)
+    for start in range(0, count, _TAP_BLOCK):
+        block = slice(start, start + _TAP_BLOCK)
+        # One gather fetches all k x k taps of a pixel, one small matrix product weighs them
+        values = windows[tap_index[block]].reshape(-1, window, channels).astype(np.float32)
+        acc = np.matmul(tap_weights[block, np.newaxis, :], values)[:, 0]
+
+        if np.issubdtype(dtype, np.integer):
+            # Bicubic can overshoot, so clamp before converting back
+            info = np.iinfo(dtype)
+            acc = np.clip(np.rint(acc), info.min, info.max)
+        result[block] = acc
+    return result
+
+def _check_sampling(sampling):
+    if sampling not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode '{sampling}', expected one of {SAMPLING_MODES}")
+
+class WarpMap:
+    """
+    Precomputed mapping from destination to source pixels for one set of warp parameters.
+
+    The mapping only depends on the image size and the bulge parameters, so it can be
+    computed once and applied to any number of frames with a single gather.
+
+    Attributes:
+        size (int): Width and height of the square images this map applies to.
+        bulge_factor (float): Strength of the radial bulge.
+        bulge_exponent (float): Exponent applied to the radius inside the bulge.
+        sampling (str): "nearest", "bilinear" or "bicubic".
+        dst_index (np.array): Flat indices of the destination pixels that get written.
+        src_index (np.array): Flat indices of the source pixels they are read from ("nearest" only).
+        tap_index (np.array): Interpolation window of every destination pixel (interpolated modes only).
+        tap_weights (np.array): (N, k * k) interpolation weights (interpolated modes only).
+    """
+
+    def __init__(self, size, bulge_factor, bulge_exponent, sampling="nearest", dst_index=None, src_index=None,
+                 tap_index=None, tap_weights=None):
+        """
+        Initializes the WarpMap, computing the index arrays unless they are given.
+
+        Args:
+            size (int): Width and height of the square image.
+            bulge_factor (float): Strength of the radial bulge.
+            bulge_exponent (float): Exponent applied to the radius inside the bulge.
+            sampling (str): "nearest", "bilinear" or "bicubic".
+            dst_index (np.array): Precomputed flat destination indices, optional.
+            src_index (np.array): Precomputed flat source indices, optional.
+            tap_index (np.array): Precomputed interpolation windows, optional.
+            tap_weights (np.array): Precomputed interpolation weights, optional.
+        """
+        _check_sampling(sampling)
+        self.size = size
+        self.bulge_factor = bulge_factor
+        self.bulge_exponent = bulge_exponent
+        self.sampling = sampling
+
+        if dst_index is None or (src_index is None and tap_index is None):
+            # int32 halves the memory of the tables whenever the flat index fits
+            index_type = np.int32 if size * size < 2**31 else np.int64
+            if sampling == "nearest":
+                dst_y, dst_x, src_y, src_x = _source_indices(size, bulge_factor, bulge_exponent)
+                src_index = (src_y * size + src_x).astype(index_type)
+            else:
+                # Everything that only depends on the map is done here, apply() just gathers and weighs
+                dst_y, dst_x, proj_y, proj_x = _source_coordinates(size, bulge_factor, bulge_exponent)
+                tap_index, tap_weights = _sampling_taps(size, proj_y, proj_x, sampling)
+            dst_index = (dst_y * size + dst_x).astype(index_type)
+
+        self.dst_index = dst_index
+        self.src_index = src_index
+        self.tap_index = tap_index
+        self.tap_weights = tap_weights
+
+    def apply(self, img_array):
+        """
+        Warps an image array using the precomputed mapping.
+
+        Args:
+            img_array (np.array): Square image of shape (size, size) or (size, size, channels).
+
+        Returns:
+            np.array: The warped image, black outside the unit circle.
+        """
+        if img_array.shape[:2] != (self.size, self.size):
+            raise ValueError(f"Expected a {self.size}x{self.size} image, got {img_array.shape[1]}x{img_array.shape[0]}")
 
-            if r <= 1.0:  # Only process pixels within the unit circle
-                theta = math.atan2(norm_y, norm_x)
-                # Adjust radius using a customizable bulge factor and exponent
-                adjusted_r = r * (1 - bulge_factor * r**bulge_exponent)
-                
-                if adjusted_r < 0:
-                    adjusted_r = 0  # Avoid negative radius values
+        img_array = np.ascontiguousarray(img_array)
+        new_img_array = np.zeros_like(img_array)
 
-                # Calculate new pixel positions based on adjusted radius
-                proj_x = center_x + adjusted_r * math.cos(theta) * center_x
-                proj_y = center_y + adjusted_r * math.sin(theta) * center_y
+        # View both images as (pixels, channels) so a single gather moves every channel
+        flat_src = img_array.reshape(self.size * self.size, -1)
+        flat_dst = new_img_array.reshape(self.size * self.size, -1)
+        flat_dst[self.dst_index] = self._gather(flat_src)
 
-                # Ensure projected coordinates are within image bounds
-                proj_x = min(max(int(proj_x), 0), size - 1)
-                proj_y = min(max(int(proj_y), 0), size - 1)
+        return new_img_array
 
-                new_img_array[j, i] = img_array[proj_y, proj_x]
+    def apply_batch(self, img_stack):
+        """
+        Warps a stack of same-sized images, e.g. several projector views, in one gather.
+
+        Args:
+            img_stack (np.array): Images of shape (views, size, size) or (views, size, size, channels).
+
+        Returns:
+            np.array: The warped images, in the same shape as the input.
+        """
+        if img_stack.shape[1:3] != (self.size, self.size):
+            raise ValueError(f"Expected {self.size}x{self.size} images, got {img_stack.shape[2]}x{img_stack.shape[1]}")
+
+        views = img_stack.shape[0]
+        pixels = self.size * self.size
+        # Put the pixel axis first so views and channels travel together through the gather
+        flat_src = np.ascontiguousarray(np.moveaxis(img_stack.reshape(views, pixels, -1), 0, 1)).reshape(pixels, -1)
+        flat_dst = np.zeros_like(flat_src)
+        flat_dst[self.dst_index] = self._gather(flat_src)
+
+        new_stack = np.moveaxis(flat_dst.reshape(pixels, views, -1), 1, 0)
+        return np.ascontiguousarray(new_stack).reshape(img_stack.shape)
+
+    def _gather(self, flat_src):
+        # Values for every destination pixel in dst_index, flat_src is viewed as (pixels, channels)
+        if self.sampling == "nearest":
+            return flat_src[self.src_index]
+        windows = _tap_windows(flat_src, self.size, 2 if self.sampling == "bilinear" else 4)
+        return _interpolate(windows, self.tap_index, self.tap_weights, flat_src.dtype)
+
+    @property
+    def nbytes(self):
+        """
+        int: Memory held by the index arrays, what the in-memory cache is bounded by.
+        """
+        arrays = (self.dst_index, self.src_index, self.tap_index, self.tap_weights)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def save(self, path):
+        """
+        Saves the mapping to an .npz file.
+
+        The file is written next to its destination and renamed into place, so an
+        interrupted save never leaves a truncated file behind.
+
+        Args:
+            path (str): Destination file path.
+        """
+        if self.sampling == "nearest":
+            source = {"src_index": self.src_index}
+        else:
+            source = {"tap_index": self.tap_index, "tap_weights": self.tap_weights}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, size=self.size, bulge_factor=self.bulge_factor, bulge_exponent=self.bulge_exponent,
+                         sampling=self.sampling, dst_index=self.dst_index, **source)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a mapping previously written with save().
+
+        Args:
+            path (str): Path to the .npz file.
+
+        Returns:
+            WarpMap: The loaded mapping.
+        """
+        with np.load(path) as data:
+            # Files written before sampling modes existed are nearest-neighbour maps
+            sampling = str(data["sampling"]) if "sampling" in data else "nearest"
+            # Interpolated maps from before the taps were stored are computed again
+            if sampling != "nearest" and "tap_index" not in data:
+                raise ValueError(f"{path} holds no interpolation taps")
+            return cls(int(data["size"]), float(data["bulge_factor"]), float(data["bulge_exponent"]), sampling,
+                       dst_index=data["dst_index"],
+                       src_index=data["src_index"] if "src_index" in data else None,
+                       tap_index=data["tap_index"] if "tap_index" in data else None,
+                       tap_weights=data["tap_weights"] if "tap_weights" in data else None)
+
+def _warp_map_filename(size, bulge_factor, bulge_exponent, sampling):
+    # repr() keeps the full float precision, so nearby settings never share a file
+    key = repr((size, float(bulge_factor), float(bulge_exponent), sampling))
+    return "warpmap_" + hashlib.sha1(key.encode()).hexdigest()[:16] + ".npz"
+
+# Maps kept in memory by get_warp_map, bounded by their size since one 4K map alone is over 100 MB
+WARP_MAP_CACHE_BYTES = 512 * 1024 * 1024
+_warp_map_cache = OrderedDict()
+
+# What a truncated or otherwise damaged .npz raises when it is read
+_CORRUPT_FILE_ERRORS = (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile)
+
+def get_warp_map(size, bulge_factor, bulge_exponent, cache_dir=None, sampling="nearest"):
+    """
+    Returns the WarpMap for the given parameters, reusing previously computed ones.
+
+    Maps are kept in an in-memory LRU cache holding up to WARP_MAP_CACHE_BYTES, and when
+    cache_dir is given they are also persisted as .npz files so a restart with the same
+    settings skips the computation. A file that cannot be read is computed and written again.
+
+    Args:
+        size (int): Width and height of the square image.
+        bulge_factor (float): Strength of the radial bulge.
+        bulge_exponent (float): Exponent applied to the radius inside the bulge.
+        cache_dir (str): Directory for the .npz files, optional.
+        sampling (str): "nearest", "bilinear" or "bicubic".
+
+    Returns:
+        WarpMap: The mapping for these parameters.
+    """
+    key = (size, bulge_factor, bulge_exponent, cache_dir, sampling)
+    if key in _warp_map_cache:
+        _warp_map_cache.move_to_end(key)
+        return _warp_map_cache[key]
+
+    warp_map = _load_or_build_warp_map(size, bulge_factor, bulge_exponent, cache_dir, sampling)
+    _warp_map_cache[key] = warp_map
+    # The newest map always stays, even when it alone is over the limit
+    while len(_warp_map_cache) > 1 and sum(cached.nbytes for cached in _warp_map_cache.values()) > WARP_MAP_CACHE_BYTES:
+        _warp_map_cache.popitem(last=False)
+    return warp_map
+
+def clear_warp_map_cache():
+    """
+    Drops every warp map held in memory, persisted .npz files are kept.
+    """
+    _warp_map_cache.clear()
+
+def save_warp_map(warp_map, cache_dir):
+    """
+    Persists a map where get_warp_map looks for it, e.g. once a tuned stretch is accepted.
+
+    Args:
+        warp_map (WarpMap): The mapping to store.
+        cache_dir (str): Directory for the .npz files.
+
+    Returns:
+        str: Path of the written file.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, _warp_map_filename(warp_map.size, warp_map.bulge_factor, warp_map.bulge_exponent,
+                                                      warp_map.sampling))
+    warp_map.save(path)
+    return path
+
+def _load_or_build_warp_map(size, bulge_factor, bulge_exponent, cache_dir, sampling):
+    if cache_dir is None:
+        return WarpMap(size, bulge_factor, bulge_exponent, sampling)
+
+    path = os.path.join(cache_dir, _warp_map_filename(size, bulge_factor, bulge_exponent, sampling))
+    if os.path.isfile(path):
+        try:
+            return WarpMap.load(path)
+        except _CORRUPT_FILE_ERRORS:
+            # Treat a damaged file as a miss, it is overwritten below
+            pass
+
+    warp_map = WarpMap(size, bulge_factor, bulge_exponent, sampling)
+    save_warp_map(warp_map, cache_dir)
+    return warp_map
+
+def warp_array_tiled(img_array, bulge_factor, bulge_exponent, workers=None, band_rows=256, sampling="nearest"):
+    """
+    Warps a square image array in horizontal bands on a pool of threads.
+
+    Each band computes its own part of the mapping and gathers straight into the output,
+    so no full-size remap table is ever held in memory. NumPy releases the GIL for this
+    work, which lets the bands run on separate cores. Every destination row belongs to
+    exactly one band, so the result is identical to the single-pass warp.
+
+    Args:
+        img_array (np.array): Square image of shape (size, size) or (size, size, channels).
+        bulge_factor (float): Strength of the radial bulge.
+        bulge_exponent (float): Exponent applied to the radius inside the bulge.
+        workers (int): Number of worker threads, defaults to the number of CPUs.
+        band_rows (int): Number of destination rows per band.
+        sampling (str): "nearest", "bilinear" or "bicubic".
+
+    Returns:
+        np.array: The warped image.
+    """
+    _check_sampling(sampling)
+    size = img_array.shape[0]
+    if img_array.shape[1] != size:
+        raise ValueError(f"Expected a square image, got {img_array.shape[1]}x{size}")
+
+    img_array = np.ascontiguousarray(img_array)
+    new_img_array = np.zeros_like(img_array)
+    flat_src = img_array.reshape(size * size, -1)
+    flat_dst = new_img_array.reshape(size * size, -1)
+
+    # The padded source is shared by all bands
+    windows = None if sampling == "nearest" else _tap_windows(flat_src, size, 2 if sampling == "bilinear" else 4)
+
+    def warp_band(row_start):
+        row_stop = min(row_start + band_rows, size)
+        if sampling == "nearest":
+            dst_y, dst_x, src_y, src_x = _source_indices(size, bulge_factor, bulge_exponent, row_start, row_stop)
+            flat_dst[dst_y * size + dst_x] = flat_src[src_y * size + src_x]
+        else:
+            dst_y, dst_x, proj_y, proj_x = _source_coordinates(size, bulge_factor, bulge_exponent, row_start, row_stop)
+            tap_index, tap_weights = _sampling_taps(size, proj_y, proj_x, sampling)
+            flat_dst[dst_y * size + dst_x] = _interpolate(windows, tap_index, tap_weights, flat_src.dtype)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        # list() surfaces any exception raised inside a band
+        list(executor.map(warp_band, range(0, size, band_rows)))
+
+    return new_img_array
+
+# written by chat mostly, the pixel mapping now comes from a cached WarpMap
+# image_path can also be a PIL image, e.g. a frame coming out of warp_pipeline
+# workers switches to the tiled multi-core warp, meant for very large canvases
+# sampling="bilinear"/"bicubic" smooths the jaggies of the default nearest-neighbour lookup
+def warp_image(image_path, bulge_factor=1.8, bulge_exponent=2, scale_down_factor=1.5, cache_dir=None, workers=None, sampling="nearest"):
+    _check_sampling(sampling)
+    combined_image = create_proxy(image_path, scale_down_factor)
+    img_array = np.array(combined_image)
+
+    if workers is not None:
+        new_img_array = warp_array_tiled(img_array, bulge_factor, bulge_exponent, workers=workers, sampling=sampling)
+    else:
+        size = combined_image.size[0]
+        warp_map = get_warp_map(size, bulge_factor, bulge_exponent, cache_dir, sampling)
+        new_img_array = warp_map.apply(img_array)
 
     warped_image = Image.fromarray(new_img_array)
     return warped_image
 
+def warp_views(image_paths, view_settings, cache_dir=None, sampling="nearest"):
+    """
+    Warps the images of several projectors in one batched computation.
+
+    Views whose proxies have the same size and whose settings share bulge parameters
+    share one WarpMap, and those that also share an image mode are stacked and warped
+    in a single gather. Every output keeps the mode of its input.
+
+    Args:
+        image_paths (list): Source image path or PIL image for each view.
+        view_settings (list): Per view dict with bulge_factor, bulge_exponent and
+                              optionally scale_down_factor (defaults to 1.5 like warp_image).
+        cache_dir (str): Directory for persisted warp maps, optional.
+        sampling (str): "nearest", "bilinear" or "bicubic".
+
+    Returns:
+        list: The warped PIL images, in the order of image_paths.
+    """
+    _check_sampling(sampling)
+    if len(image_paths) != len(view_settings):
+        raise ValueError("Every view needs its own warp settings")
+
+    proxies = [create_proxy(image_path, settings.get("scale_down_factor", 1.5))
+               for image_path, settings in zip(image_paths, view_settings)]
+
+    # Group the views that can be stacked, views of another mode still share the remap table
+    groups = {}
+    for view, (proxy, settings) in enumerate(zip(proxies, view_settings)):
+        key = (proxy.size[0], settings["bulge_factor"], settings["bulge_exponent"], proxy.mode)
+        groups.setdefault(key, []).append(view)
+
+    warped_images = [None] * len(proxies)
+    for (size, bulge_factor, bulge_exponent, mode), views in groups.items():
+        stack = np.stack([np.array(proxies[view]) for view in views])
+
+        warp_map = get_warp_map(size, bulge_factor, bulge_exponent, cache_dir, sampling)
+        for view, warped in zip(views, warp_map.apply_batch(stack)):
+            warped_images[view] = Image.fromarray(warped, mode)
+
+    return warped_images
+
 if __name__ == "__main__":
     # just place holder variable names, i kinda don't know what they do
     stretchFactor = 6.5
@@ -1,6 +1,35 @@
 import numpy as np
 from utils.geo_transforms import GeoTransformer
 
+# Settings each cached stage of project_many depends on; changing one invalidates that stage and the ones after it
+PROJECTION_STAGE_SETTINGS = ('radius_display', 'light_to_sphere', 'light_to_image', 'cull_threshold', 'view_longitude')
+TEXTURE_STAGE_SETTINGS = ('texture_size', 'texture_extent')
+
+# Equator samples used by degrees_per_pixel, cached under their own dataset name per view
+DETAIL_PROBE_SAMPLES = 361
+_DETAIL_PROBE = '_detail_probe'
+
+class ProjectedPoints:
+    """
+    Result of ProjectionSettings.project_many, one entry per input coordinate.
+
+    Attributes:
+        i (np.array): Projected horizontal coordinates.
+        j (np.array): Projected vertical coordinates.
+        z (np.array): Cartesian z coordinates on the sphere.
+        u (np.array): Horizontal texture coordinates.
+        v (np.array): Vertical texture coordinates.
+        visible (np.array): Boolean mask of points facing the light with a valid projection.
+    """
+
+    def __init__(self, i, j, z, u, v, visible):
+        self.i = i
+        self.j = j
+        self.z = z
+        self.u = u
+        self.v = v
+        self.visible = visible
+
 class ProjectionSettings:
     """
     Manages the projection parameters and calculations for mapping the Earth onto a spherical display.
@@ -10,10 +39,14 @@ class ProjectionSettings:
         light_to_image (float): Distance from the projection center to the image plane.
         texture_size (int): Size of the texture for the Earth's surface projection.
         radius_display (float): Radius for the display projection on the sphere.
+        cull_threshold (float): Points with x below this fraction of the radius face away from the light.
+        texture_extent (float): Half-width of the projected plane mapped onto the texture, defaults to radius_display.
+        view_longitude (float): Longitude in degrees the projector faces, the light sits on that side of the sphere.
         geo_transformer (GeoTransformer): Instance of GeoTransformer for coordinate transformations.
     """
 
-    def __init__(self, light_to_sphere=6.0, light_to_image=1.0, texture_size=100, radius_display=6371.0):
+    def __init__(self, light_to_sphere=6.0, light_to_image=1.0, texture_size=100, radius_display=6371.0,
+                 cull_threshold=0.2, texture_extent=None, view_longitude=0.0):
         """
         Initializes the ProjectionSettings with default or provided projection parameters.
 
@@ -22,12 +55,24 @@ class ProjectionSettings:
             light_to_image (float): Distance from the light source to the image plane.
             texture_size (int): Texture size for the projection.
             radius_display (float): Radius used for the display projection calculations.
+            cull_threshold (float): Fraction of the radius below which points are culled as far side.
+            texture_extent (float): Half-width of the projected plane mapped onto the texture.
+            view_longitude (float): Longitude in degrees the projector faces.
         """
         self.light_to_sphere = light_to_sphere
         self.light_to_image = light_to_image
         self.texture_size = texture_size
         self.radius_display = radius_display
+        self.cull_threshold = cull_threshold
+        self.texture_extent = texture_extent
+        self.view_longitude = view_longitude
         self.geo_transformer = GeoTransformer(self.radius_display)
+        self._unit_transformer = GeoTransformer(1.0)
+
+        # Staged caches of project_many, keyed by dataset name
+        self._unit_xyz_cache = {}    # (x, y, z) on the unit sphere, independent of every setting
+        self._projection_cache = {}  # (i, j, z, visible) for the current radius and light distances
+        self._texture_cache = {}     # (u, v) for the current texture mapping
 
     def update_settings(self, **kwargs):
         """
@@ -36,12 +81,22 @@ class ProjectionSettings:
         Args:
             **kwargs: Arbitrary keyword arguments corresponding to projection attributes.
         """
+        changed = set()
         for key, value in kwargs.items():
             if hasattr(self, key):
+                if getattr(self, key) != value:
+                    changed.add(key)
                 setattr(self, key, value)
             else:
                 print(f"Warning: {key} is not a valid attribute of ProjectionSettings and will be ignored.")
 
+        # Only drop the cached stages that depend on something that changed
+        if changed.intersection(PROJECTION_STAGE_SETTINGS):
+            self._projection_cache.clear()
+            self._texture_cache.clear()
+        elif changed.intersection(TEXTURE_STAGE_SETTINGS):
+            self._texture_cache.clear()
+
         # Update the GeoTransformer instance if the earth radius changes
         if 'radius_display' in kwargs:
             self.geo_transformer = GeoTransformer(self.radius_display)
@@ -79,6 +134,131 @@ class ProjectionSettings:
         v = self.geo_transformer.mapper(y, -self.radius_display, self.radius_display, 0, self.texture_size)
         return u, v
 
+    def project_many(self, lons, lats, dataset=None):
+        """
+        Projects a whole dataset of geographic coordinates in one vectorized pass.
+
+        Points on the far side of the sphere (x below cull_threshold times the radius,
+        after turning view_longitude onto the +x axis)
+        and points whose projection is NaN are marked in the visible mask rather than
+        removed, so callers can still split the result back into rings.
+
+        When a dataset name is given, the result is cached in stages: the unit-sphere
+        coordinates are kept until forget_dataset() is called, and the projected and
+        texture coordinates until update_settings() changes a setting they depend on.
+        Moving a light distance therefore reprojects without redoing the trigonometry.
+
+        Args:
+            lons (np.array): Longitudes in degrees.
+            lats (np.array): Latitudes in degrees, same shape as lons.
+            dataset (str): Name identifying these coordinates for caching, optional.
+
+        Returns:
+            ProjectedPoints: Projected and texture coordinates plus the visible mask.
+        """
+        unit_xyz = self._unit_xyz_cache.get(dataset) if dataset is not None else None
+        if unit_xyz is None:
+            unit_xyz = self._unit_transformer.lon_lat_to_xyz(np.asarray(lons, dtype=np.float64),
+                                                             np.asarray(lats, dtype=np.float64))
+            if dataset is not None:
+                self._unit_xyz_cache[dataset] = unit_xyz
+
+        projection = self._projection_cache.get(dataset) if dataset is not None else None
+        if projection is None:
+            x, y, z = (self.radius_display * axis for axis in unit_xyz)
+            if self.view_longitude:
+                # Turn the sphere so the projector's longitude lies on the +x axis
+                x, y = self._rotate_to_view(x, y)
+            i, j, z = self.geo_transformer.coordinate_transformations_for_projection(
+                x, y, z, self.light_to_sphere, self.light_to_image
+            )
+            visible = (x >= self.cull_threshold * self.radius_display) & ~np.isnan(i) & ~np.isnan(j)
+            projection = (i, j, z, visible)
+            if dataset is not None:
+                self._projection_cache[dataset] = projection
+        i, j, z, visible = projection
+
+        texture = self._texture_cache.get(dataset) if dataset is not None else None
+        if texture is None:
+            # Map the projected plane onto the texture
+            extent = self.radius_display if self.texture_extent is None else self.texture_extent
+            texture = (self.geo_transformer.mapper(i, -extent, extent, 0, self.texture_size),
+                       self.geo_transformer.mapper(j, -extent, extent, 0, self.texture_size))
+            if dataset is not None:
+                self._texture_cache[dataset] = texture
+        u, v = texture
+
+        return ProjectedPoints(i, j, z, u, v, visible)
+
+    def _rotate_to_view(self, x, y):
+        angle = np.radians(self.view_longitude)
+        return x * np.cos(angle) + y * np.sin(angle), y * np.cos(angle) - x * np.sin(angle)
+
+    def view_direction(self):
+        """
+        Returns the unit vector pointing from the sphere center towards the projector.
+
+        Returns:
+            np.array: (x, y, z) direction.
+        """
+        angle = np.radians(self.view_longitude)
+        return np.array([np.cos(angle), np.sin(angle), 0.0])
+
+    def facing_polygons(self, caps):
+        """
+        Rejects whole polygons on the far side of the sphere using their bounding caps.
+
+        Args:
+            caps (geo_data.CapIndex): Bounding cap per polygon.
+
+        Returns:
+            np.array: Boolean mask, True for polygons that may be visible to this projector.
+        """
+        return caps.facing(self.view_direction(), self.cull_threshold)
+
+    def project_polygons(self, geometry, caps):
+        """
+        Projects only the polygons facing this projector, skipping all per-vertex work for the rest.
+
+        Args:
+            geometry (geo_data.RingGeometry): The polygons.
+            caps (geo_data.CapIndex): Bounding cap per polygon.
+
+        Returns:
+            tuple: The facing polygons as a RingGeometry and the ProjectedPoints of their vertices.
+        """
+        facing = geometry.select(self.facing_polygons(caps))
+        coords = np.asarray(facing.coords)
+        return facing, self.project_many(coords[:, 0], coords[:, 1])
+
+    def degrees_per_pixel(self):
+        """
+        Estimates how many degrees of longitude one texture pixel covers where the projection is sharpest.
+
+        Samples the visible part of the equator, so it follows every projection and texture
+        setting through the staged cache of project_many.
+
+        Returns:
+            float: Smallest degrees per texture pixel, inf when nothing is visible.
+        """
+        lons = self.view_longitude + np.linspace(-90.0, 90.0, DETAIL_PROBE_SAMPLES)
+        probe = self.project_many(lons, np.zeros_like(lons), dataset=(_DETAIL_PROBE, self.view_longitude))
+        both_visible = probe.visible[1:] & probe.visible[:-1]
+        pixels = np.hypot(np.diff(probe.u), np.diff(probe.v))[both_visible]
+        if not np.any(pixels > 0):
+            return np.inf
+        return float((lons[1] - lons[0]) / pixels.max())
+
+    def forget_dataset(self, dataset):
+        """
+        Drops every cached stage of a dataset, e.g. after its coordinates changed.
+
+        Args:
+            dataset (str): Name the dataset was projected under.
+        """
+        for cache in (self._unit_xyz_cache, self._projection_cache, self._texture_cache):
+            cache.pop(dataset, None)
+
     def visualize_projection(self):
         """
         Generates a simple visualization of the current projection for debugging purposes.
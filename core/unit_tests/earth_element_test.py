@@ -0,0 +1,157 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import numpy as np
+from earth_element import EarthElement
+from utils import opengl_helpers
+
+class TestEarthElement(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Replace the OpenGL module used by the element and the helpers with mocks.
+        """
+        self.gl = MagicMock()
+        self.gl.glGenVertexArrays.return_value = 7
+        self.gl.glGetProgramiv.return_value = 0
+        patchers = [patch('earth_element.gl', self.gl), patch('utils.opengl_helpers.gl', self.gl)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(opengl_helpers._uniform_registries.clear)
+
+    def test_render_binds_only_the_vertex_array(self):
+        """
+        Test that the attribute layout is recorded once and render just binds the VAO.
+        """
+        element = EarthElement(shader_program=3)
+        element.load_data(np.zeros(9), [0, 1, 2])
+        self.assertEqual(element.vertex_array, 7)
+        self.gl.glVertexAttribPointer.assert_called_once()
+
+        self.gl.reset_mock()
+        element.render(np.eye(4), np.eye(4))
+        self.gl.glBindVertexArray.assert_any_call(7)
+        self.gl.glVertexAttribPointer.assert_not_called()
+        self.gl.glEnableVertexAttribArray.assert_not_called()
+        self.gl.glBindBuffer.assert_not_called()
+        self.gl.glDrawElements.assert_called_once()
+
+    def test_switching_textures_releases_the_previous_one(self):
+        """
+        Test that elements get their textures from the manager and hand them back when switching layers.
+        """
+        manager = MagicMock()
+        manager.acquire.side_effect = [11, 12]
+        element = EarthElement(shader_program=3, texture_path="clouds.png", texture_manager=manager)
+        self.assertEqual(element.texture, 11)
+
+        element.set_texture("oceans.png")
+        self.assertEqual(element.texture, 12)
+        manager.release.assert_called_once_with(11)
+
+    def test_dynamic_data_alternates_between_two_buffer_sets(self):
+        """
+        Test that data from the data source is written into the buffers not drawn last and swapped in.
+        """
+        self.gl.glGenBuffers.side_effect = range(20, 40)
+        self.gl.glGenVertexArrays.side_effect = [7, 8]
+        source = MagicMock(side_effect=lambda time: (np.full(9, time), [0, 1, 2]))
+        element = EarthElement(shader_program=3, update_interval=1.0, data_source=source,
+                               texture_manager=MagicMock())
+
+        element.update(1.0)
+        element.pending.result()
+        element.update(1.5)
+        source.assert_called_once_with(1.0)
+        self.assertEqual(element.vertex_array, 7)
+        self.assertEqual(element.vertex_capacity, 72)
+
+        element.update(2.0)
+        element.pending.result()
+        element.update(2.5)
+        self.assertEqual(element.vertex_array, 8)
+        np.testing.assert_array_equal(element.vertices, np.full(9, 2.0))
+
+        # Only the first data allocated buffers, later data reused them
+        self.assertEqual(self.gl.glGenBuffers.call_count, 4)
+        self.assertEqual(self.gl.glBufferSubData.call_count, 4)
+
+    def test_failing_data_source_keeps_the_last_data(self):
+        """
+        Test that an exception from the data source is logged instead of reaching the render loop.
+        """
+        self.gl.glGenBuffers.side_effect = range(20, 40)
+        self.gl.glGenVertexArrays.side_effect = [7, 8]
+        results = [(np.ones(9), [0, 1, 2]), RuntimeError("feed offline"), (np.full(9, 3.0), [0, 1, 2])]
+
+        def source(time):
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        element = EarthElement(shader_program=3, update_interval=1.0, data_source=source,
+                               texture_manager=MagicMock())
+        element.update(1.0)
+        element.pending.result()
+        element.update(2.0)
+        vertex_array = element.vertex_array
+
+        element.pending.exception()
+        with self.assertLogs("earth.earth_element", "ERROR") as logs:
+            element.update(2.5)
+        self.assertIn("feed offline", "\n".join(logs.output))
+        self.assertIsNone(element.pending)
+        self.assertEqual(element.vertex_array, vertex_array)
+        np.testing.assert_array_equal(element.vertices, np.ones(9))
+
+        # The next interval asks the data source again
+        element.update(3.0)
+        element.pending.result()
+        element.update(3.5)
+        np.testing.assert_array_equal(element.vertices, np.full(9, 3.0))
+
+        element.shutdown()
+        self.assertIsNone(element.executor)
+        self.assertEqual(element.slots, [])
+        self.assertEqual(self.gl.glDeleteVertexArrays.call_count, 2)
+        element.render(np.eye(4), np.eye(4))
+        self.gl.glDrawElements.assert_not_called()
+
+    def test_first_update_requests_data_right_away(self):
+        """
+        Test that a dynamic layer asks its data source on the first frame, not one interval later.
+        """
+        source = MagicMock(return_value=(np.zeros(9), [0, 1, 2]))
+        element = EarthElement(shader_program=3, update_interval=30.0, data_source=source,
+                               texture_manager=MagicMock())
+        self.addCleanup(element.shutdown)
+        element.update(0.0)
+        element.pending.result()
+        for current_time in (0.5, 10.0, 29.9):
+            element.update(current_time)
+        source.assert_called_once_with(0.0)
+        self.assertIsNotNone(element.vertices)
+
+    def test_shutdown_deletes_the_buffers_of_every_level(self):
+        """
+        Test that shutting down frees the static buffers of all detail levels and the texture.
+        """
+        self.gl.glGenBuffers.side_effect = range(20, 40)
+        self.gl.glGenVertexArrays.side_effect = [7, 8]
+        manager = MagicMock()
+        manager.acquire.return_value = 11
+        element = EarthElement(shader_program=3, texture_path="clouds.png", texture_manager=manager)
+        element.load_levels([(0.0, np.zeros(9), [0, 1, 2]), (1.0, np.zeros(9), [0, 1, 2])])
+
+        element.shutdown()
+        deleted_arrays = [call.args[1][0] for call in self.gl.glDeleteVertexArrays.call_args_list]
+        deleted_buffers = [call.args[1][0] for call in self.gl.glDeleteBuffers.call_args_list]
+        self.assertEqual(deleted_arrays, [7, 8])
+        self.assertEqual(sorted(deleted_buffers), [20, 21, 22, 23])
+        manager.release.assert_called_once_with(11)
+        element.render(np.eye(4), np.eye(4))
+        self.gl.glDrawElements.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
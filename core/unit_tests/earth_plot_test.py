@@ -0,0 +1,77 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+import earth_plot
+from geo_data_test import write_geojson, polygon_feature
+
+class TestEarthPlot(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Write a small GeoJSON dataset with polygons on both sides of the globe.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        self.path = os.path.join(self.tmp_dir.name, "countries.geo.json")
+        near = [[-10, -10], [10, -10], [10, 10], [-10, 10], [-10, -10]]
+        far = [[170, -10], [190, -10], [190, 10], [170, 10], [170, -10]]
+        write_geojson(self.path, [polygon_feature([near]), polygon_feature([far])])
+        earth_plot.load_world.cache_clear()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_project_world_loads_once(self):
+        """
+        Test that the dataset is loaded on first use only and far-side polygons are dropped.
+        """
+        mapplot = earth_plot.project_world(self.path, cache_dir=self.cache_dir)
+        self.assertEqual(len(mapplot), 1)
+        self.assertTrue((mapplot.geom_type == "Polygon").all())
+        earth_plot.project_world(self.path, cache_dir=self.cache_dir, view_longitude=180.0)
+        self.assertEqual(earth_plot.load_world.cache_info().misses, 1)
+
+    def test_render_world_headless(self):
+        """
+        Test rendering to an RGBA array and a PNG file without a display.
+        """
+        png_path = os.path.join(self.tmp_dir.name, "map.png")
+        image = earth_plot.render_world(path=png_path, figsize=(2, 3), dpi=50, source=self.path,
+                                        cache_dir=self.cache_dir)
+        self.assertEqual(image.shape, (150, 100, 4))
+        self.assertEqual(image.dtype, np.uint8)
+        # Something other than the white background got drawn
+        self.assertTrue((image[..., :3] < 255).any())
+        with Image.open(png_path) as saved:
+            self.assertEqual(saved.size, (100, 150))
+
+    def test_rasterize_world_fills_holes_and_islands(self):
+        """
+        Test that the rasterizer leaves holes empty but fills polygons sitting inside them.
+        """
+        # Kept north of the equator, the projection folds the southern hemisphere onto the northern one
+        frame = [[-20, 5], [20, 5], [20, 45], [-20, 45], [-20, 5]]
+        hole = [[-10, 15], [-10, 35], [10, 35], [10, 15], [-10, 15]]
+        island = [[-4, 21], [4, 21], [4, 29], [-4, 29], [-4, 21]]
+        write_geojson(self.path, [polygon_feature([island]), polygon_feature([frame, hole])])
+
+        size = 512
+        mask = earth_plot.rasterize_world(size, self.path, cache_dir=self.cache_dir)
+        self.assertEqual(mask.shape, (size, size))
+
+        settings = earth_plot.ProjectionSettings(light_to_sphere=earth_plot.LIGHT_TO_SPHERE,
+                                                 light_to_image=earth_plot.LIGHT_TO_IMAGE, texture_size=size,
+                                                 radius_display=1.0, texture_extent=earth_plot.TEXTURE_EXTENT)
+        # Frame, hole, island and the ocean outside
+        probe = settings.project_many(np.array([15.0, 7.0, 0.0, 40.0]), np.full(4, 25.0))
+        pixels = mask[(size - probe.v).astype(int), probe.u.astype(int)]
+        np.testing.assert_array_equal(pixels, [255, 0, 255, 0])
+
+        texture = earth_plot.rasterize_world(size, self.path, color=(10, 200, 30, 255), cache_dir=self.cache_dir)
+        np.testing.assert_array_equal(texture[mask > 0], [[10, 200, 30, 255]] * np.count_nonzero(mask))
+        self.assertTrue((texture[mask == 0] == 0).all())
+
+if __name__ == '__main__':
+    unittest.main()
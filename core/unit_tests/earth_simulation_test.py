@@ -0,0 +1,100 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch, MagicMock
+import numpy as np
+import geo_data
+from earth_element import EarthElement
+from earth_simulation import EarthSimulation
+from utils import opengl_helpers
+from geo_data_test import write_geojson, polygon_feature
+
+class TestEarthSimulation(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Write a small GeoJSON dataset with a polygon that has a hole.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        self.path = os.path.join(self.tmp_dir.name, "countries.geo.json")
+        self.square = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+        self.hole = [[2, 2], [2, 4], [4, 4], [4, 2], [2, 2]]
+        self.triangle = [[20, 20], [30, 20], [25, 30], [20, 20]]
+        write_geojson(self.path, [polygon_feature([self.square, self.hole]), polygon_feature([self.triangle])])
+        self.simulation = EarthSimulation()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_geographic_data_builds_triangle_mesh(self):
+        """
+        Test that the mesh holds every ring vertex and triangles covering the polygons minus their holes.
+        """
+        vertices, indices = self.simulation.load_geographic_data(self.path, self.cache_dir)
+
+        expected = []
+        for ring in (self.square, self.hole, self.triangle):
+            for lon, lat in ring:
+                expected.extend(self.simulation.geo_transformer.lon_lat_to_xyz(lon, lat))
+        np.testing.assert_allclose(vertices, np.array(expected, dtype=np.float32))
+
+        # Sum the triangle areas in longitude/latitude: 100 - 4 for the square with a hole, 50 for the triangle
+        lon_lat = np.array(self.square + self.hole + self.triangle, dtype=np.float64)
+        a, b, c = (lon_lat[indices.reshape(-1, 3)[:, k]] for k in range(3))
+        areas = 0.5 * ((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0]))
+        self.assertTrue((areas > 0).all())
+        self.assertAlmostEqual(areas.sum(), 146)
+
+        # The triangles are cached next to the geometry and reused on the next load
+        entry_dir = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+        self.assertIn("triangles.npy", os.listdir(entry_dir))
+        _, cached_indices = self.simulation.load_geographic_data(self.path, self.cache_dir)
+        np.testing.assert_array_equal(cached_indices, indices)
+
+    def test_load_detail_levels(self):
+        """
+        Test that every detail level comes with its own mesh, the first at full detail.
+        """
+        levels = self.simulation.load_detail_levels(self.path, self.cache_dir, tolerances=(0.0, 0.5))
+        self.assertEqual([tolerance for tolerance, _, _ in levels], [0.0, 0.5])
+        vertices, indices = self.simulation.load_geographic_data(self.path, self.cache_dir)
+        np.testing.assert_array_equal(levels[0][1], vertices)
+        np.testing.assert_array_equal(levels[0][2], indices)
+        self.assertEqual(len(levels[1][2]) % 3, 0)
+
+    def test_build_mesh_culls_far_side(self):
+        """
+        Test that a projector facing the other side of the globe gets none of the polygons.
+        """
+        geometry = geo_data.load_geometry(self.path, self.cache_dir)
+        vertices, indices = EarthSimulation(view_longitude=180.0).build_mesh(geometry, self.cache_dir)
+        self.assertEqual(len(vertices), 0)
+        self.assertEqual(len(indices), 0)
+
+        # Facing the triangle only keeps its vertices, with the indices renumbered
+        vertices, indices = EarthSimulation(view_longitude=100.0).build_mesh(geometry, self.cache_dir)
+        self.assertEqual(len(vertices), 3 * len(self.triangle))
+        np.testing.assert_array_equal(np.sort(indices), [0, 1, 2])
+
+    def test_render_picks_a_finer_level_at_normal_zoom(self):
+        """
+        Test that the simulation's own projection settings do not always select the coarsest level.
+        """
+        gl = MagicMock()
+        gl.glGenVertexArrays.return_value = 7
+        gl.glGetProgramiv.return_value = 0
+        self.addCleanup(opengl_helpers._uniform_registries.clear)
+        with patch('earth_element.gl', gl), patch('utils.opengl_helpers.gl', gl), \
+             patch('earth_simulation.get_texture_manager'):
+            element = EarthElement(shader_program=3, texture_manager=MagicMock())
+            element.load_levels([(tolerance, np.zeros(9), [0, 1, 2]) for tolerance in geo_data.LOD_TOLERANCES])
+            self.simulation.add_element(element)
+            self.simulation.render()
+
+        self.assertLess(self.simulation.projection_settings.degrees_per_pixel(), 1.0)
+        self.assertLess(element.level, len(geo_data.LOD_TOLERANCES) - 1)
+        self.assertLess(element.levels[element.level][0], geo_data.LOD_TOLERANCES[-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import os
+import json
+import tempfile
+import numpy as np
+import geo_data
+
+def write_geojson(path, features):
+    with open(path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+def polygon_feature(rings):
+    return {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": rings}}
+
+class TestGeoData(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Write a GeoJSON file with a plain polygon and a MultiPolygon containing a hole.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        self.path = os.path.join(self.tmp_dir.name, "countries.geo.json")
+        square = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+        hole = [[2, 2], [2, 4], [4, 4], [4, 2], [2, 2]]
+        triangle = [[20, 20], [30, 20], [25, 30], [20, 20]]
+        multi = {"type": "Feature", "properties": {},
+                 "geometry": {"type": "MultiPolygon", "coordinates": [[square, hole], [triangle]]}}
+        write_geojson(self.path, [polygon_feature([triangle]), multi])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_geometry_builds_and_reuses_cache(self):
+        """
+        Test the columnar layout and that later loads map the cached arrays.
+        """
+        geometry = geo_data.load_geometry(self.path, self.cache_dir)
+        self.assertEqual(geometry.polygon_count, 3)
+        self.assertEqual(geometry.ring_count, 4)
+        np.testing.assert_array_equal(geometry.polygon_offsets, [0, 1, 3, 4])
+        np.testing.assert_array_equal(geometry.ring_offsets, [0, 4, 9, 14, 18])
+        np.testing.assert_array_equal(geometry.exterior_rings(), [0, 1, 3])
+        self.assertEqual(geometry.coords.shape, (18, 2))
+
+        cached = geo_data.load_geometry(self.path, self.cache_dir)
+        self.assertIsInstance(cached.coords, np.memmap)
+        np.testing.assert_array_equal(cached.coords, geometry.coords)
+        self.assertEqual(os.listdir(self.cache_dir), [geometry.source_hash])
+
+    def test_arrays_share_one_file_and_damage_is_rebuilt(self):
+        """
+        Test that all geometry arrays come from one packed file and a truncated one is built again.
+        """
+        geometry = geo_data.load_geometry(self.path, self.cache_dir)
+        entry_dir = os.path.join(self.cache_dir, geometry.source_hash)
+        self.assertEqual(os.listdir(entry_dir), ["geometry.npy"])
+
+        expected = [np.array(array) for array in (geometry.coords, geometry.ring_offsets, geometry.polygon_offsets)]
+        del geometry
+        path = os.path.join(entry_dir, "geometry.npy")
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 8)
+        rebuilt = geo_data.load_geometry(self.path, self.cache_dir)
+        for array, expected_array in zip((rebuilt.coords, rebuilt.ring_offsets, rebuilt.polygon_offsets), expected):
+            np.testing.assert_array_equal(array, expected_array)
+        self.assertEqual(os.listdir(entry_dir), ["geometry.npy"])
+
+    def test_changed_file_is_revalidated(self):
+        """
+        Test that editing the source file produces a fresh cache entry.
+        """
+        first = geo_data.load_geometry(self.path, self.cache_dir)
+        write_geojson(self.path, [polygon_feature([[[0, 0], [1, 0], [1, 1], [0, 0]]])])
+        second = geo_data.load_geometry(self.path, self.cache_dir)
+        self.assertNotEqual(first.source_hash, second.source_hash)
+        self.assertEqual(second.polygon_count, 1)
+
+    def test_detail_levels(self):
+        """
+        Test that the detail pyramid simplifies the polygons and caches each level and its triangles.
+        """
+        # A finely sampled circle that the coarse level reduces to a handful of points
+        angles = np.linspace(0, 2 * np.pi, 400)
+        circle = np.column_stack((50 + 5 * np.cos(angles), 5 * np.sin(angles)))
+        circle[-1] = circle[0]
+        write_geojson(self.path, [polygon_feature([circle.tolist()])])
+        geometry = geo_data.load_geometry(self.path, self.cache_dir)
+
+        full, coarse = geo_data.load_detail_levels(geometry, (0.0, 0.5), self.cache_dir)
+        self.assertIs(full, geometry)
+        self.assertLess(len(coarse.coords), 40)
+        self.assertEqual(coarse.polygon_count, 1)
+        self.assertIn("lod_0.5", os.listdir(os.path.join(self.cache_dir, geometry.source_hash)))
+
+        geo_data.load_triangles(coarse, self.cache_dir)
+        cached = geo_data.load_detail_levels(geometry, (0.5,), self.cache_dir)[0]
+        self.assertIsInstance(cached.coords, np.memmap)
+        self.assertTrue(os.path.isfile(os.path.join(self.cache_dir, cached.source_hash, "triangles.npy")))
+
+    def test_cap_index_rejects_far_side(self):
+        """
+        Test that bounding caps reject polygons on the far side and that selecting keeps their layout.
+        """
+        geometry = geo_data.load_geometry(self.path, self.cache_dir)
+        far = geo_data.RingGeometry(np.array([[170, 0], [190, 0], [180, 10], [170, 0]], dtype=np.float64),
+                                    np.array([0, 4]), np.array([0, 1]))
+        caps = geo_data.CapIndex.from_geometry(far)
+        np.testing.assert_array_equal(caps.facing([1, 0, 0], 0.2), [False])
+        np.testing.assert_array_equal(caps.facing([-1, 0, 0], 0.2), [True])
+
+        # A cap bounds every vertex of its polygon
+        caps = geo_data.load_caps(geometry, self.cache_dir)
+        self.assertTrue(os.path.isfile(os.path.join(self.cache_dir, geometry.source_hash, "caps.npy")))
+        lon, lat = np.radians(np.asarray(geometry.coords)).T
+        xyz = np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+        polygon_of_vertex = np.repeat(np.arange(3), geometry.polygon_vertex_counts())
+        angles = np.arccos(np.clip(np.sum(xyz * caps.centers[polygon_of_vertex], axis=1), -1, 1))
+        self.assertTrue((angles <= caps.radii[polygon_of_vertex] + 1e-12).all())
+
+        # A damaged cap file counts as a miss and is written again
+        expected = np.array(caps.radii)
+        del caps
+        with open(os.path.join(self.cache_dir, geometry.source_hash, "caps.npy"), "wb") as f:
+            f.write(b"\x93NUMPY truncated")
+        np.testing.assert_array_equal(geo_data.load_caps(geometry, self.cache_dir).radii, expected)
+
+        selected = geometry.select(np.array([False, True, False]))
+        np.testing.assert_array_equal(selected.ring_offsets, [0, 5, 10])
+        np.testing.assert_array_equal(selected.polygon_offsets, [0, 2])
+        np.testing.assert_array_equal(selected.coords, geometry.coords[4:14])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import math
+import numpy as np
 from utils import geo_transforms
 
 class TestGeoTransforms(unittest.TestCase):
@@ -33,6 +34,24 @@ class TestGeoTransforms(unittest.TestCase):
         self.assertAlmostEqual(y, 0)
         self.assertAlmostEqual(z, 0)
 
+    def test_lon_lat_to_xyz_arrays(self):
+        """
+        Test that arrays of any shape are converted element-wise, matching scalar calls.
+        """
+        lons = np.array([[0.0, 90.0, 180.0], [-45.0, 12.5, 170.0]])
+        lats = np.array([[0.0, 0.0, 0.0], [30.0, -60.0, 89.0]])
+        x, y, z = geo_transforms.lon_lat_to_xyz(lons, lats)
+        self.assertEqual(x.shape, lons.shape)
+        for index in np.ndindex(lons.shape):
+            expected = geo_transforms.lon_lat_to_xyz(float(lons[index]), float(lats[index]))
+            self.assertAlmostEqual(x[index], expected[0])
+            self.assertAlmostEqual(y[index], expected[1])
+            self.assertAlmostEqual(z[index], expected[2])
+
+        # Scalars still come back as plain floats
+        self.assertIsInstance(geo_transforms.lon_lat_to_xyz(10, 20)[0], float)
+        np.testing.assert_allclose(geo_transforms.mapper(np.array([0, 5, 10]), 0, 10, 0, 100), [0, 50, 100])
+
     def test_mapper(self):
         """
         Test the value mapping from one numerical range to another.
@@ -0,0 +1,202 @@
+import unittest
+import math
+import os
+import tempfile
+from unittest.mock import patch
+import numpy as np
+from PIL import Image
+import image_warp
+
+def reference_warp(img_array, bulge_factor, bulge_exponent):
+    """
+    Per-pixel warp exactly as the original loop implementation computed it.
+    """
+    new_img_array = np.zeros_like(img_array)
+    size = img_array.shape[0]
+    center_x, center_y = size / 2, size / 2
+    for i in range(size):
+        for j in range(size):
+            norm_x = (i - center_x) / center_x
+            norm_y = (j - center_y) / center_y
+            r = math.sqrt(norm_x**2 + norm_y**2)
+            if r <= 1.0:
+                theta = math.atan2(norm_y, norm_x)
+                adjusted_r = r * (1 - bulge_factor * r**bulge_exponent)
+                if adjusted_r < 0:
+                    adjusted_r = 0
+                proj_x = center_x + adjusted_r * math.cos(theta) * center_x
+                proj_y = center_y + adjusted_r * math.sin(theta) * center_y
+                proj_x = min(max(int(proj_x), 0), size - 1)
+                proj_y = min(max(int(proj_y), 0), size - 1)
+                new_img_array[j, i] = img_array[proj_y, proj_x]
+    return new_img_array
+
+class TestImageWarp(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Write a small random RGB image to disk for the warp functions to read.
+        """
+        rng = np.random.default_rng(0)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self.tmp_dir.name, "source.png")
+        Image.fromarray(rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)).save(self.image_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_warp_image_matches_reference(self):
+        """
+        Test that the vectorized warp is pixel-identical to the per-pixel loop.
+        """
+        for bulge_factor, bulge_exponent in [(1.8, 2), (-0.16, 2.0), (-0.1056, 1.625), (0.7, 3)]:
+            proxy = np.array(image_warp.create_proxy(self.image_path, 1.01))
+            expected = reference_warp(proxy, bulge_factor, bulge_exponent)
+            warped = image_warp.warp_image(self.image_path, bulge_factor=bulge_factor,
+                                           bulge_exponent=bulge_exponent, scale_down_factor=1.01)
+            np.testing.assert_array_equal(np.array(warped), expected)
+
+    def test_proxy_cache_follows_file_changes(self):
+        """
+        Test that cached proxies are reused and rebuilt once the source file changes.
+        """
+        first = image_warp.create_proxy(self.image_path, 1.5)
+        self.assertEqual(first.size, (64, 64))
+        np.testing.assert_array_equal(np.array(image_warp.create_proxy(self.image_path, 1.5)), np.array(first))
+
+        Image.new("RGB", (64, 48), (255, 0, 0)).save(self.image_path)
+        stat = os.stat(self.image_path)
+        os.utime(self.image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        rebuilt = np.array(image_warp.create_proxy(self.image_path, 1.5))
+        self.assertTrue((rebuilt[..., 0] == 255).all())
+
+    def test_proxy_cache_is_bounded_by_bytes(self):
+        """
+        Test that the proxy cache drops the least recently used proxies once over its byte limit.
+        """
+        image_warp._proxy_cache.clear()
+        self.addCleanup(image_warp._proxy_cache.clear)
+        # Each proxy of the 64x48 RGB source is 64x64x3 bytes
+        with patch('image_warp.PROXY_CACHE_BYTES', 2 * 64 * 64 * 3):
+            image_warp.create_proxy(self.image_path, 1.5)
+            image_warp.create_proxy(self.image_path, 1.2)
+            image_warp.create_proxy(self.image_path, 1.5)
+            image_warp.create_proxy(self.image_path, 1.3)
+            self.assertEqual([key[2] for key in image_warp._proxy_cache], [1.5, 1.3])
+
+    def test_warp_map_reuse_and_persistence(self):
+        """
+        Test that warp maps are cached in memory and round-trip through .npz files.
+        """
+        cache_dir = os.path.join(self.tmp_dir.name, "warp_cache")
+        warp_map = image_warp.get_warp_map(32, -0.16, 2.0, cache_dir)
+        self.assertIs(image_warp.get_warp_map(32, -0.16, 2.0, cache_dir), warp_map)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        loaded = image_warp.WarpMap.load(os.path.join(cache_dir, os.listdir(cache_dir)[0]))
+        frame = np.arange(32 * 32 * 3, dtype=np.uint8).reshape(32, 32, 3)
+        np.testing.assert_array_equal(loaded.apply(frame), warp_map.apply(frame))
+        np.testing.assert_array_equal(warp_map.apply(frame), reference_warp(frame, -0.16, 2.0))
+
+    def test_warp_map_cache_is_bounded_by_bytes(self):
+        """
+        Test that the in-memory cache drops the least recently used maps once over its byte limit.
+        """
+        image_warp.clear_warp_map_cache()
+        self.addCleanup(image_warp.clear_warp_map_cache)
+        limit = 2 * image_warp.WarpMap(32, -0.16, 2.0).nbytes
+        with patch('image_warp.WARP_MAP_CACHE_BYTES', limit):
+            first = image_warp.get_warp_map(32, -0.16, 2.0)
+            second = image_warp.get_warp_map(32, -0.2, 2.0)
+            self.assertIs(image_warp.get_warp_map(32, -0.16, 2.0), first)
+            image_warp.get_warp_map(32, -0.3, 2.0)
+            self.assertIs(image_warp.get_warp_map(32, -0.16, 2.0), first)
+            self.assertIsNot(image_warp.get_warp_map(32, -0.2, 2.0), second)
+
+    def test_damaged_warp_map_file_is_rebuilt(self):
+        """
+        Test that a truncated .npz counts as a cache miss and is replaced by a complete file.
+        """
+        image_warp.clear_warp_map_cache()
+        self.addCleanup(image_warp.clear_warp_map_cache)
+        cache_dir = os.path.join(self.tmp_dir.name, "warp_cache")
+        os.makedirs(cache_dir)
+        path = os.path.join(cache_dir, image_warp._warp_map_filename(32, -0.16, 2.0, "nearest"))
+        with open(path, "wb") as f:
+            f.write(b"PK\x03\x04 truncated")
+
+        warp_map = image_warp.get_warp_map(32, -0.16, 2.0, cache_dir)
+        np.testing.assert_array_equal(image_warp.WarpMap.load(path).src_index, warp_map.src_index)
+        self.assertEqual(os.listdir(cache_dir), [os.path.basename(path)])
+
+    def test_tiled_warp_has_no_seams(self):
+        """
+        Test that warping in bands gives exactly the single-pass result.
+        """
+        frame = np.random.default_rng(2).integers(0, 256, (67, 67, 4), dtype=np.uint8)
+        expected = image_warp.WarpMap(67, -0.16, 2.0).apply(frame)
+        for workers, band_rows in [(1, 67), (3, 5), (4, 1)]:
+            tiled = image_warp.warp_array_tiled(frame, -0.16, 2.0, workers=workers, band_rows=band_rows)
+            np.testing.assert_array_equal(tiled, expected)
+
+    def test_interpolated_sampling(self):
+        """
+        Test that bilinear and bicubic sampling reproduce the source without a bulge,
+        and that tiled and persisted maps agree with the in-memory map.
+        """
+        frame = np.random.default_rng(3).integers(0, 256, (50, 50, 3), dtype=np.uint8)
+        for sampling in ["bilinear", "bicubic"]:
+            identity = image_warp.WarpMap(50, 0.0, 2, sampling)
+            inside = identity.dst_index
+            np.testing.assert_array_equal(identity.apply(frame).reshape(-1, 3)[inside], frame.reshape(-1, 3)[inside])
+
+            warp_map = image_warp.get_warp_map(50, -0.16, 2.0, self.tmp_dir.name, sampling)
+            expected = warp_map.apply(frame)
+            loaded = image_warp.WarpMap.load(os.path.join(self.tmp_dir.name, image_warp._warp_map_filename(50, -0.16, 2.0, sampling)))
+            self.assertEqual(loaded.sampling, sampling)
+            np.testing.assert_array_equal(loaded.apply(frame), expected)
+            tiled = image_warp.warp_array_tiled(frame, -0.16, 2.0, workers=2, band_rows=7, sampling=sampling)
+            np.testing.assert_array_equal(tiled, expected)
+
+        with self.assertRaises(ValueError):
+            image_warp.WarpMap(50, -0.16, 2.0, "lanczos")
+
+    def test_bicubic_apply_only_gathers(self):
+        """
+        Test that applying a bicubic map recomputes nothing from the geometry; its speed
+        against supersampling is measured in benchmark_warp.py.
+        """
+        frame = np.random.default_rng(4).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+        bicubic = image_warp.WarpMap(64, -0.16, 2.0, "bicubic")
+
+        with patch('image_warp._sampling_taps') as taps, patch('image_warp._cubic_weights') as weights, \
+             patch('image_warp._source_coordinates') as coordinates:
+            bicubic.apply(frame)
+            taps.assert_not_called()
+            weights.assert_not_called()
+            coordinates.assert_not_called()
+
+    def test_warp_views_matches_individual_warps(self):
+        """
+        Test that the batched multi-projector warp equals warping each view on its own.
+        """
+        second_path = os.path.join(self.tmp_dir.name, "second.png")
+        Image.new("RGBA", (64, 48), (10, 20, 30, 255)).save(second_path)
+        paths = [self.image_path, second_path, self.image_path]
+        settings = [
+            {"bulge_factor": -0.16, "bulge_exponent": 2.0, "scale_down_factor": 1.01},
+            {"bulge_factor": -0.16, "bulge_exponent": 2.0, "scale_down_factor": 1.01},
+            {"bulge_factor": 0.7, "bulge_exponent": 3, "scale_down_factor": 1.2},
+        ]
+
+        warped_views = image_warp.warp_views(paths, settings)
+        for path, view_settings, warped in zip(paths, settings, warped_views):
+            proxy = image_warp.create_proxy(path, view_settings["scale_down_factor"])
+            self.assertEqual(warped.mode, proxy.mode)
+            warp_map = image_warp.WarpMap(proxy.size[0], view_settings["bulge_factor"], view_settings["bulge_exponent"])
+            np.testing.assert_array_equal(np.array(warped), warp_map.apply(np.array(proxy)))
+        # The RGB and RGBA views share parameters but are not mixed into one mode
+        self.assertEqual([warped.mode for warped in warped_views], ["RGB", "RGBA", "RGB"])
+
+if __name__ == '__main__':
+    unittest.main()
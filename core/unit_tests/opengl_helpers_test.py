@@ -1,5 +1,11 @@
 import unittest
 from unittest.mock import patch, MagicMock
+import os
+import ctypes
+import tempfile
+import numpy as np
+import OpenGL.GL as GL
+from PIL import Image
 from utils import opengl_helpers
 
 class TestOpenGLHelpers(unittest.TestCase):
@@ -101,5 +107,150 @@ class TestOpenGLHelpers(unittest.TestCase):
             except Exception as e:
                 self.fail(f"Setting uniform failed with an unexpected error: {e}")
 
+class TestUniformRegistry(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Mock a linked program with a color, a projection matrix and a light array uniform.
+        """
+        self.gl = MagicMock()
+        self.gl.glGetProgramiv.return_value = 3
+        self.gl.glGetActiveUniform.side_effect = [(b"color", 1, 0), (b"projection", 1, 0), (b"lights[0]", 4, 0)]
+        self.gl.glGetUniformLocation.side_effect = lambda program, name: {"color": 0, "projection": 1, "lights": 2}.get(name, -1)
+        patcher = patch('utils.opengl_helpers.gl', self.gl)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(opengl_helpers._uniform_registries.clear)
+
+    def test_locations_are_looked_up_at_link_time(self):
+        """
+        Test that active uniforms are introspected once and not looked up again per call.
+        """
+        registry = opengl_helpers.OpenGLHelpers.uniform_registry(5)
+        self.assertEqual(registry.locations, {"color": 0, "projection": 1, "lights": 2})
+        self.gl.glGetUniformLocation.reset_mock()
+
+        opengl_helpers.OpenGLHelpers.set_uniform(5, "color", [1.0, 0.0, 0.0, 1.0], '4f')
+        self.gl.glGetUniformLocation.assert_not_called()
+        self.gl.glUniform4f.assert_called_once_with(0, 1.0, 0.0, 0.0, 1.0)
+
+        with self.assertRaises(ValueError):
+            registry.set("missing", 1.0)
+
+    def test_unchanged_values_are_not_uploaded(self):
+        """
+        Test that a value equal to the last upload is skipped and a changed one is sent.
+        """
+        registry = opengl_helpers.UniformRegistry(6)
+        matrix = np.eye(4)
+        self.assertTrue(registry.set("projection", matrix, 'mat4'))
+        self.assertFalse(registry.set("projection", np.eye(4), 'mat4'))
+
+        # Changing the caller's array in place still counts as a change
+        matrix[0, 3] = 2.0
+        self.assertTrue(registry.set("projection", matrix, 'mat4'))
+        self.assertEqual(self.gl.glUniformMatrix4fv.call_count, 2)
+
+class TestBufferUpdates(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Mock OpenGL for buffer creation and updates.
+        """
+        self.gl = MagicMock()
+        self.gl.glGenBuffers.return_value = 4
+        patcher = patch('utils.opengl_helpers.gl', self.gl)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fixed_capacity_buffer_is_orphaned_and_overwritten(self):
+        """
+        Test that a buffer is allocated at its capacity and updates reuse it through glBufferSubData.
+        """
+        helpers = opengl_helpers.OpenGLHelpers
+        buffer_id = helpers.create_buffer([1.0, 2.0], usage=GL.GL_DYNAMIC_DRAW, capacity=64)
+        self.gl.glBufferData.assert_called_once_with(GL.GL_ARRAY_BUFFER, 64, None, GL.GL_DYNAMIC_DRAW)
+        self.assertEqual(self.gl.glBufferSubData.call_args[0][:3], (GL.GL_ARRAY_BUFFER, 0, 8))
+
+        self.gl.reset_mock()
+        helpers.update_buffer(buffer_id, np.arange(12), 64)
+        self.gl.glGenBuffers.assert_not_called()
+        self.gl.glBufferData.assert_called_once_with(GL.GL_ARRAY_BUFFER, 64, None, GL.GL_DYNAMIC_DRAW)
+        self.assertEqual(self.gl.glBufferSubData.call_args[0][:3], (GL.GL_ARRAY_BUFFER, 0, 48))
+
+        with self.assertRaises(ValueError):
+            helpers.update_buffer(buffer_id, np.arange(17), 64)
+
+class TestTextureUpload(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Mock OpenGL and provide a scratch directory for test images.
+        """
+        self.gl = MagicMock()
+        patcher = patch('utils.opengl_helpers.gl', self.gl)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def save_image(self, mode, size, name):
+        path = os.path.join(self.directory.name, name)
+        Image.new(mode, size).save(path)
+        return path
+
+    def test_formats_follow_the_image_mode(self):
+        """
+        Test that each PIL mode maps to its own GL format and odd rows lower the unpack alignment.
+        """
+        cases = [("L", (GL.GL_R8, GL.GL_RED), 1, 1), ("LA", (GL.GL_RG8, GL.GL_RG), 2, 2),
+                 ("RGB", (GL.GL_RGB8, GL.GL_RGB), 3, 1), ("RGBA", (GL.GL_RGBA8, GL.GL_RGBA), 4, 4),
+                 ("P", (GL.GL_RGB8, GL.GL_RGB), 3, 1)]
+        for mode, formats, channels, alignment in cases:
+            with self.subTest(mode=mode):
+                pixels, internal_format, pixel_format = opengl_helpers.decode_image(
+                    self.save_image(mode, (5, 3), f"{mode}.png"))
+                self.assertEqual(pixels.shape, (3, 5, channels))
+                self.assertEqual((internal_format, pixel_format), formats)
+
+                self.gl.reset_mock()
+                opengl_helpers.OpenGLHelpers.upload_texture(pixels, internal_format, pixel_format)
+                self.gl.glPixelStorei.assert_called_once_with(self.gl.GL_UNPACK_ALIGNMENT, alignment)
+                args = self.gl.glTexImage2D.call_args[0]
+                self.assertEqual(args[2:7], (internal_format, 5, 3, 0, pixel_format))
+
+                # Gray images sample as gray, not red
+                swizzles = [call.args[2] for call in self.gl.glTexParameteriv.call_args_list]
+                expected = {"L": [(GL.GL_RED, GL.GL_RED, GL.GL_RED, GL.GL_ONE)],
+                            "LA": [(GL.GL_RED, GL.GL_RED, GL.GL_RED, GL.GL_GREEN)]}.get(mode, [])
+                self.assertEqual(swizzles, expected)
+
+    def test_large_textures_go_through_a_pixel_buffer(self):
+        """
+        Test that the pixels are copied into the mapped pixel buffer and uploaded from offset 0.
+        """
+        pixels = np.arange(4 * 4 * 4, dtype=np.uint8).reshape(4, 4, 4)
+        mapped = ctypes.create_string_buffer(pixels.nbytes)
+        self.gl.glMapBufferRange.return_value = ctypes.addressof(mapped)
+
+        opengl_helpers.OpenGLHelpers.upload_texture(pixels, GL.GL_RGBA8, GL.GL_RGBA, use_pbo=True)
+        self.assertEqual(mapped.raw, pixels.tobytes())
+        self.gl.glUnmapBuffer.assert_called_once_with(self.gl.GL_PIXEL_UNPACK_BUFFER)
+        self.assertEqual(self.gl.glTexImage2D.call_args[0][-1].value, None)
+
+    def test_prefetched_images_are_uploaded_on_load(self):
+        """
+        Test that a prefetched image is decoded once and uploaded when it is loaded.
+        """
+        path = self.save_image("RGB", (4, 4), "prefetch.png")
+        prefetcher = opengl_helpers.TexturePrefetcher()
+        self.addCleanup(prefetcher.shutdown)
+        with patch('utils.opengl_helpers.decode_image', wraps=opengl_helpers.decode_image) as decode:
+            prefetcher.prefetch(path)
+            prefetcher.prefetch(path)
+            prefetcher.load(path)
+            decode.assert_called_once_with(path)
+        self.gl.glTexImage2D.assert_called_once()
+
 if __name__ == '__main__':
     unittest.main()
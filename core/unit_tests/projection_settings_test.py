@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+from projection_settings import ProjectionSettings
+
+class TestProjectionSettings(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Use the unit-sphere settings of earth_plot.py.
+        """
+        self.settings = ProjectionSettings(light_to_sphere=6, light_to_image=1, texture_size=100,
+                                           radius_display=1.0, texture_extent=0.203)
+        rng = np.random.default_rng(0)
+        self.lons = rng.uniform(-180, 180, 500)
+        self.lats = rng.uniform(-90, 90, 500)
+
+    def test_project_many_matches_single_points(self):
+        """
+        Test that the bulk projection agrees with projecting one coordinate at a time.
+        """
+        projected = self.settings.project_many(self.lons, self.lats)
+        for index in range(len(self.lons)):
+            i, j, z = self.settings.get_projected_coordinates(self.lons[index], self.lats[index])
+            self.assertAlmostEqual(projected.i[index], i)
+            self.assertAlmostEqual(projected.j[index], j)
+            self.assertAlmostEqual(projected.z[index], z)
+            self.assertAlmostEqual(projected.u[index], (i + 0.203) / 0.406 * 100)
+
+    def test_project_many_masks_far_side(self):
+        """
+        Test that points facing away from the light are masked out.
+        """
+        projected = self.settings.project_many(np.array([0.0, 180.0, 90.0, 70.0]), np.zeros(4))
+        np.testing.assert_array_equal(projected.visible, [True, False, False, True])
+
+    def test_cached_stages_follow_settings(self):
+        """
+        Test that cached projections are invalidated stage by stage on settings changes.
+        """
+        first = self.settings.project_many(self.lons, self.lats, dataset="points")
+        cached = self.settings.project_many(None, None, dataset="points")
+        self.assertIs(cached.i, first.i)
+        self.assertIs(cached.u, first.u)
+
+        # Changing only the texture mapping keeps the projected plane
+        self.settings.update_settings(texture_size=200)
+        retextured = self.settings.project_many(None, None, dataset="points")
+        self.assertIs(retextured.i, first.i)
+        np.testing.assert_allclose(retextured.u, first.u * 2)
+
+        # Moving a light reprojects from the cached unit-sphere coordinates
+        self.settings.update_settings(light_to_sphere=4)
+        reprojected = self.settings.project_many(None, None, dataset="points")
+        expected = ProjectionSettings(light_to_sphere=4, light_to_image=1, texture_size=200, radius_display=1.0,
+                                      texture_extent=0.203).project_many(self.lons, self.lats)
+        np.testing.assert_allclose(reprojected.i, expected.i)
+        np.testing.assert_allclose(reprojected.v, expected.v)
+
+        # Forgetting the dataset lets the name be reused for other coordinates
+        self.settings.forget_dataset("points")
+        replaced = self.settings.project_many(self.lons[:10], self.lats[:10], dataset="points")
+        np.testing.assert_allclose(replaced.i, expected.i[:10])
+
+    def test_degrees_per_pixel_follows_texture_size(self):
+        """
+        Test that doubling the texture resolution halves the degrees covered by a pixel.
+        """
+        coarse = self.settings.degrees_per_pixel()
+        self.settings.update_settings(texture_size=200)
+        self.assertAlmostEqual(self.settings.degrees_per_pixel(), coarse / 2)
+
+    def test_view_longitude_turns_the_sphere(self):
+        """
+        Test that a projector facing another longitude sees the same image as one facing 0 of rotated data.
+        """
+        expected = self.settings.project_many(self.lons, self.lats)
+        self.settings.update_settings(view_longitude=120.0)
+        turned = self.settings.project_many(self.lons + 120.0, self.lats)
+        np.testing.assert_allclose(turned.i, expected.i, atol=1e-12)
+        np.testing.assert_allclose(turned.j, expected.j, atol=1e-12)
+        np.testing.assert_array_equal(turned.visible, expected.visible)
+
+    def test_project_polygons_skips_far_side(self):
+        """
+        Test that polygon culling only drops polygons without a visible vertex.
+        """
+        from geo_data import RingGeometry, CapIndex
+
+        centers = np.arange(-180, 180, 30)
+        rings = [np.array([[c - 5, -5], [c + 5, -5], [c + 5, 5], [c - 5, 5], [c - 5, -5]], dtype=np.float64)
+                 for c in centers]
+        geometry = RingGeometry(np.concatenate(rings), np.arange(len(rings) + 1) * 5, np.arange(len(rings) + 1))
+        facing, projected = self.settings.project_polygons(geometry, CapIndex.from_geometry(geometry))
+
+        everything = self.settings.project_many(geometry.coords[:, 0], geometry.coords[:, 1])
+        has_visible = everything.visible.reshape(-1, 5).any(axis=1)
+        self.assertLess(facing.polygon_count, geometry.polygon_count)
+        self.assertEqual(facing.polygon_count, np.count_nonzero(has_visible))
+        np.testing.assert_allclose(projected.u, everything.u.reshape(-1, 5)[has_visible].ravel())
+
+if __name__ == '__main__':
+    unittest.main()
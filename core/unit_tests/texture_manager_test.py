@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import unittest
+from itertools import count
+from unittest.mock import patch, MagicMock
+import numpy as np
+import OpenGL.GL as GL
+from PIL import Image
+from utils.texture_manager import TextureManager, build_mip_chain
+
+class TestTextureManager(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Mock OpenGL with increasing texture IDs and write a few test images.
+        """
+        self.gl = MagicMock()
+        self.gl.glGenTextures.side_effect = count(1)
+        patchers = [patch('utils.texture_manager.gl', self.gl), patch('utils.opengl_helpers.gl', self.gl)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def save_image(self, name, size=(8, 8), value=0):
+        path = os.path.join(self.directory.name, name)
+        Image.new("RGBA", size, (value, 0, 0, 255)).save(path)
+        return path
+
+    def deleted(self):
+        return [call.args[1][0] for call in self.gl.glDeleteTextures.call_args_list]
+
+    def test_same_path_or_content_shares_one_texture(self):
+        """
+        Test that a path acquired twice and a copy of the file under another name upload only once.
+        """
+        manager = TextureManager()
+        clouds = self.save_image("clouds.png")
+        copy = os.path.join(self.directory.name, "copy.png")
+        shutil.copyfile(clouds, copy)
+
+        texture = manager.acquire(clouds)
+        self.assertEqual(manager.acquire(clouds), texture)
+        self.assertEqual(manager.acquire(copy), texture)
+        self.assertEqual(manager.acquire(self.save_image("oceans.png", value=255)), texture + 1)
+        self.assertEqual(self.gl.glGenTextures.call_count, 2)
+        self.assertEqual(manager.by_id[texture].references, 3)
+
+        with patch('utils.texture_manager._decode') as decode:
+            manager.acquire(clouds)
+            decode.assert_not_called()
+
+    def test_least_recently_used_unreferenced_texture_is_evicted(self):
+        """
+        Test that going over the budget deletes the oldest released texture and keeps referenced ones.
+        """
+        # Each 8x8 RGBA texture is estimated at 256 bytes plus a third for its mips
+        manager = TextureManager(budget_bytes=2 * 341)
+        clouds = manager.acquire(self.save_image("clouds.png", value=1))
+        night_day = manager.acquire(self.save_image("night_day.png", value=2))
+        manager.release(clouds)
+        manager.release(night_day)
+        manager.touch(clouds)
+
+        oceans = manager.acquire(self.save_image("oceans.png", value=3))
+        self.assertEqual(self.deleted(), [night_day])
+        self.assertEqual(list(manager.by_id), [clouds, oceans])
+
+        manager.acquire(self.save_image("stars.png", value=4))
+        self.assertEqual(self.deleted(), [night_day, clouds])
+
+        # Everything left is referenced, so nothing more can go even over the budget
+        manager.acquire(self.save_image("borders.png", value=5))
+        self.assertEqual(self.deleted(), [night_day, clouds])
+        self.assertGreater(manager.used_bytes, manager.budget_bytes)
+
+        manager.release(oceans)
+        self.assertEqual(self.deleted(), [night_day, clouds, oceans])
+        with self.assertRaises(ValueError):
+            manager.release(oceans)
+
+    def test_mip_levels_are_streamed_coarse_to_fine(self):
+        """
+        Test that a progressive texture starts from its two smallest levels and gains one level per call.
+        """
+        manager = TextureManager()
+        manager.acquire(self.save_image("clouds.png"), progressive=True)
+        levels = [call.args[1] for call in self.gl.glTexImage2D.call_args_list]
+        self.assertEqual(levels, [3, 2])
+
+        self.assertTrue(manager.stream(max_bytes=1))
+        self.assertFalse(manager.stream(max_bytes=1))
+        levels = [call.args[1] for call in self.gl.glTexImage2D.call_args_list]
+        self.assertEqual(levels, [3, 2, 1, 0])
+        base_levels = [call.args[2] for call in self.gl.glTexParameteri.call_args_list
+                       if call.args[1] == self.gl.GL_TEXTURE_BASE_LEVEL]
+        self.assertEqual(base_levels, [2, 1, 0])
+        self.assertEqual(manager.used_bytes, 4 * (64 + 16 + 4 + 1))
+
+    def test_streamed_gray_texture_samples_as_gray(self):
+        """
+        Test that a progressive single channel texture gets the gray swizzle as well.
+        """
+        path = os.path.join(self.directory.name, "heights.png")
+        Image.new("L", (8, 8)).save(path)
+        TextureManager().acquire(path, progressive=True)
+        self.gl.glTexParameteriv.assert_called_once_with(
+            self.gl.GL_TEXTURE_2D, self.gl.GL_TEXTURE_SWIZZLE_RGBA, (GL.GL_RED, GL.GL_RED, GL.GL_RED, GL.GL_ONE))
+
+    def test_mip_chain_halves_down_to_one_pixel(self):
+        """
+        Test the sizes of a mip chain of a non-square single channel image.
+        """
+        levels = build_mip_chain(np.zeros((5, 12, 1), dtype=np.uint8))
+        self.assertEqual([level.shape for level in levels],
+                         [(5, 12, 1), (2, 6, 1), (1, 3, 1), (1, 1, 1)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import io
+import logging
+from utils import tracing
+
+class CountingValue:
+    """
+    Argument that counts how often it is turned into text.
+    """
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "value"
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Start every test from the default configuration with its output captured.
+        """
+        self.output = io.StringIO()
+        tracing.configure("")
+        root = logging.getLogger(tracing.ROOT_LOGGER)
+        self.saved_handlers = root.handlers[:]
+        root.handlers = [logging.StreamHandler(self.output)]
+        self.logger = tracing.get_logger("utils.some_module")
+
+    def tearDown(self):
+        tracing.disable_trace()
+        logging.getLogger(tracing.ROOT_LOGGER).handlers = self.saved_handlers
+        tracing.configure("")
+
+    def test_parse_levels(self):
+        """
+        Test a base level with per-module overrides.
+        """
+        base, modules = tracing.parse_levels("info, opengl_helpers=DEBUG,camera_transforms=error")
+        self.assertEqual(base, logging.INFO)
+        self.assertEqual(modules, {"opengl_helpers": logging.DEBUG, "camera_transforms": logging.ERROR})
+        with self.assertRaises(ValueError):
+            tracing.parse_levels("LOUD")
+
+    def test_disabled_messages_are_never_formatted(self):
+        """
+        Test that debug arguments are not formatted unless a module is switched to debug.
+        """
+        self.assertEqual(self.logger.name, "earth.some_module")
+        value = CountingValue()
+        self.logger.debug("Matrix: %s", value)
+        self.assertEqual(value.formatted, 0)
+        self.assertEqual(self.output.getvalue(), "")
+
+        tracing.configure("some_module=DEBUG")
+        self.logger.debug("Matrix: %s", value)
+        self.assertEqual(value.formatted, 1)
+        self.assertIn("Matrix: value", self.output.getvalue())
+
+        # Configuring again drops the module level of the earlier call
+        tracing.configure("")
+        self.assertEqual(self.logger.level, logging.NOTSET)
+        self.assertFalse(self.logger.isEnabledFor(logging.DEBUG))
+
+    def test_trace_buffer_keeps_recent_records(self):
+        """
+        Test that traced records are kept silently in a ring buffer and formatted on dump.
+        """
+        tracing.enable_trace(capacity=3)
+        value = CountingValue()
+        for index in range(5):
+            self.logger.debug("frame %d %s", index, value)
+        self.assertEqual(self.output.getvalue(), "")
+        self.assertEqual(value.formatted, 0)
+
+        dump = io.StringIO()
+        tracing.dump_trace(dump)
+        lines = dump.getvalue().splitlines()
+        self.assertEqual([line.split(": ", 1)[1] for line in lines], ["frame 2 value", "frame 3 value", "frame 4 value"])
+
+        # Warnings still reach the regular output while tracing
+        self.logger.warning("visible")
+        self.assertIn("visible", self.output.getvalue())
+
+        # Stopping the trace puts the earth logger back to its configured level
+        tracing.disable_trace()
+        self.assertFalse(self.logger.isEnabledFor(logging.DEBUG))
+        self.assertEqual(logging.getLogger(tracing.ROOT_LOGGER).level, tracing.DEFAULT_LEVEL)
+        formatted = value.formatted
+        self.logger.debug("frame %s", value)
+        self.assertEqual(value.formatted, formatted)
+
+    def test_importing_a_module_installs_no_handlers(self):
+        """
+        Test that getting a logger leaves the handlers to configure.
+        """
+        root = logging.getLogger(tracing.ROOT_LOGGER)
+        root.handlers = []
+        tracing.get_logger("utils.other_module")
+        self.assertEqual(root.handlers, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from unittest import mock
+import numpy as np
+import shapely
+from utils import triangulation
+
+def triangle_areas(coords, triangles):
+    points = np.asarray(coords, dtype=np.float64)[np.asarray(triangles, dtype=np.int64)]
+    return 0.5 * triangulation._cross(points[:, 0], points[:, 1], points[:, 2])
+
+class TestTriangulation(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build a columnar dataset of a square with two holes, a concave polygon and a triangle.
+        """
+        square = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+        holes = [[[2, 2], [2, 4], [4, 4], [4, 2], [2, 2]], [[6, 5], [8, 5], [7, 8], [6, 5]]]
+        concave = [[20, 0], [30, 0], [30, 10], [25, 3], [20, 10], [20, 0]]
+        triangle = [[40, 0], [40, 5], [45, 0], [40, 0]]
+        polygons = np.array([shapely.Polygon(square, holes), shapely.Polygon(concave), shapely.Polygon(triangle)])
+        _, self.coords, (self.ring_offsets, self.polygon_offsets) = shapely.to_ragged_array(polygons)
+        self.areas = shapely.area(polygons)
+
+    def check_triangles(self, triangles):
+        areas = triangle_areas(self.coords, triangles)
+        self.assertTrue((areas > 0).all())
+        # Every triangle belongs to one polygon, so the areas add up per polygon
+        polygon_of_vertex = np.repeat(np.arange(3), np.diff(self.ring_offsets[self.polygon_offsets]))
+        polygon_of_triangle = polygon_of_vertex[triangles[:, 0]]
+        np.testing.assert_array_equal(polygon_of_vertex[triangles], np.repeat(polygon_of_triangle[:, None], 3, axis=1))
+        np.testing.assert_allclose(np.bincount(polygon_of_triangle, areas), self.areas)
+
+    def test_triangulate_polygons(self):
+        """
+        Test that triangles cover each polygon minus its holes with counter-clockwise winding.
+        """
+        triangles = triangulation.triangulate_polygons(self.coords, self.ring_offsets, self.polygon_offsets, workers=2)
+        self.assertEqual(triangles.dtype, np.uint32)
+        self.check_triangles(triangles.astype(np.int64))
+
+    def test_ear_clipping_fallback(self):
+        """
+        Test the ear clipping used when GEOS cannot triangulate the polygons.
+        """
+        with mock.patch.object(triangulation, "_delaunay_chunk", return_value=None):
+            triangles = triangulation.triangulate_polygons(self.coords, self.ring_offsets, self.polygon_offsets, workers=1)
+        self.check_triangles(triangles.astype(np.int64))
+
+        # Clockwise input and a missing closing point are handled as well
+        ring = np.array([[0, 0], [0, 4], [2, 1], [4, 4], [4, 0]], dtype=np.float64)
+        triangles = triangulation.ear_clip_polygon(ring, [0, 5])
+        self.assertEqual(len(triangles), 3)
+        np.testing.assert_allclose(triangle_areas(ring, triangles).sum(), shapely.Polygon(ring).area)
+
+if __name__ == '__main__':
+    unittest.main()
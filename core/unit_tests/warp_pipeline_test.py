@@ -0,0 +1,89 @@
+import unittest
+import os
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+import image_warp
+import warp_pipeline
+
+class TestWarpPipeline(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Write a short sequence of random frames to a temporary directory.
+        """
+        rng = np.random.default_rng(1)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.frame_paths = []
+        for index in range(5):
+            path = os.path.join(self.tmp_dir.name, f"frame{index:02d}.png")
+            Image.fromarray(rng.integers(0, 256, (40, 40, 3), dtype=np.uint8)).save(path)
+            self.frame_paths.append(path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_frames_match_warp_image_in_order(self):
+        """
+        Test that streamed frames come out in order and equal warping each file directly.
+        """
+        source = warp_pipeline.frames_from_directory(self.tmp_dir.name)
+        pipeline = warp_pipeline.WarpPipeline(source, bulge_factor=-0.16, bulge_exponent=2.0, queue_size=1)
+        frames = list(pipeline.frames())
+
+        self.assertEqual(len(frames), len(self.frame_paths))
+        for frame, path in zip(frames, self.frame_paths):
+            expected = image_warp.warp_image(path, bulge_factor=-0.16, bulge_exponent=2.0, scale_down_factor=1.01)
+            np.testing.assert_array_equal(np.array(frame), np.array(expected))
+
+    def test_source_errors_reach_the_consumer(self):
+        """
+        Test that an exception raised while decoding is re-raised by the consumer.
+        """
+        def broken_source():
+            yield Image.new("RGB", (16, 16))
+            raise IOError("corrupt frame")
+
+        pipeline = warp_pipeline.WarpPipeline(broken_source(), bulge_factor=-0.16, bulge_exponent=2.0)
+        with self.assertRaises(IOError):
+            pipeline.run(lambda frame_index, image: None)
+
+    def test_queue_sink_feeds_a_polling_display(self):
+        """
+        Test that a consumer polling a QueueSink gets every frame in order and then sees the end.
+        """
+        source = warp_pipeline.frames_from_directory(self.tmp_dir.name)
+        pipeline = warp_pipeline.WarpPipeline(source, bulge_factor=-0.16, bulge_exponent=2.0)
+        sink = warp_pipeline.QueueSink(queue_size=1)
+        thread = pipeline.start(sink, on_finished=sink.finish)
+
+        indices = []
+        deadline = time.monotonic() + 10
+        while not sink.done() and time.monotonic() < deadline:
+            frame = sink.get()
+            if frame is None:
+                time.sleep(0.01)
+            else:
+                indices.append(frame[0])
+        thread.join(timeout=1)
+
+        self.assertEqual(indices, list(range(len(self.frame_paths))))
+        self.assertIsNone(sink.error)
+
+    def test_closed_queue_sink_releases_the_pipeline(self):
+        """
+        Test that a pipeline blocked on a full sink finishes once the display goes away.
+        """
+        pipeline = warp_pipeline.WarpPipeline(warp_pipeline.frames_from_directory(self.tmp_dir.name),
+                                              bulge_factor=-0.16, bulge_exponent=2.0)
+        sink = warp_pipeline.QueueSink(queue_size=1)
+        thread = pipeline.start(sink, on_finished=sink.finish)
+        time.sleep(0.2)
+        pipeline.stop()
+        sink.close()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+if __name__ == '__main__':
+    unittest.main()
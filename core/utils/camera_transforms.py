@@ -1,10 +1,13 @@
 import numpy as np
+import logging
+try:
+    from utils.tracing import configure, get_logger
+except ImportError:
+    # Run as a script from inside utils/
+    from tracing import configure, get_logger
 
-DEBUG_MODE = True
-
-def debug_print(message):
-    if DEBUG_MODE:
-        print(message)
+# Levels come from EARTH_LOG_LEVEL, e.g. EARTH_LOG_LEVEL=camera_transforms=DEBUG
+logger = get_logger(__name__)
 
 class Camera:
     """
@@ -19,7 +22,7 @@ class Camera:
         self.near_plane = near_plane
         self.far_plane = far_plane
         
-        debug_print(f"Camera initialized with position: {self.position}, target: {self.target}, up: {self.up_vector}")
+        logger.debug("Camera initialized with position: %s, target: %s, up: %s", self.position, self.target, self.up_vector)
 
     def get_view_matrix(self):
         """
@@ -51,7 +54,8 @@ class Camera:
             [-np.dot(s, eye), -np.dot(u, eye), np.dot(f, eye), 1]
         ], dtype=np.float32)
 
-        debug_print(f"View Matrix:\n{view}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("View Matrix:\n%s", view)
         return view
 
     def perspective_projection(self, fov, aspect_ratio, near, far):
@@ -66,7 +70,8 @@ class Camera:
             [0, 0, (2 * far * near) / (near - far), 0]
         ], dtype=np.float32)
 
-        debug_print(f"Projection Matrix:\n{proj}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Projection Matrix:\n%s", proj)
         return proj
 
     def update_position(self, new_position):
@@ -74,16 +79,18 @@ class Camera:
         Update the camera position.
         """
         self.position = np.array(new_position, dtype=np.float32)
-        debug_print(f"Camera position updated to: {self.position}")
+        logger.debug("Camera position updated to: %s", self.position)
 
     def update_target(self, new_target):
         """
         Update the camera target.
         """
         self.target = np.array(new_target, dtype=np.float32)
-        debug_print(f"Camera target updated to: {self.target}")
+        logger.debug("Camera target updated to: %s", self.target)
 
 if __name__ == '__main__':
+    configure()
+
     # Example usage
     camera = Camera(position=[0, 0, 3], target=[0, 0, 0], up_vector=[0, 1, 0], 
                     fov=45, aspect_ratio=800 / 600, near_plane=0.1, far_plane=100.0)
@@ -91,5 +98,5 @@ if __name__ == '__main__':
     view_matrix = camera.get_view_matrix()
     projection_matrix = camera.get_projection_matrix()
 
-    debug_print("View Matrix:\n" + str(view_matrix))
-    debug_print("\nProjection Matrix:\n" + str(projection_matrix))
+    print("View Matrix:\n" + str(view_matrix))
+    print("\nProjection Matrix:\n" + str(projection_matrix))
@@ -1,5 +1,5 @@
-import math
 import numpy as np
+from functools import lru_cache
 
 class GeoTransformer:
     """
@@ -24,21 +24,25 @@ class GeoTransformer:
         Convert geographic coordinates (longitude, latitude) into 3D Cartesian coordinates.
 
         Args:
-            lon (float): Longitude in degrees.
-            lat (float): Latitude in degrees.
+            lon (float or np.array): Longitude in degrees, scalar or array of any shape.
+            lat (float or np.array): Latitude in degrees, broadcastable against lon.
 
         Returns:
-            tuple: A tuple of three floats representing the x, y, and z coordinates in 3D space.
+            tuple: The x, y, and z coordinates in 3D space, floats for scalar input
+                   and arrays of the broadcast shape otherwise.
         """
         # Convert degrees to radians
-        lon_rad = math.radians(lon)
-        lat_rad = math.radians(lat)
+        lon_rad = np.radians(lon)
+        lat_rad = np.radians(lat)
 
         # Calculate 3D Cartesian coordinates
-        x = self.earth_radius * math.cos(lat_rad) * math.cos(lon_rad)
-        y = self.earth_radius * math.cos(lat_rad) * math.sin(lon_rad)
-        z = self.earth_radius * math.sin(lat_rad)
+        cos_lat = np.cos(lat_rad)
+        x = self.earth_radius * cos_lat * np.cos(lon_rad)
+        y = self.earth_radius * cos_lat * np.sin(lon_rad)
+        z = self.earth_radius * np.sin(lat_rad)
 
+        if np.ndim(x) == 0:
+            return float(x), float(y), float(z)
         return x, y, z
 
     def mapper(self, x, old_min, old_max, new_min, new_max):
@@ -46,14 +50,14 @@ class GeoTransformer:
         Map a value from one range to another, useful in adjusting projection coordinates.
 
         Args:
-            x (float): The value to be mapped.
+            x (float or np.array): The value(s) to be mapped.
             old_min (float): The minimum value of the original range.
             old_max (float): The maximum value of the original range.
             new_min (float): The minimum value of the new range.
             new_max (float): The maximum value of the new range.
 
         Returns:
-            float: The mapped value.
+            float or np.array: The mapped value(s).
         """
         # Calculate the ratio of the position of the value in the original range
         ratio = (x - old_min) / (old_max - old_min)
@@ -66,9 +70,9 @@ class GeoTransformer:
         Transform 3D Cartesian coordinates based on projection settings.
 
         Args:
-            x (float): The x coordinate of the point.
-            y (float): The y coordinate of the point.
-            z (float): The z coordinate of the point.
+            x (float or np.array): The x coordinate(s) of the point(s).
+            y (float or np.array): The y coordinate(s) of the point(s).
+            z (float or np.array): The z coordinate(s) of the point(s).
             light_to_sphere (float): Distance from the light source to the sphere.
             light_to_image (float): Distance from the light source to the image plane.
 
@@ -87,21 +91,25 @@ class GeoTransformer:
         return i, j, z
 
 # Helper functions outside the class, for convenience and backward compatibility
+@lru_cache(maxsize=None)
+def _get_transformer(earth_radius=6371.0):
+    # The wrappers share one transformer per radius instead of building one per call
+    return GeoTransformer(earth_radius)
+
 def lon_lat_to_xyz(lon, lat, earth_radius=6371.0):
     """
     Convert geographic coordinates (longitude, latitude) into 3D Cartesian coordinates.
     This is a convenience wrapper around the GeoTransformer class.
 
     Args:
-        lon (float): Longitude in degrees.
-        lat (float): Latitude in degrees.
+        lon (float or np.array): Longitude in degrees.
+        lat (float or np.array): Latitude in degrees.
         earth_radius (float): Radius of the Earth in kilometers.
 
     Returns:
-        tuple: A tuple of three floats representing the x, y, and z coordinates in 3D space.
+        tuple: The x, y, and z coordinates in 3D space, as floats or arrays like the input.
     """
-    transformer = GeoTransformer(earth_radius)
-    return transformer.lon_lat_to_xyz(lon, lat)
+    return _get_transformer(earth_radius).lon_lat_to_xyz(lon, lat)
 
 def mapper(x, old_min, old_max, new_min, new_max):
     """
@@ -109,17 +117,16 @@ def mapper(x, old_min, old_max, new_min, new_max):
     This is a convenience wrapper around the GeoTransformer class.
 
     Args:
-        x (float): The value to be mapped.
+        x (float or np.array): The value(s) to be mapped.
         old_min (float): The minimum value of the original range.
         old_max (float): The maximum value of the original range.
         new_min (float): The minimum value of the new range.
         new_max (float): The maximum value of the new range.
 
     Returns:
-        float: The mapped value.
+        float or np.array: The mapped value(s).
     """
-    transformer = GeoTransformer()
-    return transformer.mapper(x, old_min, old_max, new_min, new_max)
+    return _get_transformer().mapper(x, old_min, old_max, new_min, new_max)
 
 if __name__ == '__main__':
     print("geo transforms has been run")
\ No newline at end of file
@@ -3,13 +3,184 @@ from OpenGL.GL import shaders
 import glfw
 from PIL import Image
 import numpy as np
+import ctypes
+import logging
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from utils.tracing import configure, get_logger
+except ImportError:
+    # Run as a script from inside utils/
+    from tracing import configure, get_logger
+
+# Levels come from EARTH_LOG_LEVEL, e.g. EARTH_LOG_LEVEL=opengl_helpers=DEBUG
+logger = get_logger(__name__)
+
+# Textures of at least this many bytes are streamed through a pixel buffer object
+PBO_THRESHOLD = 16 * 1024 * 1024
+
+# (internal format, pixel format) per PIL mode; other modes are converted to RGB or RGBA first
+_TEXTURE_FORMATS = {
+    "L": (gl.GL_R8, gl.GL_RED),
+    "LA": (gl.GL_RG8, gl.GL_RG),
+    "RGB": (gl.GL_RGB8, gl.GL_RGB),
+    "RGBA": (gl.GL_RGBA8, gl.GL_RGBA),
+}
+
+# Gray and gray-alpha textures are stored in R and RG, spread to (v, v, v, a) when sampled
+_TEXTURE_SWIZZLES = {
+    gl.GL_RED: (gl.GL_RED, gl.GL_RED, gl.GL_RED, gl.GL_ONE),
+    gl.GL_RG: (gl.GL_RED, gl.GL_RED, gl.GL_RED, gl.GL_GREEN),
+}
+
+def decode_image(image_path):
+    """
+    Decodes an image file into an array ready for texture upload, without touching OpenGL.
+
+    Safe to call from any thread, e.g. to decode the next texture while rendering.
+
+    Args:
+        image_path (str): The file path to the image.
+
+    Returns:
+        tuple: (height, width, channels) uint8 pixels, internal format and pixel format.
+    """
+    with Image.open(image_path) as img:
+        if img.mode not in _TEXTURE_FORMATS:
+            has_alpha = img.mode in ("PA", "La", "RGBa") or "transparency" in img.info
+            img = img.convert("RGBA" if has_alpha else "RGB")
+        mode = img.mode
+        # One bulk conversion of the decoded buffer, not one Python tuple per pixel
+        pixels = np.asarray(img)
+
+    pixels = np.ascontiguousarray(pixels.reshape(pixels.shape[0], pixels.shape[1], -1), dtype=np.uint8)
+    return (pixels, *_TEXTURE_FORMATS[mode])
+
+def _unpack_alignment(row_bytes):
+    # Largest alignment the rows satisfy, e.g. 1 for odd-width RGB images
+    for alignment in (8, 4, 2):
+        if row_bytes % alignment == 0:
+            return alignment
+    return 1
+
+# Uploads a value to a uniform location, one setter per uniform type
+_UNIFORM_SETTERS = {
+    '1f': lambda location, value: gl.glUniform1f(location, value),
+    '3f': lambda location, value: gl.glUniform3f(location, *value),
+    '4f': lambda location, value: gl.glUniform4f(location, *value),
+    '1i': lambda location, value: gl.glUniform1i(location, value),
+    'mat4': lambda location, value: gl.glUniformMatrix4fv(location, 1, gl.GL_TRUE, value),
+}
+
+class UniformRegistry:
+    """
+    Uniform locations of one shader program, looked up once, and the values last uploaded to them.
+
+    Uniform values are program state that survives glUseProgram, so a value equal to the
+    last one uploaded does not need to be sent again.
+
+    Attributes:
+        program (GLuint): The shader program ID.
+        locations (dict): Uniform name to location.
+        values (dict): Uniform name to the last uploaded value.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.locations = {}
+        self.values = {}
+
+        # Introspect the active uniforms once instead of looking names up every frame
+        for index in range(gl.glGetProgramiv(program, gl.GL_ACTIVE_UNIFORMS)):
+            name, _, _ = gl.glGetActiveUniform(program, index)
+            name = name.decode() if isinstance(name, bytes) else name
+            # Arrays are reported as name[0], they are addressed by their bare name as well
+            if name.endswith('[0]'):
+                name = name[:-3]
+            self.locations[name] = gl.glGetUniformLocation(program, name)
+
+    def location(self, name):
+        """
+        Returns the location of a uniform, querying OpenGL only for names not seen before.
+
+        Args:
+            name (str): The name of the uniform.
 
-# Set DEBUG_MODE to True to enable debugging prints
-DEBUG_MODE = True
+        Returns:
+            int: The uniform location, -1 if the program has no such active uniform.
+        """
+        location = self.locations.get(name)
+        if location is None:
+            location = gl.glGetUniformLocation(self.program, name)
+            self.locations[name] = location
+        return location
+
+    def set(self, name, value, uniform_type='1f'):
+        """
+        Uploads a uniform value unless it equals the value uploaded last time.
+
+        Args:
+            name (str): The name of the uniform.
+            value (Union[float, tuple, np.array]): The value to set the uniform to.
+            uniform_type (str): The type of the uniform ('1f', '3f', '4f', '1i' or 'mat4').
 
-def debug_print(message):
-    if DEBUG_MODE:
-        print(message)
+        Returns:
+            bool: Whether the value was uploaded.
+        """
+        location = self.location(name)
+        if location == -1:
+            raise ValueError(f"Uniform '{name}' not found in shader program.")
+
+        last = self.values.get(name)
+        if last is not None and np.array_equal(last, value):
+            return False
+
+        _UNIFORM_SETTERS[uniform_type](location, value)
+        self.values[name] = np.array(value, copy=True)
+        return True
+
+class TexturePrefetcher:
+    """
+    Decodes upcoming textures on a background thread while the current frame renders.
+
+    Only decoding happens off the render thread, the upload itself stays on the thread
+    that owns the OpenGL context.
+    """
+
+    def __init__(self, workers=1):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.pending = {}
+
+    def prefetch(self, image_path):
+        """
+        Starts decoding an image unless it is already queued.
+
+        Args:
+            image_path (str): The file path to the image.
+        """
+        if image_path not in self.pending:
+            self.pending[image_path] = self.executor.submit(decode_image, image_path)
+
+    def load(self, image_path, use_pbo=None):
+        """
+        Uploads an image, waiting for its prefetch or decoding it right away if it was not prefetched.
+
+        Args:
+            image_path (str): The file path to the image.
+            use_pbo (bool): Upload through a pixel buffer object, by default for large images.
+
+        Returns:
+            GLuint: The texture object ID.
+        """
+        future = self.pending.pop(image_path, None)
+        decoded = future.result() if future is not None else decode_image(image_path)
+        return OpenGLHelpers.upload_texture(*decoded, use_pbo=use_pbo)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pending.clear()
+
+# One registry per linked program
+_uniform_registries = {}
 
 class OpenGLHelpers:
     """
@@ -22,20 +193,20 @@ class OpenGLHelpers:
         """
         Initialize the OpenGL context and set up necessary configurations.
         """
-        debug_print("Initializing OpenGL context...")
+        logger.debug("Initializing OpenGL context...")
         # Enable depth testing for proper depth calculations
         gl.glEnable(gl.GL_DEPTH_TEST)
-        debug_print("Depth testing enabled.")
+        logger.debug("Depth testing enabled.")
 
         # Enable blending for transparency
         gl.glEnable(gl.GL_BLEND)
         gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
-        debug_print("Blending enabled.")
+        logger.debug("Blending enabled.")
 
         # Enable face culling to improve performance
         gl.glEnable(gl.GL_CULL_FACE)
         gl.glCullFace(gl.GL_BACK)
-        debug_print("Face culling enabled.")
+        logger.debug("Face culling enabled.")
 
     @staticmethod
     def compile_shader(source, shader_type):
@@ -59,7 +230,7 @@ class OpenGLHelpers:
             gl.glDeleteShader(shader)
             raise RuntimeError(f"Shader compilation failed: {error}")
         
-        debug_print(f"Shader compiled successfully: {shader}")
+        logger.debug("Shader compiled successfully: %s", shader)
         return shader
 
     @staticmethod
@@ -72,7 +243,7 @@ class OpenGLHelpers:
         Returns:
             GLuint: The linked shader program.
         """
-        debug_print("Linking shader program...")
+        logger.debug("Linking shader program...")
         vertex_shader = OpenGLHelpers.compile_shader(vertex_source, gl.GL_VERTEX_SHADER)
         fragment_shader = OpenGLHelpers.compile_shader(fragment_source, gl.GL_FRAGMENT_SHADER)
         program = gl.glCreateProgram()
@@ -89,90 +260,196 @@ class OpenGLHelpers:
         gl.glDeleteShader(vertex_shader)
         gl.glDeleteShader(fragment_shader)
 
-        debug_print(f"Shader program linked successfully: {program}")
+        # A new program may reuse the ID of a deleted one, so always start a fresh registry
+        _uniform_registries[program] = UniformRegistry(program)
+
+        logger.debug("Shader program linked successfully: %s", program)
         return program
 
     @staticmethod
-    def load_texture(image_path):
+    def uniform_registry(shader_program):
+        """
+        Returns the uniform registry of a shader program, creating it for programs linked elsewhere.
+
+        Args:
+            shader_program (GLuint): The shader program ID.
+
+        Returns:
+            UniformRegistry: Cached uniform locations and values of the program.
+        """
+        registry = _uniform_registries.get(shader_program)
+        if registry is None:
+            registry = _uniform_registries[shader_program] = UniformRegistry(shader_program)
+        return registry
+
+    @staticmethod
+    def load_texture(image_path, use_pbo=None):
         """
         Load a texture from an image file.
 
         Args:
             image_path (str): The file path to the image to load as a texture.
+            use_pbo (bool): Upload through a pixel buffer object, by default for images above PBO_THRESHOLD.
 
         Returns:
             GLuint: The texture object ID.
         """
-        debug_print(f"Loading texture from {image_path}...")
-        # Load image with Pillow
-        img = Image.open(image_path)
-        img_data = np.array(list(img.getdata()), np.uint8)
+        logger.debug("Loading texture from %s...", image_path)
+        return OpenGLHelpers.upload_texture(*decode_image(image_path), use_pbo=use_pbo)
+
+    @staticmethod
+    def set_texture_swizzle(pixel_format):
+        """
+        Makes the bound 1- or 2-channel texture sample as gray instead of red, other formats are left alone.
+
+        Args:
+            pixel_format (GLenum): Layout of the uploaded pixels, e.g. GL_RED.
+        """
+        swizzle = _TEXTURE_SWIZZLES.get(pixel_format)
+        if swizzle is not None:
+            gl.glTexParameteriv(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_SWIZZLE_RGBA, swizzle)
+
+    @staticmethod
+    def upload_texture(pixels, internal_format, pixel_format, use_pbo=None):
+        """
+        Create a texture from decoded pixels, e.g. the result of decode_image.
+
+        Args:
+            pixels (np.array): (height, width, channels) uint8 pixels.
+            internal_format (GLenum): Storage format of the texture, e.g. GL_RGBA8.
+            pixel_format (GLenum): Layout of the pixels, e.g. GL_RGBA.
+            use_pbo (bool): Upload through a pixel buffer object, by default for images above PBO_THRESHOLD.
+
+        Returns:
+            GLuint: The texture object ID.
+        """
+        height, width = pixels.shape[:2]
+        if use_pbo is None:
+            use_pbo = pixels.nbytes >= PBO_THRESHOLD
 
         texture_id = gl.glGenTextures(1)
         gl.glBindTexture(gl.GL_TEXTURE_2D, texture_id)
-        gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGB, img.width, img.height, 0,
-                        gl.GL_RGB, gl.GL_UNSIGNED_BYTE, img_data)
+
+        if use_pbo:
+            # Rows of odd-width RGB or single-channel images are not 4-byte aligned
+            gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, _unpack_alignment(pixels.strides[0]))
+            # Copy into driver-owned memory so the transfer to the GPU can run asynchronously
+            pixel_buffer = gl.glGenBuffers(1)
+            gl.glBindBuffer(gl.GL_PIXEL_UNPACK_BUFFER, pixel_buffer)
+            gl.glBufferData(gl.GL_PIXEL_UNPACK_BUFFER, pixels.nbytes, None, gl.GL_STREAM_DRAW)
+            address = gl.glMapBufferRange(gl.GL_PIXEL_UNPACK_BUFFER, 0, pixels.nbytes,
+                                          gl.GL_MAP_WRITE_BIT | gl.GL_MAP_INVALIDATE_BUFFER_BIT)
+            ctypes.memmove(address, pixels.ctypes.data, pixels.nbytes)
+            gl.glUnmapBuffer(gl.GL_PIXEL_UNPACK_BUFFER)
+            gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, internal_format, width, height, 0,
+                            pixel_format, gl.GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+            gl.glBindBuffer(gl.GL_PIXEL_UNPACK_BUFFER, 0)
+            gl.glDeleteBuffers(1, [pixel_buffer])
+        else:
+            OpenGLHelpers.upload_texture_level(0, pixels, internal_format, pixel_format)
 
         # Set texture parameters
         gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_REPEAT)
         gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_REPEAT)
         gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
         gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+        OpenGLHelpers.set_texture_swizzle(pixel_format)
 
         gl.glGenerateMipmap(gl.GL_TEXTURE_2D)
         gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
 
-        debug_print(f"Texture loaded and created with ID: {texture_id}")
+        logger.debug("Texture loaded and created with ID: %s", texture_id)
         return texture_id
 
     @staticmethod
-    def create_buffer(data, buffer_type=gl.GL_ARRAY_BUFFER):
+    def upload_texture_level(level, pixels, internal_format, pixel_format):
+        """
+        Upload one mip level of the texture bound to GL_TEXTURE_2D.
+
+        Args:
+            level (int): Mip level, 0 is the full resolution.
+            pixels (np.array): (height, width, channels) uint8 pixels.
+            internal_format (GLenum): Storage format of the texture, e.g. GL_RGBA8.
+            pixel_format (GLenum): Layout of the pixels, e.g. GL_RGBA.
+        """
+        height, width = pixels.shape[:2]
+        # Rows of odd-width RGB or single-channel images are not 4-byte aligned
+        gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, _unpack_alignment(pixels.strides[0]))
+        gl.glTexImage2D(gl.GL_TEXTURE_2D, level, internal_format, width, height, 0,
+                        pixel_format, gl.GL_UNSIGNED_BYTE, pixels)
+
+    @staticmethod
+    def create_buffer(data, buffer_type=gl.GL_ARRAY_BUFFER, usage=gl.GL_STATIC_DRAW, capacity=None):
         """
         Create a Buffer Object (VBO or EBO) and load data into it.
 
         Args:
             data (list or np.array): The vertex data or index data to load into the buffer.
             buffer_type (GLenum): The type of buffer (GL_ARRAY_BUFFER or GL_ELEMENT_ARRAY_BUFFER).
+            usage (GLenum): How the data is used, GL_DYNAMIC_DRAW or GL_STREAM_DRAW for data updated later.
+            capacity (int): Size to allocate in bytes, so update_buffer can later write up to that much.
 
         Returns:
             GLuint: The buffer object ID.
         """
-        debug_print("Creating buffer...")
+        logger.debug("Creating buffer...")
         data = np.array(data, dtype=np.float32 if buffer_type == gl.GL_ARRAY_BUFFER else np.uint32)
         buffer_id = gl.glGenBuffers(1)
         gl.glBindBuffer(buffer_type, buffer_id)
-        gl.glBufferData(buffer_type, data.nbytes, data, gl.GL_STATIC_DRAW)
-        debug_print(f"Buffer created with ID: {buffer_id}")
+        if capacity is None:
+            gl.glBufferData(buffer_type, data.nbytes, data, usage)
+        else:
+            if data.nbytes > capacity:
+                raise ValueError(f"{data.nbytes} bytes of data do not fit a buffer of {capacity} bytes")
+            gl.glBufferData(buffer_type, capacity, None, usage)
+            if data.nbytes:
+                gl.glBufferSubData(buffer_type, 0, data.nbytes, data)
+        logger.debug("Buffer created with ID: %s", buffer_id)
 
         return buffer_id
 
+    @staticmethod
+    def update_buffer(buffer_id, data, capacity, buffer_type=gl.GL_ARRAY_BUFFER, usage=gl.GL_DYNAMIC_DRAW,
+                      orphan=True):
+        """
+        Overwrite the start of a buffer created with a fixed capacity, keeping the buffer object.
+
+        Args:
+            buffer_id (GLuint): The buffer object ID.
+            data (list or np.array): The vertex data or index data to write.
+            capacity (int): Size the buffer was allocated with in bytes.
+            buffer_type (GLenum): The type of buffer (GL_ARRAY_BUFFER or GL_ELEMENT_ARRAY_BUFFER).
+            usage (GLenum): The usage the buffer was created with.
+            orphan (bool): Detach the old storage first, so the write never waits for draws still reading it.
+        """
+        data = np.asarray(data, dtype=np.float32 if buffer_type == gl.GL_ARRAY_BUFFER else np.uint32)
+        if data.nbytes > capacity:
+            raise ValueError(f"{data.nbytes} bytes of data do not fit a buffer of {capacity} bytes")
+        gl.glBindBuffer(buffer_type, buffer_id)
+        if orphan:
+            # Same size and no data: the driver hands out fresh storage and frees the old one once unused
+            gl.glBufferData(buffer_type, capacity, None, usage)
+        if data.nbytes:
+            gl.glBufferSubData(buffer_type, 0, data.nbytes, data)
+        gl.glBindBuffer(buffer_type, 0)
+
     @staticmethod
     def set_uniform(shader_program, name, value, uniform_type='1f'):
         """
         Set a uniform value in the shader program.
 
+        Locations come from the program's uniform registry and values equal to the last
+        upload are skipped, so calling this every frame costs no driver round-trips.
+
         Args:
             shader_program (GLuint): The shader program ID.
             name (str): The name of the uniform.
             value (Union[float, tuple]): The value to set the uniform to.
             uniform_type (str): The type of the uniform ('1f', '3f', 'mat4', etc.).
         """
-        location = gl.glGetUniformLocation(shader_program, name)
-        if location == -1:
-            raise ValueError(f"Uniform '{name}' not found in shader program.")
-
-        debug_print(f"Setting uniform '{name}' to {value} on program {shader_program}")
-        
-        if uniform_type == '1f':
-            gl.glUniform1f(location, value)
-        elif uniform_type == '3f':
-            gl.glUniform3f(location, *value)
-        elif uniform_type == '4f':
-            gl.glUniform4f(location, *value)
-        elif uniform_type == '1i':
-            gl.glUniform1i(location, value)
-        elif uniform_type == 'mat4':
-            gl.glUniformMatrix4fv(location, 1, gl.GL_TRUE, value)
+        uploaded = OpenGLHelpers.uniform_registry(shader_program).set(name, value, uniform_type)
+        if uploaded and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Setting uniform '%s' to %s on program %s", name, value, shader_program)
 
     @staticmethod
     def setup_vertex_array(buffer_id, attribute_index, size, attribute_type=gl.GL_FLOAT, normalized=gl.GL_FALSE, stride=0, offset=None):
@@ -188,11 +465,50 @@ class OpenGLHelpers:
             stride (int): The byte offset between consecutive vertex attributes.
             offset (ctypes.c_void_p): Offset of the first component in the array in the buffer.
         """
-        debug_print(f"Setting up vertex array for buffer {buffer_id} at attribute {attribute_index}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Setting up vertex array for buffer %s at attribute %s", buffer_id, attribute_index)
         gl.glBindBuffer(gl.GL_ARRAY_BUFFER, buffer_id)
         gl.glVertexAttribPointer(attribute_index, size, attribute_type, normalized, stride, offset)
         gl.glEnableVertexAttribArray(attribute_index)
 
+    @staticmethod
+    def create_vertex_array(vertex_buffer, index_buffer=None, attribute_index=0, size=3,
+                            attribute_type=gl.GL_FLOAT, normalized=gl.GL_FALSE, stride=0, offset=None):
+        """
+        Create a Vertex Array Object recording the attribute layout and index buffer of a mesh.
+
+        Binding the returned VAO restores all of that state in one call, and core-profile
+        contexts cannot draw without one.
+
+        Args:
+            vertex_buffer (GLuint): The vertex buffer ID.
+            index_buffer (GLuint): The index buffer ID, optional.
+            attribute_index (int): The attribute location in the shader.
+            size (int): The number of components per attribute.
+            attribute_type (GLenum): The data type of each component in the array.
+            normalized (GLboolean): Whether fixed-point data values should be normalized.
+            stride (int): The byte offset between consecutive vertex attributes.
+            offset (ctypes.c_void_p): Offset of the first component in the array in the buffer.
+
+        Returns:
+            GLuint: The vertex array object ID.
+        """
+        vertex_array = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(vertex_array)
+        OpenGLHelpers.setup_vertex_array(vertex_buffer, attribute_index, size, attribute_type, normalized, stride, offset)
+        if index_buffer is not None:
+            # The element buffer binding is part of the VAO state
+            gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+
+        # Unbind the VAO first, so unbinding the buffers does not change it
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        if index_buffer is not None:
+            gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, 0)
+
+        logger.debug("Vertex array created with ID: %s", vertex_array)
+        return vertex_array
+
     @staticmethod
     def check_errors():
         """
@@ -202,14 +518,15 @@ class OpenGLHelpers:
         if err != gl.GL_NO_ERROR:
             raise RuntimeError(f'OpenGL error: {err}')
         else:
-            debug_print("No OpenGL errors found.")
+            logger.debug("No OpenGL errors found.")
 
     @staticmethod
     def clear_screen():
         """
         Clear the color and depth buffers.
         """
-        debug_print("Clearing screen...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Clearing screen...")
         gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
 
     @staticmethod
@@ -223,25 +540,25 @@ class OpenGLHelpers:
             width (int): The width of the viewport.
             height (int): The height of the viewport.
         """
-        debug_print(f"Setting viewport to x:{x}, y:{y}, width:{width}, height:{height}")
+        logger.debug("Setting viewport to x:%s, y:%s, width:%s, height:%s", x, y, width, height)
         gl.glViewport(x, y, width, height)
 
 def main():
     # Initialize GLFW
     if not glfw.init():
         raise RuntimeError("Failed to initialize GLFW")
-    debug_print("GLFW initialized.")
+    logger.debug("GLFW initialized.")
 
     # Create a window and its OpenGL context
     window = glfw.create_window(800, 600, "OpenGL Window", None, None)
     if not window:
         glfw.terminate()
         raise RuntimeError("Failed to create GLFW window")
-    debug_print("GLFW window created.")
+    logger.debug("GLFW window created.")
 
     # Make the OpenGL context current
     glfw.make_context_current(window)
-    debug_print("OpenGL context made current.")
+    logger.debug("OpenGL context made current.")
 
     # Initialize OpenGL
     OpenGLHelpers.initialize_opengl()
@@ -312,4 +629,5 @@ def main():
     glfw.terminate()
 
 if __name__ == "__main__":
+    configure()
     main()
@@ -0,0 +1,290 @@
+import io
+import os
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import OpenGL.GL as gl
+import numpy as np
+from PIL import Image
+try:
+    from utils.opengl_helpers import OpenGLHelpers, decode_image
+    from utils.tracing import get_logger
+except ImportError:
+    from opengl_helpers import OpenGLHelpers, decode_image
+    from tracing import get_logger
+
+logger = get_logger(__name__)
+
+# Estimated GPU memory the cached textures may use before unreferenced ones are evicted
+DEFAULT_BUDGET = 512 * 1024 * 1024
+# Bytes of mip levels uploaded per stream() call, about one 2048x2048 RGBA level per frame
+DEFAULT_STREAM_BYTES = 16 * 1024 * 1024
+
+def build_mip_chain(pixels):
+    """
+    Downsamples pixels into a full mip chain with a box filter.
+
+    Args:
+        pixels (np.array): (height, width, channels) uint8 pixels.
+
+    Returns:
+        list: (height, width, channels) uint8 arrays from level 0 down to 1x1.
+    """
+    levels = [pixels]
+    while levels[-1].shape[0] > 1 or levels[-1].shape[1] > 1:
+        previous = levels[-1]
+        height, width, channels = previous.shape
+        # PIL has no mode for (h, w, 1) arrays, only for plain 2D ones
+        image = Image.fromarray(previous[:, :, 0] if channels == 1 else previous)
+        image = image.resize((max(width // 2, 1), max(height // 2, 1)), Image.BOX)
+        levels.append(np.asarray(image).reshape(image.height, image.width, channels))
+    return levels
+
+def _decode(image_path, progressive):
+    # Runs on the decode thread: hash and decode the same bytes, build the mips the upload will stream
+    with open(image_path, "rb") as f:
+        data = f.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+    pixels, internal_format, pixel_format = decode_image(io.BytesIO(data))
+    levels = build_mip_chain(pixels) if progressive else [pixels]
+    return content_hash, levels, internal_format, pixel_format
+
+class ManagedTexture:
+    """
+    A texture owned by a TextureManager.
+
+    Attributes:
+        texture_id (GLuint): OpenGL texture ID.
+        content_hash (str): SHA-256 of the image file.
+        references (int): Number of holders that acquired and did not release it yet.
+        size_bytes (int): Estimated GPU memory of the levels uploaded so far.
+        pending (list): Mip levels still to upload, coarsest first; empty once complete.
+        base_level (int): Finest mip level uploaded so far.
+    """
+
+    def __init__(self, texture_id, content_hash, size_bytes, pending=None, base_level=0):
+        self.texture_id = texture_id
+        self.content_hash = content_hash
+        self.references = 0
+        self.size_bytes = size_bytes
+        self.pending = pending or []
+        self.base_level = base_level
+        self.formats = None
+
+class TextureManager:
+    """
+    Shares textures between elements and keeps their estimated GPU memory within a budget.
+
+    Textures are deduplicated by path and by content, so two elements using the same image,
+    or two copies of one image, get the same texture. Released textures stay cached until the
+    budget is exceeded, then the least recently used unreferenced ones are deleted.
+
+    With progressive loading only the smallest mip levels are uploaded on acquire and the
+    finer ones follow in stream(), a few per frame, so switching layers never stalls rendering.
+
+    Attributes:
+        budget_bytes (int): Estimated GPU memory allowed for cached textures.
+        textures (OrderedDict): ManagedTexture per content hash, least recently used first.
+        used_bytes (int): Estimated GPU memory of all cached textures.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET, workers=1):
+        """
+        Args:
+            budget_bytes (int): Estimated GPU memory allowed for cached textures.
+            workers (int): Number of threads decoding prefetched images.
+        """
+        self.budget_bytes = budget_bytes
+        self.textures = OrderedDict()
+        self.used_bytes = 0
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.pending = {}
+        # Path to (modification time, file size, content hash), so known files are not hashed again
+        self.paths = {}
+        self.by_id = {}
+
+    def prefetch(self, image_path, progressive=False):
+        """
+        Starts reading and decoding an image on the decode thread, e.g. for the next layer.
+
+        Args:
+            image_path (str): The file path to the image.
+            progressive (bool): Also build the mip levels for progressive loading.
+        """
+        if self._cached(image_path) is None and image_path not in self.pending:
+            self.pending[image_path] = self.executor.submit(_decode, image_path, progressive)
+
+    def acquire(self, image_path, progressive=False):
+        """
+        Returns the texture of an image, uploading it unless it is cached, and takes a reference.
+
+        Must be called on the thread that owns the OpenGL context.
+
+        Args:
+            image_path (str): The file path to the image.
+            progressive (bool): Upload the smallest mip levels now and stream the rest.
+
+        Returns:
+            GLuint: The texture object ID.
+        """
+        texture = self._cached(image_path)
+        if texture is None:
+            future = self.pending.pop(image_path, None)
+            content_hash, levels, *formats = (future.result() if future is not None
+                                              else _decode(image_path, progressive))
+            stat = os.stat(image_path)
+            self.paths[image_path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+            texture = self.textures.get(content_hash)
+            if texture is None:
+                texture = self._upload(content_hash, levels, *formats)
+            else:
+                logger.debug("%s has the same content as texture %s", image_path, texture.texture_id)
+
+        texture.references += 1
+        self.textures.move_to_end(texture.content_hash)
+        self._evict()
+        return texture.texture_id
+
+    def release(self, texture_id):
+        """
+        Drops a reference taken by acquire; the texture stays cached until it is evicted.
+
+        Args:
+            texture_id (GLuint): The texture object ID.
+        """
+        texture = self.by_id.get(texture_id)
+        # An evicted texture had no references left either
+        if texture is None or texture.references <= 0:
+            raise ValueError(f"Texture {texture_id} released more often than acquired")
+        texture.references -= 1
+        self._evict()
+
+    def touch(self, texture_id):
+        """
+        Marks a texture as recently used, e.g. when it is drawn.
+
+        Args:
+            texture_id (GLuint): The texture object ID.
+        """
+        texture = self.by_id.get(texture_id)
+        if texture is not None:
+            self.textures.move_to_end(texture.content_hash)
+
+    def stream(self, max_bytes=DEFAULT_STREAM_BYTES):
+        """
+        Uploads pending mip levels of progressive textures, coarse to fine, most recently used first.
+
+        Call once per frame on the thread that owns the OpenGL context. At least one level is
+        uploaded per call, even if it alone exceeds max_bytes.
+
+        Args:
+            max_bytes (int): Bytes of pixel data to upload in this call.
+
+        Returns:
+            bool: Whether levels are still pending after this call.
+        """
+        uploaded = 0
+        for texture in reversed(list(self.textures.values())):
+            while texture.pending and (uploaded == 0 or uploaded + texture.pending[0].nbytes <= max_bytes):
+                pixels = texture.pending.pop(0)
+                texture.base_level -= 1
+                gl.glBindTexture(gl.GL_TEXTURE_2D, texture.texture_id)
+                OpenGLHelpers.upload_texture_level(texture.base_level, pixels, *texture.formats)
+                # Sampling starts at the base level, so the finer level shows up right away
+                gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_BASE_LEVEL, texture.base_level)
+                gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+                texture.size_bytes += pixels.nbytes
+                self.used_bytes += pixels.nbytes
+                uploaded += pixels.nbytes
+            if texture.pending:
+                break
+        if uploaded:
+            self._evict()
+        return any(texture.pending for texture in self.textures.values())
+
+    def clear(self):
+        """
+        Deletes every cached texture and drops the images still being decoded.
+        """
+        for texture in self.textures.values():
+            gl.glDeleteTextures(1, [texture.texture_id])
+        self.textures.clear()
+        self.by_id.clear()
+        self.paths.clear()
+        self.used_bytes = 0
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+    def _cached(self, image_path):
+        # Same path and unchanged file, no need to read or hash it again
+        known = self.paths.get(image_path)
+        if known is None:
+            return None
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        if (stat.st_mtime_ns, stat.st_size) != known[:2]:
+            return None
+        return self.textures.get(known[2])
+
+    def _upload(self, content_hash, levels, internal_format, pixel_format):
+        if len(levels) == 1:
+            # Same as OpenGLHelpers.load_texture, glGenerateMipmap adds about a third
+            texture_id = OpenGLHelpers.upload_texture(levels[0], internal_format, pixel_format)
+            texture = ManagedTexture(texture_id, content_hash, levels[0].nbytes * 4 // 3)
+        else:
+            # Upload the two coarsest levels now, the finer ones are streamed
+            texture_id = gl.glGenTextures(1)
+            coarsest = len(levels) - 1
+            gl.glBindTexture(gl.GL_TEXTURE_2D, texture_id)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_REPEAT)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_REPEAT)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAX_LEVEL, coarsest)
+            OpenGLHelpers.set_texture_swizzle(pixel_format)
+            for level in (coarsest, coarsest - 1):
+                OpenGLHelpers.upload_texture_level(level, levels[level], internal_format, pixel_format)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_BASE_LEVEL, coarsest - 1)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+            texture = ManagedTexture(texture_id, content_hash, levels[-1].nbytes + levels[-2].nbytes,
+                                     pending=levels[-3::-1], base_level=coarsest - 1)
+        texture.formats = (internal_format, pixel_format)
+
+        self.textures[content_hash] = texture
+        self.by_id[texture_id] = texture
+        self.used_bytes += texture.size_bytes
+        logger.debug("Texture %s uploaded, %d bytes of %d in use", texture_id, self.used_bytes, self.budget_bytes)
+        return texture
+
+    def _evict(self):
+        # Least recently used first, textures still referenced are never deleted
+        for content_hash, texture in list(self.textures.items()):
+            if self.used_bytes <= self.budget_bytes:
+                return
+            if texture.references == 0:
+                gl.glDeleteTextures(1, [texture.texture_id])
+                del self.textures[content_hash]
+                del self.by_id[texture.texture_id]
+                self.used_bytes -= texture.size_bytes
+                logger.debug("Evicted texture %s, %d bytes in use", texture.texture_id, self.used_bytes)
+        if self.used_bytes > self.budget_bytes:
+            logger.warning("Referenced textures use %d bytes, over the budget of %d", self.used_bytes,
+                           self.budget_bytes)
+
+# Shared by every element that does not bring its own manager
+_default_manager = None
+
+def get_texture_manager():
+    """
+    Returns the texture manager shared by all elements, created on first use.
+
+    Returns:
+        TextureManager: The shared manager.
+    """
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = TextureManager()
+    return _default_manager
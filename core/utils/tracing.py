@@ -0,0 +1,171 @@
+import os
+import sys
+import logging
+from collections import deque
+
+# Parent of every logger handed out by get_logger
+ROOT_LOGGER = "earth"
+
+# Comma separated levels, a bare level applies to everything and name=level to one module,
+# e.g. EARTH_LOG_LEVEL=INFO,opengl_helpers=DEBUG
+LOG_LEVEL_ENV = "EARTH_LOG_LEVEL"
+# Keeps the last N debug records in memory for dump_trace(), e.g. EARTH_TRACE=5000
+TRACE_ENV = "EARTH_TRACE"
+
+DEFAULT_LEVEL = logging.WARNING
+DEFAULT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_trace_buffer = None
+# Levels enable_trace changed, put back by disable_trace
+_saved_levels = []
+# Module loggers configure gave their own level, reset by the next call
+_module_loggers = set()
+
+class TraceBuffer(logging.Handler):
+    """
+    Ring buffer of log records that are only formatted when dumped.
+
+    Keeping the raw records makes tracing cheap on the hot path: the message
+    arguments are stored as they are and turned into text on demand.
+
+    Attributes:
+        records (deque): The most recent records, oldest first.
+    """
+
+    def __init__(self, capacity=10000, level=logging.DEBUG):
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(DEFAULT_FORMAT))
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def dump(self, stream=None):
+        """
+        Writes the buffered records and empties the buffer.
+
+        Args:
+            stream (file): Where to write, defaults to stderr.
+        """
+        stream = stream or sys.stderr
+        while self.records:
+            stream.write(self.format(self.records.popleft()) + "\n")
+        stream.flush()
+
+def parse_levels(spec):
+    """
+    Parses a level specification like "INFO,opengl_helpers=DEBUG".
+
+    Args:
+        spec (str): Comma separated bare level and name=level entries.
+
+    Returns:
+        tuple: The base level (None if not given) and a dict of module name to level.
+    """
+    base, modules = None, {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = entry.rpartition("=")
+        level = logging.getLevelName(level.strip().upper())
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level in {LOG_LEVEL_ENV}: {entry}")
+        if name:
+            modules[name.strip()] = level
+        else:
+            base = level
+    return base, modules
+
+def configure(spec=None, trace_capacity=None):
+    """
+    Sets up the earth loggers, by default from the EARTH_LOG_LEVEL and EARTH_TRACE variables.
+
+    Called once by each entry point; importing a module never installs handlers. An active
+    trace and the module levels of an earlier call are replaced.
+
+    Args:
+        spec (str): Level specification, see parse_levels.
+        trace_capacity (int): Enables the trace ring buffer with this many records, optional.
+    """
+    disable_trace()
+    root = logging.getLogger(ROOT_LOGGER)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(DEFAULT_FORMAT))
+        root.addHandler(handler)
+        root.propagate = False
+
+    base, modules = parse_levels(spec if spec is not None else os.environ.get(LOG_LEVEL_ENV, ""))
+    root.setLevel(DEFAULT_LEVEL if base is None else base)
+    while _module_loggers:
+        _module_loggers.pop().setLevel(logging.NOTSET)
+    for name, level in modules.items():
+        logger = logging.getLogger(f"{ROOT_LOGGER}.{name}")
+        logger.setLevel(level)
+        _module_loggers.add(logger)
+
+    if trace_capacity is None and os.environ.get(TRACE_ENV):
+        trace_capacity = int(os.environ[TRACE_ENV])
+    if trace_capacity:
+        enable_trace(trace_capacity)
+
+def get_logger(name):
+    """
+    Returns the logger of a module; its output is set up by configure.
+
+    Args:
+        name (str): Module name, e.g. __name__; only the last component is kept.
+
+    Returns:
+        logging.Logger: The logger, a child of the earth logger.
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name.rpartition('.')[2]}")
+
+def enable_trace(capacity=10000):
+    """
+    Starts recording debug records into a ring buffer instead of streaming them.
+
+    The stream handler keeps its own level, so traced debug records are not printed.
+    disable_trace puts the levels back.
+
+    Args:
+        capacity (int): Number of most recent records kept.
+
+    Returns:
+        TraceBuffer: The buffer handler.
+    """
+    global _trace_buffer
+    root = logging.getLogger(ROOT_LOGGER)
+    disable_trace()
+
+    # The handlers filter what they show, the loggers have to let debug records through
+    for handler in root.handlers:
+        if handler.level == logging.NOTSET:
+            _saved_levels.append((handler, handler.level))
+            handler.setLevel(root.level)
+    _saved_levels.append((root, root.level))
+    root.setLevel(logging.DEBUG)
+
+    _trace_buffer = TraceBuffer(capacity)
+    root.addHandler(_trace_buffer)
+    return _trace_buffer
+
+def disable_trace():
+    """
+    Stops recording into the trace buffer and restores the levels, the recorded records are dropped.
+    """
+    global _trace_buffer
+    if _trace_buffer is not None:
+        logging.getLogger(ROOT_LOGGER).removeHandler(_trace_buffer)
+        _trace_buffer = None
+    while _saved_levels:
+        target, level = _saved_levels.pop()
+        target.setLevel(level)
+
+def dump_trace(stream=None):
+    """
+    Writes the traced records, e.g. after an error, and empties the buffer.
+
+    Args:
+        stream (file): Where to write, defaults to stderr.
+    """
+    if _trace_buffer is not None:
+        _trace_buffer.dump(stream)
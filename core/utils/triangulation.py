@@ -0,0 +1,232 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import shapely
+
+# Polygons are handed to the triangulation engine in chunks of this size
+CHUNK_SIZE = 256
+
+def _signed_area(points):
+    # Shoelace formula, positive for counter-clockwise rings
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * (np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+def _open_ring(coords, start, stop):
+    """
+    Returns the vertex indices of a ring without its closing point and repeated points.
+    """
+    ring = np.arange(start, stop)
+    if len(ring) > 1 and np.array_equal(coords[ring[0]], coords[ring[-1]]):
+        ring = ring[:-1]
+    if len(ring) > 1:
+        keep = np.any(coords[ring] != coords[np.roll(ring, 1)], axis=1)
+        ring = ring[keep]
+    return ring
+
+def _bridge_hole(coords, outer, hole):
+    """
+    Joins a hole to the outer ring with a pair of coincident edges (Eberly's method).
+    """
+    hole_points = coords[hole]
+    m = int(np.argmax(hole_points[:, 0]))
+    mx, my = hole_points[m]
+
+    # Cast a ray from the hole's rightmost vertex towards +x and find the closest outer edge it hits
+    a = coords[outer]
+    b = coords[np.roll(outer, -1)]
+    crosses = (a[:, 1] > my) != (b[:, 1] > my)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hit_x = a[:, 0] + (my - a[:, 1]) * (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1])
+    candidates = np.nonzero(crosses & (hit_x >= mx))[0]
+    if len(candidates) == 0:
+        # Hole outside the outer ring, connect it to the nearest vertex instead
+        k = int(np.argmin(np.sum((a - hole_points[m]) ** 2, axis=1)))
+    else:
+        edge = candidates[np.argmin(hit_x[candidates])]
+        k = edge if a[edge, 0] > b[edge, 0] else (edge + 1) % len(outer)
+        hit = np.array([hit_x[edge], my])
+
+        # A reflex vertex inside the triangle (M, hit, P) would block the bridge, take the best one of those
+        points = coords[outer]
+        prev_points = np.roll(points, 1, axis=0)
+        next_points = np.roll(points, -1, axis=0)
+        reflex = _cross(prev_points, points, next_points) <= 0
+        inside = _in_triangle(points, hole_points[m], hit, points[k]) & reflex
+        inside[k] = False
+        if inside.any():
+            blocking = np.nonzero(inside)[0]
+            offsets = points[blocking] - hole_points[m]
+            angles = np.abs(np.arctan2(offsets[:, 1], offsets[:, 0]))
+            k = blocking[np.argmin(angles)]
+
+    hole = np.roll(hole, -m)
+    return np.concatenate([outer[:k + 1], hole, hole[:1], outer[k:]])
+
+def _cross(a, b, c):
+    return (b[..., 0] - a[..., 0]) * (c[..., 1] - a[..., 1]) - (b[..., 1] - a[..., 1]) * (c[..., 0] - a[..., 0])
+
+def _in_triangle(points, a, b, c):
+    # Inclusive test against a counter-clockwise or clockwise triangle
+    d1 = _cross(a, b, points)
+    d2 = _cross(b, c, points)
+    d3 = _cross(c, a, points)
+    has_negative = (d1 < 0) | (d2 < 0) | (d3 < 0)
+    has_positive = (d1 > 0) | (d2 > 0) | (d3 > 0)
+    return ~(has_negative & has_positive)
+
+def ear_clip_polygon(coords, ring_offsets):
+    """
+    Triangulates one polygon with holes by ear clipping.
+
+    Args:
+        coords (np.array): (N, 2) vertices of the polygon's rings, back to back.
+        ring_offsets (np.array): Start of each ring in coords plus the end, the first ring is the exterior.
+
+    Returns:
+        np.array: (T, 3) counter-clockwise triangles as indices into coords.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    rings = [_open_ring(coords, ring_offsets[r], ring_offsets[r + 1]) for r in range(len(ring_offsets) - 1)]
+    outer = rings[0]
+    if len(outer) < 3:
+        return np.empty((0, 3), dtype=np.int64)
+    if _signed_area(coords[outer]) < 0:
+        outer = outer[::-1]
+
+    # Holes run clockwise and are bridged in from right to left
+    holes = [hole if _signed_area(coords[hole]) < 0 else hole[::-1] for hole in rings[1:] if len(hole) >= 3]
+    holes.sort(key=lambda hole: -coords[hole, 0].max())
+    for hole in holes:
+        outer = _bridge_hole(coords, outer, hole)
+
+    remaining = list(outer)
+    triangles = []
+    stalled = 0
+    i = 0
+    while len(remaining) > 3:
+        n = len(remaining)
+        prev, current, following = remaining[(i - 1) % n], remaining[i % n], remaining[(i + 1) % n]
+        a, b, c = coords[prev], coords[current], coords[following]
+
+        is_ear = _cross(a, b, c) > 0
+        if is_ear:
+            # No other vertex may lie inside the ear; bridge duplicates share coordinates with a, b or c
+            others = coords[remaining]
+            inside = _in_triangle(others, a, b, c)
+            shared = np.all(others == a, axis=1) | np.all(others == b, axis=1) | np.all(others == c, axis=1)
+            is_ear = not np.any(inside & ~shared)
+
+        # Degenerate input can leave no proper ear, clip anyway rather than loop forever
+        if is_ear or stalled > n:
+            triangles.append((prev, current, following))
+            del remaining[i % n]
+            stalled = 0
+        else:
+            i += 1
+            stalled += 1
+
+    triangles.append(tuple(remaining))
+    return np.array(triangles, dtype=np.int64).reshape(-1, 3)
+
+def _ear_clip_chunk(chunk):
+    # Runs in a worker process, chunk holds (vertex offset, coords, ring offsets) per polygon
+    return [offset + ear_clip_polygon(coords, ring_offsets) for offset, coords, ring_offsets in chunk]
+
+def _delaunay_chunk(coords, ring_offsets, polygon_offsets, first, last):
+    """
+    Triangulates polygons first..last-1 with GEOS constrained Delaunay triangulation.
+
+    Returns a (T, 3) array of global vertex indices, or None when an input polygon could
+    not be triangulated without new vertices so the caller can fall back to ear clipping.
+    """
+    vertex_start = ring_offsets[polygon_offsets[first]]
+    vertex_stop = ring_offsets[polygon_offsets[last]]
+    local_rings = ring_offsets[polygon_offsets[first]:polygon_offsets[last] + 1] - vertex_start
+    local_polygons = polygon_offsets[first:last + 1] - polygon_offsets[first]
+    block = np.asarray(coords[vertex_start:vertex_stop], dtype=np.float64)
+
+    polygons = shapely.from_ragged_array(shapely.GeometryType.POLYGON, block, (local_rings, local_polygons))
+    triangles, polygon_ids = shapely.get_parts(shapely.constrained_delaunay_triangles(polygons), return_index=True)
+    if len(triangles) == 0:
+        return np.empty((0, 3), dtype=np.int64)
+    corners = shapely.get_coordinates(triangles).reshape(-1, 4, 2)[:, :3]
+
+    # Match every corner back to a vertex of its own polygon
+    vertex_polygon = np.repeat(np.arange(last - first), np.diff(local_rings[local_polygons]))
+    # Number the distinct coordinates (complex values sort as one key) and pair them with the polygon
+    points = np.concatenate((block, corners.reshape(-1, 2)))
+    distinct, point_ids = np.unique(points[:, 0] + 1j * points[:, 1], return_inverse=True)
+    polygons_of_points = np.concatenate((vertex_polygon, np.repeat(polygon_ids, 3)))
+    keys = polygons_of_points.astype(np.int64) * len(distinct) + point_ids.ravel()
+    vertex_keys, corner_keys = keys[:len(block)], keys[len(block):]
+
+    # A stable sort keeps the first of repeated vertices (e.g. closing points) in front
+    order = np.argsort(vertex_keys, kind="stable")
+    found = np.minimum(np.searchsorted(vertex_keys[order], corner_keys), len(block) - 1)
+    indices = np.where(vertex_keys[order][found] == corner_keys, order[found], -1).reshape(-1, 3)
+    if (indices < 0).any():
+        return None
+
+    return indices + vertex_start
+
+def _orient_counter_clockwise(coords, triangles):
+    # GL culls back faces, so give every triangle the winding of the outer rings
+    points = np.asarray(coords)[triangles]
+    flip = _cross(points[:, 0], points[:, 1], points[:, 2]) < 0
+    triangles[flip] = triangles[flip][:, ::-1]
+    return triangles
+
+def triangulate_polygons(coords, ring_offsets, polygon_offsets, workers=None):
+    """
+    Triangulates a columnar polygon dataset, holes included.
+
+    Uses GEOS constrained Delaunay triangulation (shapely 2.1 or newer), which runs on
+    whole arrays of polygons and releases the GIL, so chunks are spread over a thread
+    pool. Chunks it cannot handle, or every chunk on older shapely versions, are ear
+    clipped in a process pool instead.
+
+    Args:
+        coords (np.array): (N, 2) ring vertices, back to back.
+        ring_offsets (np.array): Start of each ring in coords plus the end.
+        polygon_offsets (np.array): Start of each polygon in the rings plus the end.
+        workers (int): Number of worker threads or processes, defaults to the number of CPUs.
+
+    Returns:
+        np.array: (T, 3) counter-clockwise triangles as uint32 indices into coords.
+    """
+    ring_offsets = np.asarray(ring_offsets)
+    polygon_offsets = np.asarray(polygon_offsets)
+    polygon_count = len(polygon_offsets) - 1
+    chunks = [(first, min(first + CHUNK_SIZE, polygon_count)) for first in range(0, polygon_count, CHUNK_SIZE)]
+    workers = workers or os.cpu_count()
+
+    results = [None] * len(chunks)
+    if hasattr(shapely, "constrained_delaunay_triangles"):
+        def run(chunk):
+            try:
+                return _delaunay_chunk(coords, ring_offsets, polygon_offsets, *chunk)
+            except shapely.errors.GEOSException:
+                return None
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run, chunks))
+
+    fallback = [index for index, result in enumerate(results) if result is None]
+    if fallback:
+        jobs = []
+        for index in fallback:
+            first, last = chunks[index]
+            job = []
+            for polygon in range(first, last):
+                rings = ring_offsets[polygon_offsets[polygon]:polygon_offsets[polygon + 1] + 1]
+                if len(rings) < 2:
+                    continue
+                job.append((int(rings[0]), np.asarray(coords[rings[0]:rings[-1]]), rings - rings[0]))
+            jobs.append(job)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for index, triangles in zip(fallback, executor.map(_ear_clip_chunk, jobs)):
+                results[index] = np.concatenate(triangles) if triangles else np.empty((0, 3), dtype=np.int64)
+
+    if not results:
+        return np.empty((0, 3), dtype=np.uint32)
+    triangles = _orient_counter_clockwise(coords, np.concatenate(results))
+    return triangles.astype(np.uint32)
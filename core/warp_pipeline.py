@@ -0,0 +1,337 @@
+import os
+import queue
+import threading
+from PIL import Image
+import image_warp as iw
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+# Marks the end of the stream as it travels through the queues
+_END_OF_STREAM = object()
+
+class _StageError:
+    """
+    Carries an exception raised in a worker thread down the pipeline to the consumer.
+    """
+    def __init__(self, error):
+        self.error = error
+
+def frames_from_directory(directory, extensions=IMAGE_EXTENSIONS):
+    """
+    Yields the images of a directory in file name order, e.g. a TouchDesigner render sequence.
+
+    Args:
+        directory (str): Directory containing the frames.
+        extensions (tuple): File extensions treated as frames.
+
+    Yields:
+        PIL.Image: The decoded frames.
+    """
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(extensions):
+            continue
+        with Image.open(os.path.join(directory, name)) as frame:
+            # Force the decode here so it happens on the decoding thread
+            frame.load()
+            yield frame.copy()
+
+def frames_from_video(video_path):
+    """
+    Yields the frames of a video file. Requires OpenCV (opencv-python).
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Yields:
+        PIL.Image: The decoded RGB frames.
+    """
+    try:
+        import cv2
+    except ImportError as e:
+        raise RuntimeError("Reading video requires OpenCV, install opencv-python") from e
+
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise RuntimeError(f"Could not open video {video_path}")
+    try:
+        while True:
+            success, frame = capture.read()
+            if not success:
+                break
+            yield Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    finally:
+        capture.release()
+
+def save_frames_to_directory(output_dir, prefix="warped"):
+    """
+    Creates a sink that writes each warped frame to a numbered PNG file.
+
+    Args:
+        output_dir (str): Directory the frames are written to.
+        prefix (str): File name prefix of the frames.
+
+    Returns:
+        callable: Sink taking (frame_index, image).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    def sink(frame_index, image):
+        image.save(os.path.join(output_dir, f"{prefix}{frame_index:05d}.png"))
+
+    return sink
+
+class QueueSink:
+    """
+    Sink handing warped frames to a consumer on another thread, e.g. a GUI timer.
+
+    The queue is bounded, so a display that falls behind blocks the pipeline instead of
+    letting frames pile up in memory.
+
+    Attributes:
+        frames (queue.Queue): (frame_index, image) pairs the consumer has not taken yet.
+        finished (bool): Whether the pipeline delivered its last frame or failed.
+        error (Exception): The exception that ended the pipeline, if any.
+    """
+
+    def __init__(self, queue_size=2):
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.finished = False
+        self.error = None
+        self._closed = threading.Event()
+
+    def __call__(self, frame_index, image):
+        # Wait for the consumer, unless it went away
+        while not self._closed.is_set():
+            try:
+                self.frames.put((frame_index, image), timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def get(self):
+        """
+        Takes the next frame without waiting.
+
+        Returns:
+            tuple: (frame_index, image), or None when no frame is ready.
+        """
+        try:
+            return self.frames.get_nowait()
+        except queue.Empty:
+            return None
+
+    def finish(self, error=None):
+        """
+        Marks the end of the stream, called by WarpPipeline.start once it is done.
+
+        Args:
+            error (Exception): The exception that ended the pipeline, if any.
+        """
+        self.error = error
+        self.finished = True
+
+    def done(self):
+        """
+        Returns:
+            bool: Whether every frame was delivered and taken.
+        """
+        return self.finished and self.frames.empty()
+
+    def close(self):
+        """
+        Stops accepting frames, so a pipeline blocked on a full queue can shut down.
+        """
+        self._closed.set()
+
+class WarpPipeline:
+    """
+    Streams frames through the proxy and bulge warp on background threads.
+
+    Decoding and warping each run on their own thread and hand frames over through
+    bounded queues, so a slow consumer applies backpressure instead of letting frames
+    pile up in memory, and throughput is limited by the slowest stage only.
+
+    Attributes:
+        source (iterable): Frames to warp, e.g. from frames_from_directory().
+        bulge_factor (float): Strength of the radial bulge.
+        bulge_exponent (float): Exponent applied to the radius inside the bulge.
+        scale_down_factor (float): Scale of the image inside the proxy.
+        queue_size (int): Maximum number of frames buffered between two stages.
+        cache_dir (str): Directory for persisted warp maps, optional.
+        sampling (str): "nearest", "bilinear" or "bicubic".
+    """
+
+    def __init__(self, source, bulge_factor, bulge_exponent, scale_down_factor=1.01, queue_size=4, cache_dir=None, sampling="nearest"):
+        """
+        Initializes the WarpPipeline; no thread is started until frames are requested.
+
+        Args:
+            source (iterable): Frames to warp, as PIL images.
+            bulge_factor (float): Strength of the radial bulge.
+            bulge_exponent (float): Exponent applied to the radius inside the bulge.
+            scale_down_factor (float): Scale of the image inside the proxy.
+            queue_size (int): Maximum number of frames buffered between two stages.
+            cache_dir (str): Directory for persisted warp maps, optional.
+            sampling (str): "nearest", "bilinear" or "bicubic".
+        """
+        self.source = source
+        self.bulge_factor = bulge_factor
+        self.bulge_exponent = bulge_exponent
+        self.scale_down_factor = scale_down_factor
+        self.queue_size = queue_size
+        self.cache_dir = cache_dir
+        self.sampling = sampling
+        self._stop_event = threading.Event()
+
+    def _put(self, out_queue, item):
+        # Block while the next stage is busy, but give up once the pipeline is stopped
+        while not self._stop_event.is_set():
+            try:
+                out_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, in_queue):
+        while not self._stop_event.is_set():
+            try:
+                return in_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END_OF_STREAM
+
+    def _decode_stage(self, out_queue):
+        try:
+            for frame in self.source:
+                if not self._put(out_queue, frame):
+                    return
+        except Exception as e:
+            self._put(out_queue, _StageError(e))
+            return
+        self._put(out_queue, _END_OF_STREAM)
+
+    def _warp_stage(self, in_queue, out_queue):
+        while True:
+            frame = self._get(in_queue)
+            if frame is _END_OF_STREAM or isinstance(frame, _StageError):
+                self._put(out_queue, frame)
+                return
+            try:
+                warped = iw.warp_image(frame, bulge_factor=self.bulge_factor, bulge_exponent=self.bulge_exponent,
+                                       scale_down_factor=self.scale_down_factor, cache_dir=self.cache_dir, sampling=self.sampling)
+            except Exception as e:
+                self._put(out_queue, _StageError(e))
+                return
+            if not self._put(out_queue, warped):
+                return
+
+    def frames(self):
+        """
+        Starts the stages and yields the warped frames in order.
+
+        Yields:
+            PIL.Image: The warped frames.
+        """
+        self._stop_event.clear()
+        decoded = queue.Queue(maxsize=self.queue_size)
+        warped = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self._decode_stage, args=(decoded,), daemon=True),
+            threading.Thread(target=self._warp_stage, args=(decoded, warped), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                frame = self._get(warped)
+                if frame is _END_OF_STREAM:
+                    return
+                if isinstance(frame, _StageError):
+                    raise frame.error
+                yield frame
+        finally:
+            # Also reached when the consumer stops iterating early
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+    def run(self, sink):
+        """
+        Runs the pipeline to completion, handing every warped frame to the sink.
+
+        Args:
+            sink (callable): Called with (frame_index, image) for every warped frame.
+
+        Returns:
+            int: Number of frames processed.
+        """
+        count = 0
+        for frame_index, frame in enumerate(self.frames()):
+            sink(frame_index, frame)
+            count += 1
+        return count
+
+    def start(self, sink, on_finished=None):
+        """
+        Runs the pipeline on a background thread, e.g. to feed a QueueSink read by a display.
+
+        Args:
+            sink (callable): Called with (frame_index, image) for every warped frame.
+            on_finished (callable): Called with the exception that ended the run, or None, when done.
+
+        Returns:
+            threading.Thread: The thread running the pipeline.
+        """
+        def run():
+            error = None
+            try:
+                self.run(sink)
+            except Exception as e:
+                error = e
+            if on_finished is not None:
+                on_finished(error)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """
+        Stops all stages; frames still queued are dropped.
+        """
+        self._stop_event.set()
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    from utils import tracing
+
+    tracing.configure()
+    parser = argparse.ArgumentParser(description="Warps a frame sequence or video for the balloon projectors.")
+    parser.add_argument("source", help="directory of frames in file name order, or a video file")
+    parser.add_argument("--output", help="write the warped frames to this directory instead of showing them")
+    parser.add_argument("--stretch", type=float, default=8, help="stretch factor, as in application.py")
+    parser.add_argument("--screen", type=int, help="screen (projector) to show the frames on")
+    parser.add_argument("--fps", type=float, default=30, help="display rate in frames per second")
+    args = parser.parse_args()
+
+    bf, bge = iw.stretch_to_bulge(args.stretch)
+    source = frames_from_directory(args.source) if os.path.isdir(args.source) else frames_from_video(args.source)
+    pipeline = WarpPipeline(source, bulge_factor=bf, bulge_exponent=bge, scale_down_factor=1.01,
+                            cache_dir=os.path.join("core", "image_assets", "warp_cache"))
+
+    if args.output:
+        frame_count = pipeline.run(save_frames_to_directory(args.output))
+        print(f"Warped {frame_count} frames into {args.output}")
+    else:
+        from PyQt5.QtWidgets import QApplication
+        from application import ImageWindow, PipelinePlayer
+
+        app = QApplication(sys.argv)
+        window = ImageWindow(None, screen_index=args.screen)
+        player = PipelinePlayer(window, pipeline, fps=args.fps)
+        app.aboutToQuit.connect(player.stop)
+        player.start()
+        sys.exit(app.exec_())